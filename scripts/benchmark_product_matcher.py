@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Microbenchmark ProductMatcher scaling on synthetic catalogs.
+
+For every catalog size (default 10, 100, 1000 and 10000 SKUs) a synthetic
+catalog is generated once under ``--work-dir`` and reused on later runs: one
+640x480 reference per SKU with the SKU's name plus seeded random shapes, in
+the style of ``_make_reference_image`` in the inference tests. Each size runs
+in a fresh interpreter, which builds the index (no index cache), then matches
+``--queries`` perturbed copies of known references on one thread, stopping
+early (after at least three) once ``--query-budget-s`` is spent: exhaustive
+ORB matching over 10k SKUs takes tens of seconds per query.
+
+Per size the results hold index build time, index bytes (numpy arrays) and
+the process RSS growth during the build, per-query latency (p50/p95) and the
+median of every ``Server-Timing`` stage, single-core throughput (queries per
+CPU second) and top-1 accuracy as a sanity check. Feature settings come from
+the usual ``VBIC_*`` variables.
+
+``--output-json`` stores the results; ``--baseline`` compares against an
+earlier file and exits 1 when build time, index bytes or p50/p95 query
+latency grew by more than ``--max-regression`` (default 20%).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+SERVICE_DIR = Path(__file__).resolve().parents[1] / "services" / "inference"
+
+# Metric paths compared against the baseline; all of them are "lower is better".
+REGRESSION_METRICS = ("build_s", "index_bytes", "query_ms.p50", "query_ms.p95")
+
+
+def _reference_image(position: int):
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(position)
+    image = np.full((480, 640, 3), 255, dtype=np.uint8)
+    cv2.rectangle(image, (20, 20), (620, 460), (0, 0, 0), 3)
+    for _ in range(6):
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        x, y = (int(v) for v in rng.integers(40, 520, 2))
+        w, h = (int(v) for v in rng.integers(20, 100, 2))
+        cv2.rectangle(image, (x, min(y, 380)), (x + w, min(y, 380) + h), color, -1)
+    cv2.putText(
+        image,
+        f"ITEM {position}",
+        (60, 280),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        2.0,
+        (0, 0, 0),
+        5,
+        cv2.LINE_AA,
+    )
+    return image
+
+
+def _ensure_catalog(root: Path, skus: int) -> Path:
+    import cv2
+
+    catalog_dir = root / f"catalog_{skus}"
+    marker = catalog_dir / ".complete"
+    if marker.exists():
+        return catalog_dir
+    rows = ["sku,name,price_cents"]
+    for position in range(skus):
+        sku = str(100000 + position)
+        rows.append(f"{sku},Item {position},100")
+        sku_dir = catalog_dir / "images" / sku
+        sku_dir.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(sku_dir / "ref.jpg"), _reference_image(position))
+    (catalog_dir / "catalog.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+    marker.touch()
+    return catalog_dir
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux); 0 where /proc is not available."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def run_child(skus: int, args: argparse.Namespace) -> dict[str, Any]:
+    sys.path.insert(0, str(SERVICE_DIR))
+    import cv2
+    import numpy as np
+    from app.core.config import get_settings
+    from app.core.product_matcher import ProductMatcher, product_matcher_kwargs
+    from app.core.timing import start_request_timings
+
+    cv2.setNumThreads(1)
+    catalog_dir = _ensure_catalog(Path(args.work_dir), skus)
+    kwargs = product_matcher_kwargs(get_settings())
+    kwargs.update(
+        catalog_csv_path=str(catalog_dir / "catalog.csv"),
+        reference_images_dir=str(catalog_dir / "images"),
+        index_cache_path=None,
+    )
+
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    matcher = ProductMatcher(**kwargs, record_decisions=False)
+    build_s = time.perf_counter() - started
+    rss_delta = _rss_bytes() - rss_before
+
+    rng = np.random.default_rng(skus)
+    positions = rng.choice(skus, size=args.queries, replace=skus < args.queries)
+    latencies: list[float] = []
+    cpu_s = 0.0
+    correct = 0
+    stages: dict[str, list[float]] = {}
+    for position in positions:
+        if len(latencies) >= 3 and sum(latencies) / 1000.0 >= args.query_budget_s:
+            break
+        query = _reference_image(int(position))
+        # Shift and add noise so queries are not pixel-identical to references.
+        query = np.roll(query, int(rng.integers(-12, 12)), axis=1)
+        noise = rng.integers(-20, 20, query.shape)
+        query = np.clip(query.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+        timings = start_request_timings()
+        cpu_started = time.thread_time()
+        predictions = matcher.predict(query)
+        cpu_s += time.thread_time() - cpu_started
+        latencies.append(timings.elapsed_ms())
+        for name, duration_ms in timings.as_dict().items():
+            stages.setdefault(name, []).append(duration_ms)
+        if predictions and predictions[0]["label"] == f"Item {int(position)}":
+            correct += 1
+
+    return {
+        "skus": skus,
+        "indexed": matcher.index_counts(),
+        "build_s": build_s,
+        "index_bytes": matcher.index_nbytes(),
+        "rss_delta_bytes": rss_delta,
+        "queries": len(latencies),
+        "query_ms": {
+            "mean": statistics.fmean(latencies),
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+        },
+        "stage_ms_median": {
+            name: statistics.median(values) for name, values in stages.items()
+        },
+        "queries_per_cpu_s": len(latencies) / cpu_s if cpu_s else 0.0,
+        "top1_accuracy": correct / len(latencies),
+    }
+
+
+def _metric(result: dict[str, Any], path: str) -> float | None:
+    value: Any = result
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return float(value)
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], threshold: float
+) -> list[str]:
+    """Return one line per metric that regressed beyond ``threshold``."""
+    by_size = {entry["skus"]: entry for entry in baseline}
+    regressions = []
+    for result in results:
+        previous = by_size.get(result["skus"])
+        if previous is None:
+            continue
+        for path in REGRESSION_METRICS:
+            current, before = _metric(result, path), _metric(previous, path)
+            if current is None or not before:
+                continue
+            change = current / before - 1.0
+            if change > threshold:
+                regressions.append(
+                    f"{result['skus']} SKUs {path}: {before:.4g} -> {current:.4g} "
+                    f"({change:+.1%})"
+                )
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--query-budget-s", type=float, default=60.0)
+    parser.add_argument(
+        "--work-dir",
+        default=str(Path(tempfile.gettempdir()) / "vbic-matcher-bench"),
+        help="Where synthetic catalogs are generated and kept between runs.",
+    )
+    parser.add_argument("--output-json", default=None)
+    parser.add_argument("--baseline", default=None, help="Earlier --output-json.")
+    parser.add_argument("--max-regression", type=float, default=0.20)
+    parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.child is not None:
+        print(json.dumps(run_child(args.child, args)))
+        return 0
+
+    results = []
+    print(
+        f"{'skus':>6} {'build s':>9} {'index MB':>9} {'rss MB':>8} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'q/cpu-s':>8} {'top1':>6}"
+    )
+    for skus in (int(size) for size in args.sizes.split(",") if size.strip()):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                str(skus),
+                "--queries",
+                str(args.queries),
+                "--query-budget-s",
+                str(args.query_budget_s),
+                "--work-dir",
+                args.work_dir,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            print(f"- {skus} SKUs: failed\n{completed.stderr}", file=sys.stderr)
+            return 1
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(
+            f"{skus:>6} {result['build_s']:>9.2f} "
+            f"{result['index_bytes'] / 1e6:>9.1f} "
+            f"{result['rss_delta_bytes'] / 1e6:>8.1f} "
+            f"{result['query_ms']['p50']:>9.2f} {result['query_ms']['p95']:>9.2f} "
+            f"{result['queries_per_cpu_s']:>8.1f} {result['top1_accuracy']:>6.0%}"
+        )
+
+    if args.output_json:
+        output = Path(args.output_json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(
+                f"\nRegressions beyond {args.max_regression:.0%} against "
+                f"{args.baseline}:",
+                file=sys.stderr,
+            )
+            for line in regressions:
+                print(f"- {line}", file=sys.stderr)
+            return 1
+        print(f"\nNo regressions beyond {args.max_regression:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Compare request CPU time of raw-frame ingestion against the JPEG multipart path.
+
+Runs the inference app in-process and sends the same frame N times to:
+1) POST /predict with a JPEG in a multipart form (what kiosks do today).
+2) POST /predict/raw with the uncompressed BGR or NV12 buffer.
+
+It reports ingest-only CPU time (decode/wrap of the payload) and whole-request
+CPU time. Unless --catalog-csv/--images-dir are given, a small synthetic
+catalog is generated so the numbers are reproducible on any machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import cv2
+import numpy as np
+
+SERVICE_DIR = Path(__file__).resolve().parents[1] / "services" / "inference"
+
+
+def _make_frame(text: str, width: int, height: int) -> np.ndarray:
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.rectangle(image, (20, 20), (width - 20, height - 20), (0, 0, 0), 3)
+    cv2.putText(
+        image,
+        text,
+        (60, height // 2),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        2.5,
+        (0, 0, 0),
+        6,
+        cv2.LINE_AA,
+    )
+    return image
+
+
+def _write_synthetic_catalog(root: Path, width: int, height: int) -> None:
+    names = ["APPLE", "BANANA", "KIWI", "MANGO"]
+    rows = ["sku,name,price_cents"]
+    for position, name in enumerate(names):
+        sku = str(1001 + position)
+        rows.append(f"{sku},{name.title()},100")
+        sku_dir = root / "images" / sku
+        sku_dir.mkdir(parents=True)
+        ok, jpeg = cv2.imencode(".jpg", _make_frame(name, width, height))
+        assert ok
+        (sku_dir / "ref.jpg").write_bytes(jpeg.tobytes())
+    (root / "catalog.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+
+def _bgr_to_nv12(bgr: np.ndarray) -> bytes:
+    height, width = bgr.shape[:2]
+    flat = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420).reshape(-1)
+    luma = height * width
+    u = flat[luma : luma + luma // 4]
+    v = flat[luma + luma // 4 :]
+    uv = np.stack([u, v], axis=1).reshape(-1)
+    return np.concatenate([flat[:luma], uv]).tobytes()
+
+
+def _cpu_ms(fn: Callable[[], object], iterations: int) -> list[float]:
+    samples: list[float] = []
+    for _ in range(iterations):
+        started = time.process_time()
+        fn()
+        samples.append((time.process_time() - started) * 1000.0)
+    return samples
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": ordered[len(ordered) // 2],
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--jpeg-quality", type=int, default=90)
+    parser.add_argument("--raw-format", choices=["bgr", "nv12"], default="bgr")
+    parser.add_argument("--catalog-csv", default=None)
+    parser.add_argument("--images-dir", default=None)
+    parser.add_argument("--query-image", default=None, help="Frame to send.")
+    parser.add_argument("--output-json", default=None)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    workdir = tempfile.TemporaryDirectory()
+    if args.catalog_csv and args.images_dir:
+        os.environ["VBIC_CATALOG_CSV_PATH"] = args.catalog_csv
+        os.environ["VBIC_REFERENCE_IMAGES_DIR"] = args.images_dir
+    else:
+        root = Path(workdir.name)
+        _write_synthetic_catalog(root, args.width, args.height)
+        os.environ["VBIC_CATALOG_CSV_PATH"] = str(root / "catalog.csv")
+        os.environ["VBIC_REFERENCE_IMAGES_DIR"] = str(root / "images")
+        os.environ.setdefault("VBIC_MIN_REF_DESCRIPTORS", "0")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+    sys.path.insert(0, str(SERVICE_DIR))
+    from app.core.raw_frames import frame_from_buffer  # noqa: E402
+    from app.main import app  # noqa: E402
+    from fastapi.testclient import TestClient  # noqa: E402
+
+    if args.query_image:
+        frame = cv2.imread(args.query_image, cv2.IMREAD_COLOR)
+        if frame is None:
+            print(f"Could not read {args.query_image}", file=sys.stderr)
+            return 2
+    else:
+        frame = _make_frame("APPLE", args.width, args.height)
+    height, width = frame.shape[:2]
+    height -= height % 2
+    width -= width % 2
+    frame = np.ascontiguousarray(frame[:height, :width])
+
+    # The kiosk-side JPEG encode is part of today's cost, so it is measured too.
+    encode_ms = _cpu_ms(
+        lambda: cv2.imencode(
+            ".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), args.jpeg_quality]
+        ),
+        args.iterations,
+    )
+    ok, jpeg = cv2.imencode(
+        ".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), args.jpeg_quality]
+    )
+    assert ok
+    jpeg_bytes = jpeg.tobytes()
+    raw_bytes = frame.tobytes() if args.raw_format == "bgr" else _bgr_to_nv12(frame)
+
+    ingest = {
+        "jpeg_imdecode": _summary(
+            _cpu_ms(
+                lambda: cv2.imdecode(
+                    np.frombuffer(jpeg_bytes, dtype=np.uint8), cv2.IMREAD_COLOR
+                ),
+                args.iterations,
+            )
+        ),
+        f"raw_{args.raw_format}": _summary(
+            _cpu_ms(
+                lambda: frame_from_buffer(
+                    raw_bytes, fmt=args.raw_format, width=width, height=height
+                ),
+                args.iterations,
+            )
+        ),
+    }
+
+    raw_headers = {
+        "Content-Type": "application/octet-stream",
+        "X-VBIC-Frame-Format": args.raw_format,
+        "X-VBIC-Frame-Width": str(width),
+        "X-VBIC-Frame-Height": str(height),
+    }
+    with TestClient(app) as client:
+        # Warm up: the first request builds the reference index.
+        client.post("/predict/raw", content=raw_bytes, headers=raw_headers)
+        multipart_ms = _cpu_ms(
+            lambda: client.post(
+                "/predict",
+                files={"file": ("frame.jpg", io.BytesIO(jpeg_bytes), "image/jpeg")},
+            ).raise_for_status(),
+            args.iterations,
+        )
+        raw_ms = _cpu_ms(
+            lambda: client.post(
+                "/predict/raw", content=raw_bytes, headers=raw_headers
+            ).raise_for_status(),
+            args.iterations,
+        )
+
+    results = {
+        "frame": {"width": width, "height": height, "raw_format": args.raw_format},
+        "payload_bytes": {"jpeg": len(jpeg_bytes), "raw": len(raw_bytes)},
+        "kiosk_jpeg_encode": _summary(encode_ms),
+        "ingest_cpu": ingest,
+        "request_cpu": {
+            "jpeg_multipart": _summary(multipart_ms),
+            "raw": _summary(raw_ms),
+        },
+    }
+    workdir.cleanup()
+
+    print(json.dumps(results, indent=2))
+    if args.output_json:
+        output = Path(args.output_json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Measure per-request tracing overhead on the inference service.
+
+Each tracing mode runs in a fresh interpreter (the tracer provider is global
+and can only be set once). The child builds the inference app on a synthetic
+catalog, sets up telemetry with an in-memory span exporter instead of OTLP,
+and drives ``/predict`` and ``/healthz`` in-process through
+``httpx.ASGITransport``, so the numbers are not dominated by network noise.
+Overhead is reported against the ``off`` mode (``OTEL_SDK_DISABLED=true``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+SERVICE_DIR = Path(__file__).resolve().parents[1] / "services" / "inference"
+
+MODES: dict[str, dict[str, str]] = {
+    "off": {"OTEL_SDK_DISABLED": "true"},
+    # The previous behaviour: every request traced, probes included.
+    "always_on": {
+        "OTEL_TRACES_SAMPLER": "always_on",
+        "OTEL_PYTHON_FASTAPI_EXCLUDED_URLS": "",
+    },
+    "default": {},
+    "ratio_10pct": {"OTEL_TRACES_SAMPLER_ARG": "0.1"},
+    "ratio_10pct_tail": {
+        "OTEL_TRACES_SAMPLER_ARG": "0.1",
+        "VBIC_TRACES_KEEP_SLOW_MS": "250",
+        "VBIC_TRACES_KEEP_ERRORS": "true",
+    },
+}
+
+
+def _write_synthetic_catalog(root: Path, skus: int) -> bytes:
+    import cv2
+    import numpy as np
+
+    def _frame(text: str) -> np.ndarray:
+        image = np.full((480, 640, 3), 255, dtype=np.uint8)
+        cv2.rectangle(image, (20, 20), (620, 460), (0, 0, 0), 3)
+        cv2.putText(image, text, (60, 240), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 6)
+        return image
+
+    rows = ["sku,name,price_cents"]
+    for position in range(skus):
+        sku = str(1001 + position)
+        rows.append(f"{sku},Item{position},100")
+        sku_dir = root / "images" / sku
+        sku_dir.mkdir(parents=True)
+        ok, jpeg = cv2.imencode(".jpg", _frame(f"ITEM{position}"))
+        assert ok
+        (sku_dir / "ref.jpg").write_bytes(jpeg.tobytes())
+    (root / "catalog.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+    # A small query keeps matching cheap, so the tracing cost is not lost in the
+    # noise of the ORB work.
+    ok, query = cv2.imencode(".jpg", cv2.resize(_frame("ITEM0"), (160, 120)))
+    assert ok
+    return query.tobytes()
+
+
+async def _drive(app, path: str, body: bytes | None, requests: int) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    wall_ms: list[float] = []
+    cpu_started = time.process_time()
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for _ in range(requests):
+            started = time.perf_counter()
+            if body is None:
+                response = await client.get(path)
+            else:
+                response = await client.post(
+                    path, content=body, headers={"Content-Type": "image/jpeg"}
+                )
+            wall_ms.append((time.perf_counter() - started) * 1000.0)
+            response.raise_for_status()
+    cpu_ms = (time.process_time() - cpu_started) * 1000.0
+    return {
+        "requests": requests,
+        "mean_ms": statistics.fmean(wall_ms),
+        "p50_ms": statistics.median(wall_ms),
+        "cpu_ms_per_request": cpu_ms / requests,
+    }
+
+
+def run_child(mode: str, args: argparse.Namespace) -> dict[str, Any]:
+    workdir = tempfile.TemporaryDirectory()
+    root = Path(workdir.name)
+    query = _write_synthetic_catalog(root, args.skus)
+    os.environ.update(
+        VBIC_CATALOG_CSV_PATH=str(root / "catalog.csv"),
+        VBIC_REFERENCE_IMAGES_DIR=str(root / "images"),
+        VBIC_MIN_REF_DESCRIPTORS="0",
+        # Keep the module-level app in app.main from claiming the tracer provider.
+        OTEL_SDK_DISABLED="true",
+    )
+    sys.path.insert(0, str(SERVICE_DIR))
+    from app.core.product_matcher import get_product_matcher
+    from app.instrumentation import setup_telemetry
+    from app.main import create_app
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    os.environ.update(OTEL_SDK_DISABLED="false", OTEL_METRICS_EXPORTER="none")
+    os.environ.update(MODES[mode])
+
+    app = create_app()
+    exporter = InMemorySpanExporter()
+    setup_telemetry(app, service_name="inference-bench", span_exporter=exporter)
+    get_product_matcher()
+
+    async def _run() -> dict[str, Any]:
+        await _drive(app, "/predict", query, args.warmup)
+        return {
+            "predict": await _drive(app, "/predict", query, args.requests),
+            "healthz": await _drive(app, "/healthz", None, args.requests),
+        }
+
+    result = asyncio.run(_run())
+
+    from opentelemetry import trace
+
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "force_flush"):
+        provider.force_flush()
+    result["spans_exported"] = len(exporter.get_finished_spans())
+    workdir.cleanup()
+    return {"mode": mode, **result}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--mode",
+        action="append",
+        choices=sorted(MODES),
+        help="Tracing mode to measure (repeatable). Defaults to all modes.",
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--skus", type=int, default=5)
+    parser.add_argument("--output-json", default=None)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.child:
+        print(json.dumps(run_child(args.child, args)))
+        return 0
+
+    modes = args.mode or list(MODES)
+    if "off" not in modes:
+        modes.insert(0, "off")
+    results = []
+    for mode in modes:
+        completed = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                mode,
+                "--requests",
+                str(args.requests),
+                "--warmup",
+                str(args.warmup),
+                "--skus",
+                str(args.skus),
+            ],
+            capture_output=True,
+            text=True,
+            timeout=600,
+        )
+        if completed.returncode != 0:
+            print(f"- {mode}: failed\n{completed.stderr}", file=sys.stderr)
+            return 1
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    baseline = results[0]
+    print(
+        f"{'mode':<18} {'predict ms':>11} {'overhead':>9} {'cpu ms':>8} "
+        f"{'healthz ms':>11} {'overhead':>9} {'spans':>7}"
+    )
+    for result in results:
+        predict, healthz = result["predict"], result["healthz"]
+        result["predict_overhead_ms"] = (
+            predict["mean_ms"] - baseline["predict"]["mean_ms"]
+        )
+        result["healthz_overhead_ms"] = (
+            healthz["mean_ms"] - baseline["healthz"]["mean_ms"]
+        )
+        print(
+            f"{result['mode']:<18} {predict['mean_ms']:>11.3f} "
+            f"{result['predict_overhead_ms']:>+9.3f} "
+            f"{predict['cpu_ms_per_request']:>8.3f} "
+            f"{healthz['mean_ms']:>11.3f} {result['healthz_overhead_ms']:>+9.3f} "
+            f"{result['spans_exported']:>7}"
+        )
+
+    if args.output_json:
+        output = Path(args.output_json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Compare inference throughput across gunicorn worker/thread plans.
+
+Each plan is ``WORKERS:EXECUTOR_THREADS:OPENCV_THREADS`` (for example
+``2:2:1``). For every plan the script starts gunicorn with
+``services/inference/gunicorn_conf.py`` and the plan passed as environment
+overrides, waits for ``/readyz``, drives ``/predict`` from concurrent clients
+for a fixed duration, and records throughput and latency percentiles.
+
+Without ``--plan`` it compares the planner's default against a single worker
+using every CPU for OpenCV, and against the old ``cpu_count*2+1`` sizing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any
+
+import cv2
+import numpy as np
+
+SERVICE_DIR = Path(__file__).resolve().parents[1] / "services" / "inference"
+
+
+def _make_frame(text: str, width: int = 640, height: int = 480) -> np.ndarray:
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.rectangle(image, (20, 20), (width - 20, height - 20), (0, 0, 0), 3)
+    cv2.putText(
+        image,
+        text,
+        (60, height // 2),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        2.5,
+        (0, 0, 0),
+        6,
+        cv2.LINE_AA,
+    )
+    return image
+
+
+def _write_synthetic_catalog(root: Path, skus: int) -> None:
+    rows = ["sku,name,price_cents"]
+    for position in range(skus):
+        sku = str(1001 + position)
+        name = f"ITEM{position}"
+        rows.append(f"{sku},{name.title()},100")
+        sku_dir = root / "images" / sku
+        sku_dir.mkdir(parents=True)
+        ok, jpeg = cv2.imencode(".jpg", _make_frame(name))
+        assert ok
+        (sku_dir / "ref.jpg").write_bytes(jpeg.tobytes())
+    (root / "catalog.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _wait_ready(base_url: str, timeout_s: float) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/readyz", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def _drive_load(
+    endpoint: str, body: bytes, *, clients: int, duration_s: float
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration_s
+
+    def _client() -> None:
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            req = urllib.request.Request(
+                endpoint,
+                data=body,
+                method="POST",
+                headers={"Content-Type": "image/jpeg"},
+            )
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=30) as response:
+                    response.read()
+                elapsed = (time.perf_counter() - started) * 1000.0
+                with lock:
+                    latencies.append(elapsed)
+            except (urllib.error.URLError, OSError):
+                with lock:
+                    errors += 1
+
+    threads = [threading.Thread(target=_client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ordered = sorted(latencies)
+
+    def _pct(q: float) -> float | None:
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": len(ordered) / duration_s,
+        "p50_ms": _pct(0.50),
+        "p95_ms": _pct(0.95),
+        "p99_ms": _pct(0.99),
+    }
+
+
+def run_plan(plan: str, args: argparse.Namespace, env: dict[str, str]) -> dict:
+    workers, executor_threads, opencv_threads = (int(x) for x in plan.split(":"))
+    port = _free_port()
+    plan_env = dict(
+        env,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+        VBIC_EXECUTOR_THREADS=str(executor_threads),
+        VBIC_OPENCV_THREADS=str(opencv_threads),
+        OMP_NUM_THREADS=str(opencv_threads),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "app.main:app"],
+        cwd=SERVICE_DIR,
+        env=plan_env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        if not _wait_ready(base_url, args.ready_timeout_s):
+            return {"plan": plan, "error": "server did not become ready"}
+        body = args.query_bytes
+        # Warm every worker before measuring.
+        _drive_load(f"{base_url}/predict", body, clients=workers, duration_s=2.0)
+        result = _drive_load(
+            f"{base_url}/predict",
+            body,
+            clients=args.clients,
+            duration_s=args.duration_s,
+        )
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return {"plan": plan, **result}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--plan",
+        action="append",
+        help="WORKERS:EXECUTOR_THREADS:OPENCV_THREADS (repeatable).",
+    )
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration-s", type=float, default=20.0)
+    parser.add_argument("--ready-timeout-s", type=float, default=120.0)
+    parser.add_argument("--skus", type=int, default=50)
+    parser.add_argument("--catalog-csv", default=None)
+    parser.add_argument("--images-dir", default=None)
+    parser.add_argument("--query-image", default=None)
+    parser.add_argument("--output-json", default=None)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    sys.path.insert(0, str(SERVICE_DIR))
+    from app.core.cpu_plan import plan_workers  # noqa: E402
+
+    default = plan_workers(
+        {k: v for k, v in os.environ.items() if k == "VBIC_CPU_LIMIT"}
+    )
+    cpus = max(1, int(default.cpus))
+    plans = args.plan or [
+        f"{default.workers}:{default.executor_threads}:{default.opencv_threads}",
+        f"1:2:{cpus}",
+        f"{cpus * 2 + 1}:2:{cpus}",
+    ]
+
+    workdir = tempfile.TemporaryDirectory()
+    env = dict(os.environ, OTEL_SDK_DISABLED="true", VBIC_WARMUP_QUERIES="1")
+    if args.catalog_csv and args.images_dir:
+        env["VBIC_CATALOG_CSV_PATH"] = args.catalog_csv
+        env["VBIC_REFERENCE_IMAGES_DIR"] = args.images_dir
+    else:
+        root = Path(workdir.name)
+        _write_synthetic_catalog(root, args.skus)
+        env["VBIC_CATALOG_CSV_PATH"] = str(root / "catalog.csv")
+        env["VBIC_REFERENCE_IMAGES_DIR"] = str(root / "images")
+        env.setdefault("VBIC_MIN_REF_DESCRIPTORS", "0")
+        env["VBIC_INDEX_CACHE_DIR"] = str(root / "index-cache")
+
+    if args.query_image:
+        args.query_bytes = Path(args.query_image).read_bytes()
+    else:
+        ok, jpeg = cv2.imencode(".jpg", _make_frame("ITEM0"))
+        assert ok
+        args.query_bytes = jpeg.tobytes()
+
+    print(f"Detected: {default.describe()}")
+    results = []
+    for plan in plans:
+        result = run_plan(plan, args, env)
+        results.append(result)
+        if "error" in result:
+            print(f"- {plan}: {result['error']}")
+            continue
+        print(
+            f"- {plan}: {result['throughput_rps']:.1f} req/s, "
+            f"p50={result['p50_ms']:.1f} ms, p95={result['p95_ms']:.1f} ms, "
+            f"errors={result['errors']}"
+        )
+    workdir.cleanup()
+
+    if args.output_json:
+        output = Path(args.output_json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(
+            json.dumps({"detected": default.as_dict(), "results": results}, indent=2),
+            encoding="utf-8",
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,21 +5,51 @@ This script runs three checks against a local inference endpoint:
 1) Top-1 accuracy on positive store samples.
 2) False-positive rate on negative/non-product samples.
 3) Confidence margin diagnostics (top1 - top2) for debugging threshold tuning.
+
+Per-stage server timings (the ``Server-Timing`` response header) are recorded
+for every sample and averaged in the summary, so slow stages show up next to
+the quality numbers.
+
+With ``--concurrency`` or ``--rps`` the samples are replayed as a load test
+through a pooled async ``httpx`` client instead of one request at a time:
+``--concurrency N`` keeps N requests in flight (closed loop), ``--rps R``
+starts R requests per second regardless of how fast they finish (open loop;
+latency is then measured from the scheduled start, so queueing is not hidden).
+The run covers ``--iterations`` passes over the samples, or lasts
+``--duration-s`` seconds, after ``--warmup`` unmeasured requests. Throughput,
+error rate and p50/p95/p99 client latency are reported next to the quality
+gates, and ``--max-p95-ms``/``--max-p99-ms``/``--max-error-rate`` fail the run.
+
+``--in-process`` needs no running service: a ``ProductMatcher`` (and the
+OpenAI fallback, which stays off unless ``VBIC_OPENAI_ENABLED`` is set) is
+built from the inference ``Settings`` (``VBIC_*`` environment variables) and
+samples are fanned out over ``--workers`` processes. The index is built once
+in this process and spawned workers load it from the index cache. Outputs
+are the same CSV and JSON, with the in-process stage timings in place of
+``Server-Timing``.
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
 import csv
+import itertools
 import json
+import math
 import mimetypes
+import os
 import sys
+import tempfile
+import time
 import urllib.error
 import urllib.request
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+SERVICE_DIR = Path(__file__).resolve().parents[1] / "services" / "inference"
 
 
 @dataclass(frozen=True)
@@ -31,6 +61,16 @@ class Sample:
     source_manifest: Path
 
 
+@dataclass
+class Result:
+    sample: Sample
+    predictions: list[dict[str, Any]]
+    timings: dict[str, float] = field(default_factory=dict)
+    error: str = ""
+    latency_ms: float = 0.0
+    iteration: int = 0
+
+
 def _build_multipart_form(file_name: str, file_bytes: bytes) -> tuple[bytes, str]:
     boundary = f"----vbic-{uuid.uuid4().hex}"
     content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
@@ -43,7 +83,20 @@ def _build_multipart_form(file_name: str, file_bytes: bytes) -> tuple[bytes, str
     return head + file_bytes + tail, boundary
 
 
-def _predict(endpoint: str, image_path: Path, timeout_s: float) -> list[dict[str, Any]]:
+def _parse_server_timing(header: str | None) -> dict[str, float]:
+    """Parse ``name;dur=1.23, other;dur=4.56`` into ``{name: ms}``."""
+    timings: dict[str, float] = {}
+    for entry in (header or "").split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        for param in params:
+            if name and param.startswith("dur="):
+                timings[name] = _to_float(param[len("dur=") :])
+    return timings
+
+
+def _predict(
+    endpoint: str, image_path: Path, timeout_s: float
+) -> tuple[list[dict[str, Any]], dict[str, float]]:
     body, boundary = _build_multipart_form(image_path.name, image_path.read_bytes())
     req = urllib.request.Request(
         endpoint,
@@ -53,14 +106,267 @@ def _predict(endpoint: str, image_path: Path, timeout_s: float) -> list[dict[str
     )
     with urllib.request.urlopen(req, timeout=timeout_s) as response:
         payload = json.loads(response.read().decode("utf-8"))
-    predictions = payload.get("predictions", [])
+        timings = _parse_server_timing(response.headers.get("Server-Timing"))
+    return _parse_predictions(payload), timings
+
+
+def _parse_predictions(payload: Any) -> list[dict[str, Any]]:
+    predictions = payload.get("predictions", []) if isinstance(payload, dict) else []
     if not isinstance(predictions, list):
         return []
-    result: list[dict[str, Any]] = []
-    for item in predictions:
-        if isinstance(item, dict):
-            result.append(item)
-    return result
+    return [item for item in predictions if isinstance(item, dict)]
+
+
+def _run_serial(samples: list[Sample], args: argparse.Namespace) -> list[Result]:
+    results: list[Result] = []
+    for idx, sample in enumerate(samples, start=1):
+        started = time.perf_counter()
+        try:
+            predictions, timings = _predict(
+                args.endpoint, sample.local_path, timeout_s=args.timeout_s
+            )
+            error_text = ""
+        except (
+            urllib.error.URLError,
+            urllib.error.HTTPError,
+            TimeoutError,
+            OSError,
+        ) as exc:
+            predictions = []
+            timings = {}
+            error_text = str(exc)
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        results.append(Result(sample, predictions, timings, error_text, latency_ms))
+
+        top1 = predictions[0] if predictions else {}
+        top2 = predictions[1] if len(predictions) > 1 else {}
+        top1_conf = _to_float(top1.get("confidence"))
+        margin = max(0.0, top1_conf - _to_float(top2.get("confidence")))
+        print(
+            f"[{idx:03d}/{len(samples):03d}] {sample.kind} {sample.slug} "
+            f"top1={top1.get('label') or '-'} c1={top1_conf:.4f} margin={margin:.4f} "
+            f"predictions={len(predictions)} server={timings.get('total', 0.0):.1f}ms"
+        )
+    return results
+
+
+def _work_items(
+    samples: list[Sample], iterations: int | None
+) -> Iterator[tuple[int, Sample]]:
+    """(iteration, sample) pairs: ``iterations`` passes, or endless if None."""
+    passes = itertools.count() if iterations is None else range(max(1, iterations))
+    for iteration in passes:
+        for sample in samples:
+            yield iteration, sample
+
+
+async def _run_load(
+    samples: list[Sample], args: argparse.Namespace
+) -> tuple[list[Result], float]:
+    """Replay samples concurrently; return the measured results and wall time (s)."""
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("Load mode needs httpx: pip install httpx") from None
+
+    concurrency = args.concurrency or 64
+    bodies: dict[Path, tuple[bytes, str]] = {}
+    for sample in samples:
+        if sample.local_path not in bodies:
+            body, boundary = _build_multipart_form(
+                sample.local_path.name, sample.local_path.read_bytes()
+            )
+            bodies[sample.local_path] = (
+                body,
+                f"multipart/form-data; boundary={boundary}",
+            )
+
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(timeout=args.timeout_s, limits=limits) as client:
+
+        async def send(sample: Sample, iteration: int, started: float) -> Result:
+            body, content_type = bodies[sample.local_path]
+            try:
+                response = await client.post(
+                    args.endpoint, content=body, headers={"Content-Type": content_type}
+                )
+                latency_ms = (time.perf_counter() - started) * 1000.0
+                timings = _parse_server_timing(response.headers.get("Server-Timing"))
+                if response.status_code >= 400:
+                    return Result(
+                        sample,
+                        [],
+                        timings,
+                        f"HTTP {response.status_code}",
+                        latency_ms,
+                        iteration,
+                    )
+                return Result(
+                    sample,
+                    _parse_predictions(response.json()),
+                    timings,
+                    "",
+                    latency_ms,
+                    iteration,
+                )
+            except (httpx.HTTPError, ValueError) as exc:
+                latency_ms = (time.perf_counter() - started) * 1000.0
+                return Result(
+                    sample,
+                    [],
+                    {},
+                    str(exc) or type(exc).__name__,
+                    latency_ms,
+                    iteration,
+                )
+
+        # Warm-up fills the connection pool and the server's caches; not measured.
+        warmup = list(itertools.islice(_work_items(samples, None), args.warmup))
+        for start in range(0, len(warmup), concurrency):
+            await asyncio.gather(
+                *(
+                    send(sample, -1, time.perf_counter())
+                    for _, sample in warmup[start : start + concurrency]
+                )
+            )
+
+        items = _work_items(samples, None if args.duration_s else args.iterations)
+        results: list[Result] = []
+        started = time.perf_counter()
+        deadline = started + args.duration_s if args.duration_s else math.inf
+
+        if args.rps > 0:
+            slots = asyncio.Semaphore(concurrency)
+
+            async def scheduled(sample: Sample, iteration: int, at: float) -> None:
+                async with slots:
+                    results.append(await send(sample, iteration, at))
+
+            tasks = []
+            for index, (iteration, sample) in enumerate(items):
+                at = started + index / args.rps
+                if at >= deadline:
+                    break
+                await asyncio.sleep(max(0.0, at - time.perf_counter()))
+                tasks.append(asyncio.create_task(scheduled(sample, iteration, at)))
+            await asyncio.gather(*tasks)
+        else:
+
+            async def worker() -> None:
+                for iteration, sample in items:
+                    if time.perf_counter() >= deadline:
+                        return
+                    results.append(await send(sample, iteration, time.perf_counter()))
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results, time.perf_counter() - started
+
+
+_worker_matcher = None
+
+
+def _init_in_process_worker(matcher_kwargs: dict[str, Any]) -> None:
+    global _worker_matcher
+    if str(SERVICE_DIR) not in sys.path:
+        sys.path.insert(0, str(SERVICE_DIR))
+    import cv2
+    from app.core.product_matcher import ProductMatcher
+
+    # One OpenCV thread per worker process; the pool provides the parallelism.
+    cv2.setNumThreads(1)
+    if _worker_matcher is None:
+        _worker_matcher = ProductMatcher(**matcher_kwargs)
+
+
+def _predict_in_process(sample: Sample) -> Result:
+    import cv2
+    import numpy as np
+    from app.core.openai_fallback import get_openai_fallback_classifier
+    from app.core.timing import stage, start_request_timings
+
+    timings = start_request_timings()
+    try:
+        with stage("decode"):
+            data = np.fromfile(sample.local_path, dtype=np.uint8)
+            bgr = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise ValueError(f"Could not decode {sample.local_path}")
+        with stage("predict"):
+            predictions = _worker_matcher.predict(bgr)
+        if not predictions:
+            with stage("fallback"):
+                predictions = get_openai_fallback_classifier().predict(bgr)
+        error_text = ""
+    except (OSError, ValueError) as exc:
+        predictions = []
+        error_text = str(exc)
+    latency_ms = timings.elapsed_ms()
+    return Result(
+        sample,
+        predictions,
+        {**timings.as_dict(), "total": latency_ms},
+        error_text,
+        latency_ms,
+    )
+
+
+def _run_in_process(
+    samples: list[Sample], args: argparse.Namespace
+) -> tuple[list[Result], dict[str, Any]]:
+    import multiprocessing
+
+    sys.path.insert(0, str(SERVICE_DIR))
+    from app.core.config import get_settings
+    from app.core.product_matcher import ProductMatcher, product_matcher_kwargs
+
+    kwargs = product_matcher_kwargs(get_settings())
+    if args.catalog_csv:
+        kwargs["catalog_csv_path"] = args.catalog_csv
+    if args.images_dir:
+        kwargs["reference_images_dir"] = args.images_dir
+    with tempfile.TemporaryDirectory(prefix="vbic-eval-") as tmp:
+        # Spawned workers cannot inherit the index, so make sure there is a cache
+        # file for them to load instead of rebuilding it.
+        if not kwargs.get("index_cache_path"):
+            kwargs["index_cache_path"] = str(Path(tmp) / "index.pkl")
+        started = time.perf_counter()
+        global _worker_matcher
+        _worker_matcher = ProductMatcher(**kwargs)
+        build_s = time.perf_counter() - started
+        print(
+            f"In-process: index {_worker_matcher.index_version} "
+            f"built in {build_s:.1f} s, {args.workers} worker(s)"
+        )
+        info = {
+            "workers": args.workers,
+            "index_version": _worker_matcher.index_version,
+            "index_build_s": build_s,
+        }
+        if args.workers <= 1:
+            _init_in_process_worker(kwargs)
+            return [_predict_in_process(sample) for sample in samples], info
+
+        # spawn, as for local shards: forking now would copy a process that already
+        # runs OpenCV and logging threads. Workers load the index cache file.
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(
+            args.workers, initializer=_init_in_process_worker, initargs=(kwargs,)
+        ) as pool:
+            results = pool.map(_predict_in_process, samples, chunksize=4)
+    return results, info
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Linear-interpolated percentile, ``q`` in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
 
 
 def _load_samples(
@@ -162,6 +468,67 @@ def parse_args() -> argparse.Namespace:
         default=0.10,
         help="Fail if negative false-positive rate is above this value.",
     )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Match in this process with a ProductMatcher built from VBIC_* settings.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="In-process mode: worker processes.",
+    )
+    parser.add_argument("--catalog-csv", default=None, help="In-process mode override.")
+    parser.add_argument("--images-dir", default=None, help="In-process mode override.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=0,
+        help="Load mode: requests kept in flight (default 64 with --rps).",
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=0.0,
+        help="Load mode: target request rate (open loop).",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=10,
+        help="Load mode: unmeasured requests sent before the run.",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=1,
+        help="Load mode: passes over the samples (ignored with --duration-s).",
+    )
+    parser.add_argument(
+        "--duration-s",
+        type=float,
+        default=0.0,
+        help="Load mode: run for this long, cycling through the samples.",
+    )
+    parser.add_argument(
+        "--max-p95-ms",
+        type=float,
+        default=None,
+        help="Fail if p95 client latency is above this value.",
+    )
+    parser.add_argument(
+        "--max-p99-ms",
+        type=float,
+        default=None,
+        help="Fail if p99 client latency is above this value.",
+    )
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=None,
+        help="Fail if the share of failed requests is above this value.",
+    )
     parser.add_argument(
         "--no-enforce-gates",
         action="store_true",
@@ -209,6 +576,33 @@ def main() -> int:
         print("No valid samples found in manifests.", file=sys.stderr)
         return 2
 
+    load_mode = args.concurrency > 0 or args.rps > 0
+    if load_mode and args.in_process:
+        print(
+            "--in-process cannot be combined with --concurrency/--rps.", file=sys.stderr
+        )
+        return 2
+    wall_s = 0.0
+    in_process: dict[str, Any] | None = None
+    if args.in_process:
+        results, in_process = _run_in_process(samples, args)
+    elif load_mode:
+        print(
+            f"Load test: concurrency={args.concurrency or 64} rps={args.rps or '-'} "
+            f"warmup={args.warmup} "
+            + (
+                f"duration={args.duration_s}s"
+                if args.duration_s
+                else f"iterations={args.iterations}"
+            )
+        )
+        results, wall_s = asyncio.run(_run_load(samples, args))
+    else:
+        results = _run_serial(samples, args)
+    if not results:
+        print("No requests completed.", file=sys.stderr)
+        return 2
+
     rows: list[dict[str, Any]] = []
     positives_total = 0
     positives_correct = 0
@@ -216,14 +610,12 @@ def main() -> int:
     negatives_total = 0
     negatives_false_positives = 0
     request_errors = 0
+    stage_totals_ms: dict[str, float] = {}
+    stage_counts: dict[str, int] = {}
 
-    for idx, sample in enumerate(samples, start=1):
-        try:
-            predictions = _predict(args.endpoint, sample.local_path, timeout_s=args.timeout_s)
-            error_text = ""
-        except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, OSError) as exc:
-            predictions = []
-            error_text = str(exc)
+    for result in results:
+        sample, predictions, timings = result.sample, result.predictions, result.timings
+        if result.error:
             request_errors += 1
 
         top1 = predictions[0] if predictions else {}
@@ -234,9 +626,17 @@ def main() -> int:
         top2_conf = _to_float(top2.get("confidence"))
         margin = max(0.0, top1_conf - top2_conf)
 
-        is_expected_match = sample.kind == "positive" and top1_label == sample.expected_label
+        is_expected_match = (
+            sample.kind == "positive" and top1_label == sample.expected_label
+        )
         is_false_positive = sample.kind == "negative" and bool(predictions)
 
+        for stage_name, duration_ms in timings.items():
+            stage_totals_ms[stage_name] = (
+                stage_totals_ms.get(stage_name, 0.0) + duration_ms
+            )
+            stage_counts[stage_name] = stage_counts.get(stage_name, 0) + 1
+
         if sample.kind == "positive":
             positives_total += 1
             if predictions:
@@ -262,29 +662,59 @@ def main() -> int:
             "prediction_count": len(predictions),
             "is_expected_match": is_expected_match,
             "is_false_positive": is_false_positive,
-            "error": error_text,
+            "error": result.error,
+            "iteration": result.iteration,
+            "client_latency_ms": f"{result.latency_ms:.3f}",
+            "server_total_ms": f"{timings.get('total', 0.0):.3f}",
+            "server_timing_json": json.dumps(timings),
             "raw_predictions_json": json.dumps(predictions, ensure_ascii=False),
         }
         rows.append(row)
 
-        print(
-            f"[{idx:03d}/{len(samples):03d}] {sample.kind} {sample.slug} "
-            f"top1={top1_label or '-'} c1={top1_conf:.4f} margin={margin:.4f} "
-            f"predictions={len(predictions)}"
-        )
-
     positive_accuracy = (
         float(positives_correct) / float(positives_total) if positives_total else 0.0
     )
     negative_fp_rate = (
-        float(negatives_false_positives) / float(negatives_total) if negatives_total else 0.0
+        float(negatives_false_positives) / float(negatives_total)
+        if negatives_total
+        else 0.0
     )
     positive_coverage = (
-        float(positives_with_predictions) / float(positives_total) if positives_total else 0.0
+        float(positives_with_predictions) / float(positives_total)
+        if positives_total
+        else 0.0
     )
 
+    mean_stage_ms = {
+        name: stage_totals_ms[name] / stage_counts[name]
+        for name in sorted(stage_totals_ms, key=stage_totals_ms.get, reverse=True)
+    }
+
+    latencies = [result.latency_ms for result in results]
+    error_rate = request_errors / len(results)
+    latency_ms = {
+        "mean": sum(latencies) / len(latencies),
+        "p50": _percentile(latencies, 50),
+        "p95": _percentile(latencies, 95),
+        "p99": _percentile(latencies, 99),
+        "max": max(latencies),
+    }
+    latency_failures = []
+    if args.max_p95_ms is not None and latency_ms["p95"] > args.max_p95_ms:
+        latency_failures.append(
+            f"p95 latency {latency_ms['p95']:.1f} ms > {args.max_p95_ms:.1f} ms"
+        )
+    if args.max_p99_ms is not None and latency_ms["p99"] > args.max_p99_ms:
+        latency_failures.append(
+            f"p99 latency {latency_ms['p99']:.1f} ms > {args.max_p99_ms:.1f} ms"
+        )
+    if args.max_error_rate is not None and error_rate > args.max_error_rate:
+        latency_failures.append(
+            f"error rate {error_rate:.3%} > {args.max_error_rate:.3%}"
+        )
+
     summary = {
-        "endpoint": args.endpoint,
+        "endpoint": "in-process" if in_process else args.endpoint,
         "positives_total": positives_total,
         "positives_with_predictions": positives_with_predictions,
         "positives_correct_top1": positives_correct,
@@ -294,11 +724,30 @@ def main() -> int:
         "negative_false_positives": negatives_false_positives,
         "negative_false_positive_rate": negative_fp_rate,
         "request_errors": request_errors,
+        "requests_total": len(results),
+        "error_rate": error_rate,
+        "client_latency_ms": latency_ms,
+        "mean_server_stage_ms": mean_stage_ms,
         "min_positive_accuracy_gate": args.min_positive_accuracy,
         "max_negative_fp_rate_gate": args.max_negative_fp_rate,
         "pass_positive_gate": positive_accuracy >= args.min_positive_accuracy,
         "pass_negative_gate": negative_fp_rate <= args.max_negative_fp_rate,
+        "max_p95_ms_gate": args.max_p95_ms,
+        "max_p99_ms_gate": args.max_p99_ms,
+        "max_error_rate_gate": args.max_error_rate,
+        "pass_latency_gate": not latency_failures,
     }
+    if in_process:
+        summary["in_process"] = in_process
+    if load_mode:
+        summary["load"] = {
+            "concurrency": args.concurrency or 64,
+            "target_rps": args.rps or None,
+            "warmup_requests": args.warmup,
+            "iterations": None if args.duration_s else args.iterations,
+            "duration_s": wall_s,
+            "throughput_rps": len(results) / wall_s if wall_s else 0.0,
+        }
 
     output_csv = Path(args.output_csv)
     output_csv.parent.mkdir(parents=True, exist_ok=True)
@@ -309,11 +758,16 @@ def main() -> int:
 
     summary_json = Path(args.summary_json)
     summary_json.parent.mkdir(parents=True, exist_ok=True)
-    summary_json.write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+    summary_json.write_text(
+        json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
 
     print("")
     print("Summary")
-    print(f"- Positive accuracy: {positive_accuracy:.3%} ({positives_correct}/{positives_total})")
+    print(
+        f"- Positive accuracy: {positive_accuracy:.3%} "
+        f"({positives_correct}/{positives_total})"
+    )
     print(
         f"- Positive coverage: {positive_coverage:.3%} "
         f"({positives_with_predictions}/{positives_total})"
@@ -322,27 +776,49 @@ def main() -> int:
         f"- Negative false-positive rate: {negative_fp_rate:.3%} "
         f"({negatives_false_positives}/{negatives_total})"
     )
-    print(f"- Request errors: {request_errors}")
+    print(f"- Request errors: {request_errors}/{len(results)} ({error_rate:.3%})")
+    if load_mode:
+        print(
+            f"- Throughput: {summary['load']['throughput_rps']:.1f} req/s "
+            f"over {wall_s:.1f} s"
+        )
+    print(
+        f"- Client latency: p50={latency_ms['p50']:.1f} ms "
+        f"p95={latency_ms['p95']:.1f} ms p99={latency_ms['p99']:.1f} ms "
+        f"max={latency_ms['max']:.1f} ms"
+    )
+    if mean_stage_ms:
+        print("- Mean server stage timings:")
+        for name, duration_ms in mean_stage_ms.items():
+            print(f"  {name:<20} {duration_ms:8.2f} ms")
     print(f"- Results CSV: {output_csv}")
     print(f"- Summary JSON: {summary_json}")
 
     if args.no_enforce_gates:
         return 0
-    if summary["pass_positive_gate"] and summary["pass_negative_gate"]:
+    if (
+        summary["pass_positive_gate"]
+        and summary["pass_negative_gate"]
+        and not latency_failures
+    ):
         return 0
 
     print("")
     print("Quality gates failed.", file=sys.stderr)
     if not summary["pass_positive_gate"]:
         print(
-            f"- positive_accuracy {positive_accuracy:.3%} < {args.min_positive_accuracy:.3%}",
+            f"- positive_accuracy {positive_accuracy:.3%} "
+            f"< {args.min_positive_accuracy:.3%}",
             file=sys.stderr,
         )
     if not summary["pass_negative_gate"]:
         print(
-            f"- negative_false_positive_rate {negative_fp_rate:.3%} > {args.max_negative_fp_rate:.3%}",
+            f"- negative_false_positive_rate {negative_fp_rate:.3%} "
+            f"> {args.max_negative_fp_rate:.3%}",
             file=sys.stderr,
         )
+    for failure in latency_failures:
+        print(f"- {failure}", file=sys.stderr)
     return 1
 
 
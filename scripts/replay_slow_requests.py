@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Replay slow /predict captures in-process, with stage timings and cProfile.
+
+The inference service saves slow requests under ``VBIC_SLOW_CAPTURE_DIR``
+(see ``app/core/slow_capture.py``). This script rebuilds a ``ProductMatcher``
+from each capture's recorded settings (the store's own index for per-store
+requests), runs the captured frame through it ``--repeat`` times at the
+captured quality tier, and prints the per-stage timings next to the ones
+measured in production. With ``--profile`` every
+replay runs under cProfile and the hottest functions are printed (and saved
+as ``.pstats`` with ``--pstats-dir``), so latency outliers become
+reproducible benchmark cases.
+
+Reference data paths usually differ from production; ``--catalog-csv`` and
+``--images-dir`` point the rebuilt matcher at a local copy. The script warns
+if the rebuilt index version differs from the captured one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import statistics
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+SERVICE_DIR = Path(__file__).resolve().parents[1] / "services" / "inference"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "captures",
+        nargs="+",
+        help="Capture directories, or the capture root to replay all of them.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--catalog-csv", default=None)
+    parser.add_argument("--images-dir", default=None)
+    parser.add_argument(
+        "--index-cache-path",
+        default=None,
+        help="Override the captured index cache path ('' disables the cache).",
+    )
+    parser.add_argument("--profile", action="store_true", help="Run under cProfile.")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key.")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--pstats-dir", default=None)
+    parser.add_argument("--output-json", default=None)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    sys.path.insert(0, str(SERVICE_DIR))
+    from app.core.product_matcher import ProductMatcher
+    from app.core.quality_tiers import QUALITY_TIERS
+    from app.core.regions import predict_basket
+    from app.core.slow_capture import list_captures, load_capture
+    from app.core.timing import start_request_timings
+
+    tiers = {tier.name: tier for tier in QUALITY_TIERS}
+    captures = [path for root in args.captures for path in list_captures(root)]
+    if not captures:
+        print("No captures found.", file=sys.stderr)
+        return 2
+
+    matchers: dict[str, ProductMatcher] = {}
+    executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="replay")
+    reports: list[dict[str, Any]] = []
+    for path in captures:
+        frame, meta = load_capture(path)
+        kwargs = dict(meta["matcher"])
+        if args.catalog_csv:
+            kwargs["catalog_csv_path"] = args.catalog_csv
+        if args.images_dir:
+            kwargs["reference_images_dir"] = args.images_dir
+        if args.index_cache_path is not None:
+            kwargs["index_cache_path"] = args.index_cache_path or None
+        key = json.dumps(kwargs, sort_keys=True)
+        if key not in matchers:
+            matchers[key] = ProductMatcher(**kwargs)
+        matcher = matchers[key]
+        if matcher.index_version != meta.get("index_version"):
+            print(
+                f"warning: {path.name}: index version {matcher.index_version} "
+                f"differs from captured {meta.get('index_version')}",
+                file=sys.stderr,
+            )
+
+        tier = tiers.get(meta.get("quality_tier") or "full")
+        basket = meta.get("basket")
+
+        def _replay():
+            if meta.get("mode") == "basket" and basket:
+                return predict_basket(
+                    matcher, frame, executor=executor, tier=tier, **basket
+                )
+            return matcher.predict(frame, tier=tier)
+
+        profiler = cProfile.Profile() if args.profile else None
+        runs: list[dict[str, float]] = []
+        predictions: list[dict] = []
+        for _ in range(max(1, args.repeat)):
+            timings = start_request_timings()
+            if profiler is not None:
+                profiler.enable()
+            predictions = _replay()
+            if profiler is not None:
+                profiler.disable()
+            runs.append({**timings.as_dict(), "total": timings.elapsed_ms()})
+
+        replay_ms = {
+            name: statistics.median(run.get(name, 0.0) for run in runs)
+            for name in sorted({name for run in runs for name in run})
+        }
+        captured_ms = dict(meta.get("stages_ms", {}), total=meta.get("latency_ms"))
+        # Request-level stages (read, decode, admission_wait) only exist captured.
+        stages = sorted(set(replay_ms) | set(captured_ms))
+        print(
+            f"\n{path.name}: captured {meta.get('latency_ms', 0.0):.1f} ms "
+            f"(tier={meta.get('quality_tier')}, mode={meta.get('mode')}, "
+            f"store={meta.get('store_id') or 'default'}), "
+            f"replay median {replay_ms['total']:.1f} ms over {len(runs)} run(s)"
+        )
+        print(f"  {'stage':<22} {'captured ms':>12} {'replay ms':>10}")
+        for name in stages:
+            captured, replayed = captured_ms.get(name), replay_ms.get(name)
+            captured_text = (
+                f"{captured:12.2f}" if captured is not None else f"{'-':>12}"
+            )
+            replayed_text = (
+                f"{replayed:10.2f}" if replayed is not None else f"{'-':>10}"
+            )
+            print(f"  {name:<22} {captured_text} {replayed_text}")
+        if predictions != meta.get("predictions"):
+            print("  note: replay predictions differ from the captured response")
+
+        report = {
+            "capture": str(path),
+            "captured_ms": captured_ms,
+            "replay_median_ms": replay_ms,
+            "predictions": predictions,
+        }
+        if profiler is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.sort_stats(args.sort).print_stats(args.top)
+            print(stream.getvalue())
+            if args.pstats_dir:
+                out_dir = Path(args.pstats_dir)
+                out_dir.mkdir(parents=True, exist_ok=True)
+                out = out_dir / f"{path.name}.pstats"
+                stats.dump_stats(out)
+                report["pstats"] = str(out)
+        reports.append(report)
+
+    executor.shutdown()
+    if args.output_json:
+        output = Path(args.output_json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(reports, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Report and budget the import-time cost of each service's cold start.
+
+For every service this runs ``python -X importtime -c "import app.main"`` in a
+fresh interpreter (with the service's own directory on ``PYTHONPATH``), then
+prints the total import time and the most expensive top-level packages. With
+``--budget-ms`` the script exits non-zero when any service exceeds the budget,
+so cold start can be tracked in CI like any other regression.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SERVICES = ["catalog", "inference", "review-tasks", "operator-assistant"]
+
+
+def _parse_importtime(stderr: str) -> tuple[float, dict[str, float]]:
+    """Return (total ms, self ms per top-level package) from ``-X importtime``."""
+    per_package: dict[str, float] = defaultdict(float)
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        fields = line[len("import time:") :].split("|")
+        self_field, cumulative_field, name_field = fields
+        name = name_field.strip()
+        per_package[name.split(".", 1)[0]] += int(self_field) / 1000.0
+        # Nested imports are indented by two more spaces per level.
+        if len(name_field) - len(name_field.lstrip(" ")) == 1:
+            total_us += int(cumulative_field)
+    return total_us / 1000.0, dict(per_package)
+
+
+def measure_service(service: str, *, extra_env: dict[str, str]) -> dict[str, Any]:
+    service_dir = REPO_ROOT / "services" / service
+    env = dict(os.environ, PYTHONPATH=str(service_dir), **extra_env)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=service_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    total_ms, per_package = _parse_importtime(result.stderr)
+    return {
+        "service": service,
+        "ok": result.returncode == 0,
+        "total_import_ms": total_ms,
+        "top_packages_ms": dict(
+            sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:10]
+        ),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--service",
+        action="append",
+        choices=SERVICES,
+        help="Service to measure (repeatable). Defaults to all services.",
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=None,
+        help="Fail if any service's total import time exceeds this.",
+    )
+    parser.add_argument(
+        "--with-telemetry",
+        action="store_true",
+        help="Measure with OpenTelemetry enabled (default: OTEL_SDK_DISABLED=true).",
+    )
+    parser.add_argument("--output-json", default=None)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    extra_env = {} if args.with_telemetry else {"OTEL_SDK_DISABLED": "true"}
+    reports = [
+        measure_service(service, extra_env=extra_env)
+        for service in (args.service or SERVICES)
+    ]
+
+    failed = False
+    for report in reports:
+        over_budget = (
+            args.budget_ms is not None and report["total_import_ms"] > args.budget_ms
+        )
+        report["over_budget"] = over_budget
+        failed = failed or over_budget or not report["ok"]
+        status = "OVER BUDGET" if over_budget else ("ok" if report["ok"] else "ERROR")
+        print(f"{report['service']}: {report['total_import_ms']:.1f} ms [{status}]")
+        for package, ms in report["top_packages_ms"].items():
+            print(f"  {package:<28} {ms:8.1f} ms")
+
+    if args.output_json:
+        output = Path(args.output_json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(reports, indent=2), encoding="utf-8")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
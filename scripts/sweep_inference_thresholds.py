@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Sweep matcher decision thresholds over cached raw scores.
+
+Each sample from the evaluation manifests is scored once with
+``ProductMatcher.raw_scores`` (per-SKU ORB and hue scores, before
+``hue_scale`` and any guardrail). Scores are cached under ``--cache-dir``
+(in the system temp directory by default), keyed by the image's SHA-256 and
+the matcher's ``raw_score_version`` (index fingerprint plus the scoring
+settings). Editing thresholds never invalidates the cache; changing the
+references or feature settings does.
+
+The decision rule of ``ProductMatcher._decide`` is then applied to every
+combination of ``hue_scale``, ``min_confidence``, ``min_top_orb_confidence``
+and ``min_score_margin`` in the grid at once with numpy. The script reports
+positive top-1 accuracy, coverage and negative false-positive rate for the
+current settings, the best grid point under ``--max-negative-fp-rate``, and
+the accuracy / false-positive Pareto frontier. Only the full-resolution level
+is modelled; with the cascade on, live results can differ slightly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from evaluate_inference_dataset import SERVICE_DIR, Sample, _load_samples
+
+
+def _grid(spec: str) -> np.ndarray:
+    """``start:stop:step`` (inclusive) or a comma-separated list."""
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        count = int(round((stop - start) / step)) + 1
+        return np.round(start + step * np.arange(max(1, count)), 6)
+    return np.array([float(part) for part in spec.split(",") if part.strip()])
+
+
+def _load_or_score(matcher, sample: Sample, cache_dir: Path | None) -> dict[str, Any]:
+    import cv2
+
+    data = sample.local_path.read_bytes()
+    path = None
+    if cache_dir is not None:
+        path = cache_dir / f"{hashlib.sha256(data).hexdigest()}.npz"
+        if path.is_file():
+            with np.load(path, allow_pickle=False) as cached:
+                return {name: cached[name] for name in cached.files}
+
+    bgr = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    rows = matcher.raw_scores(bgr) if bgr is not None else []
+    scores = {
+        "skus": np.array([row["sku"] for row in rows], dtype=str),
+        "labels": np.array([row["label"] for row in rows], dtype=str),
+        "orb": np.array([row["orb"] for row in rows], dtype=np.float64),
+        "hue": np.array([row["hue"] for row in rows], dtype=np.float64),
+    }
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez_compressed(tmp, **scores)
+        tmp.replace(path)
+    return scores
+
+
+def _score_matrices(
+    scored: list[dict[str, Any]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[str]]:
+    """Samples x SKUs ORB and hue matrices, SKU label ids and the label names."""
+    skus = sorted({str(sku) for scores in scored for sku in scores["skus"]})
+    column = {sku: i for i, sku in enumerate(skus)}
+    sku_label: dict[str, str] = {}
+    orb = np.zeros((len(scored), len(skus)))
+    hue = np.zeros((len(scored), len(skus)))
+    for row, scores in enumerate(scored):
+        cols = [column[str(sku)] for sku in scores["skus"]]
+        orb[row, cols] = scores["orb"]
+        hue[row, cols] = scores["hue"]
+        sku_label.update(zip(map(str, scores["skus"]), map(str, scores["labels"])))
+    labels = sorted(set(sku_label.values()))
+    label_id = {label: i for i, label in enumerate(labels)}
+    sku_label_ids = np.array([label_id[sku_label[sku]] for sku in skus], dtype=int)
+    return orb, hue, sku_label_ids, labels
+
+
+def _sweep(
+    orb: np.ndarray,
+    hue: np.ndarray,
+    sku_label_ids: np.ndarray,
+    expected_ids: np.ndarray,
+    is_positive: np.ndarray,
+    *,
+    hue_scales: np.ndarray,
+    min_confidence: np.ndarray,
+    min_top_orb: np.ndarray,
+    min_margin: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """Metrics shaped (hue_scale, min_confidence, min_top_orb, min_margin)."""
+    n_pos = max(1, int(is_positive.sum()))
+    n_neg = max(1, int((~is_positive).sum()))
+    shape = (len(hue_scales), len(min_confidence), len(min_top_orb), len(min_margin))
+    accuracy = np.zeros(shape)
+    coverage = np.zeros(shape)
+    fp_rate = np.zeros(shape)
+    rows = np.arange(orb.shape[0])
+    for h, hue_scale in enumerate(hue_scales):
+        if orb.shape[1] == 0:
+            break
+        conf = np.maximum(orb, hue_scale * hue)
+        top = conf.argmax(axis=1)
+        top_conf = conf[rows, top]
+        top_orb = orb[rows, top]
+        top_label = sku_label_ids[top]
+        # Best score of any other label: _decide merges SKUs of the same label.
+        same_label = sku_label_ids[None, :] == top_label[:, None]
+        second = np.where(same_label, 0.0, conf).max(axis=1)
+        # With no scored runner-up the margin is measured against 0.
+        margin = top_conf - second
+
+        passes_conf = (top_conf > 0.0) & (top_conf[None, :] >= min_confidence[:, None])
+        passes_orb = top_orb[None, :] >= min_top_orb[:, None]
+        passes_margin = margin[None, :] >= min_margin[:, None]
+        correct = is_positive & (top_label == expected_ids)
+
+        def count(weights: np.ndarray) -> np.ndarray:
+            return np.einsum(
+                "cs,os,ms->com",
+                passes_conf * weights,
+                passes_orb,
+                passes_margin,
+                optimize=True,
+            )
+
+        accuracy[h] = count(correct.astype(float)) / n_pos
+        coverage[h] = count(is_positive.astype(float)) / n_pos
+        fp_rate[h] = count((~is_positive).astype(float)) / n_neg
+    return {"accuracy": accuracy, "coverage": coverage, "fp_rate": fp_rate}
+
+
+def _pareto(points: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Points not beaten on both accuracy (higher) and false-positive rate (lower)."""
+    frontier: list[dict[str, Any]] = []
+    for point in sorted(
+        points,
+        key=lambda p: (p["negative_false_positive_rate"], -p["positive_accuracy"]),
+    ):
+        if (
+            not frontier
+            or point["positive_accuracy"] > frontier[-1]["positive_accuracy"]
+        ):
+            frontier.append(point)
+    return frontier
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--positive-manifest", action="append", default=[])
+    parser.add_argument("--negative-manifest", action="append", default=[])
+    parser.add_argument("--catalog-csv", default=None)
+    parser.add_argument("--images-dir", default=None)
+    parser.add_argument(
+        "--cache-dir",
+        default=str(Path(tempfile.gettempdir()) / "vbic-raw-score-cache"),
+        help="Raw score cache root ('' disables caching).",
+    )
+    parser.add_argument("--hue-scale", default="0.1,0.15,0.2,0.23,0.3,0.4")
+    parser.add_argument("--min-confidence", default="0.05:0.4:0.01")
+    parser.add_argument("--min-top-orb-confidence", default="0:0.1:0.005")
+    parser.add_argument("--min-score-margin", default="0:0.1:0.01")
+    parser.add_argument(
+        "--max-negative-fp-rate",
+        type=float,
+        default=0.10,
+        help="Constraint for picking the best grid point.",
+    )
+    parser.add_argument("--output-json", default=None)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    sys.path.insert(0, str(SERVICE_DIR))
+    from app.core.config import get_settings
+    from app.core.product_matcher import ProductMatcher, product_matcher_kwargs
+
+    positive_manifests = [Path(item) for item in args.positive_manifest] or [
+        Path("data/new_store_images/manifest.csv"),
+        Path("data/new_store_images/holdout/manifest.csv"),
+    ]
+    negative_manifests = [Path(item) for item in args.negative_manifest] or [
+        Path("data/new_store_images/negatives_v2/manifest.csv")
+    ]
+    for manifest in [*positive_manifests, *negative_manifests]:
+        if not manifest.exists():
+            print(f"Missing manifest: {manifest}", file=sys.stderr)
+            return 2
+    samples = [
+        *_load_samples(
+            positive_manifests,
+            "positive",
+            "status",
+            "local_path",
+            "slug",
+            "expected_label",
+        ),
+        *_load_samples(negative_manifests, "negative", "status", "local_path", "slug"),
+    ]
+    if not samples:
+        print("No valid samples found in manifests.", file=sys.stderr)
+        return 2
+
+    settings = get_settings()
+    kwargs = product_matcher_kwargs(settings)
+    if args.catalog_csv:
+        kwargs["catalog_csv_path"] = args.catalog_csv
+    if args.images_dir:
+        kwargs["reference_images_dir"] = args.images_dir
+    # Thresholds are swept; the matcher's own decisions are never used.
+    matcher = ProductMatcher(**kwargs, record_decisions=False)
+    cache_dir = (
+        Path(args.cache_dir) / matcher.raw_score_version if args.cache_dir else None
+    )
+
+    started = time.perf_counter()
+    scored = [_load_or_score(matcher, sample, cache_dir) for sample in samples]
+    scoring_s = time.perf_counter() - started
+    print(
+        f"Scored {len(samples)} samples in {scoring_s:.2f} s "
+        f"(raw score version {matcher.raw_score_version})"
+    )
+
+    orb, hue, sku_label_ids, labels = _score_matrices(scored)
+    label_id = {label: i for i, label in enumerate(labels)}
+    expected_ids = np.array(
+        [label_id.get(sample.expected_label, -1) for sample in samples], dtype=int
+    )
+    is_positive = np.array([sample.kind == "positive" for sample in samples])
+    grid = {
+        "hue_scale": _grid(args.hue_scale),
+        "min_confidence": _grid(args.min_confidence),
+        "min_top_orb_confidence": _grid(args.min_top_orb_confidence),
+        "min_score_margin": _grid(args.min_score_margin),
+    }
+
+    def sweep(axes: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        return _sweep(
+            orb,
+            hue,
+            sku_label_ids,
+            expected_ids,
+            is_positive,
+            hue_scales=axes["hue_scale"],
+            min_confidence=axes["min_confidence"],
+            min_top_orb=axes["min_top_orb_confidence"],
+            min_margin=axes["min_score_margin"],
+        )
+
+    started = time.perf_counter()
+    metrics = sweep(grid)
+    sweep_ms = (time.perf_counter() - started) * 1000.0
+
+    points: list[dict[str, Any]] = []
+    for index in itertools.product(*(range(len(axis)) for axis in grid.values())):
+        point = {name: float(axis[i]) for (name, axis), i in zip(grid.items(), index)}
+        point["positive_accuracy"] = float(metrics["accuracy"][index])
+        point["positive_coverage"] = float(metrics["coverage"][index])
+        point["negative_false_positive_rate"] = float(metrics["fp_rate"][index])
+        points.append(point)
+
+    current_axes = {
+        "hue_scale": np.array([settings.hue_scale]),
+        "min_confidence": np.array([settings.min_confidence]),
+        "min_top_orb_confidence": np.array([settings.min_top_orb_confidence]),
+        "min_score_margin": np.array([settings.min_score_margin]),
+    }
+    current_metrics = sweep(current_axes)
+    current = {name: float(axis[0]) for name, axis in current_axes.items()}
+    current["positive_accuracy"] = float(current_metrics["accuracy"].item())
+    current["positive_coverage"] = float(current_metrics["coverage"].item())
+    current["negative_false_positive_rate"] = float(current_metrics["fp_rate"].item())
+
+    eligible = [
+        point
+        for point in points
+        if point["negative_false_positive_rate"] <= args.max_negative_fp_rate
+    ]
+    best = max(
+        eligible,
+        key=lambda p: (p["positive_accuracy"], p["positive_coverage"]),
+        default=None,
+    )
+    frontier = _pareto(points)
+
+    def describe(point: dict[str, Any]) -> str:
+        return (
+            f"hue_scale={point['hue_scale']:.3f} "
+            f"min_confidence={point['min_confidence']:.3f} "
+            f"min_top_orb={point['min_top_orb_confidence']:.3f} "
+            f"min_margin={point['min_score_margin']:.3f} -> "
+            f"accuracy={point['positive_accuracy']:.3%} "
+            f"coverage={point['positive_coverage']:.3%} "
+            f"fp={point['negative_false_positive_rate']:.3%}"
+        )
+
+    print(f"Swept {len(points)} threshold combinations in {sweep_ms:.1f} ms")
+    print(f"- Current: {describe(current)}")
+    if best is not None:
+        print(f"- Best with fp <= {args.max_negative_fp_rate:.1%}: {describe(best)}")
+    else:
+        print(f"- No grid point keeps fp <= {args.max_negative_fp_rate:.1%}")
+    print(f"- Pareto frontier ({len(frontier)} points):")
+    for point in frontier:
+        print(f"  {describe(point)}")
+
+    if args.output_json:
+        output = Path(args.output_json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(
+            json.dumps(
+                {
+                    "raw_score_version": matcher.raw_score_version,
+                    "samples": len(samples),
+                    "scoring_s": scoring_s,
+                    "sweep_ms": sweep_ms,
+                    "grid": {name: axis.tolist() for name, axis in grid.items()},
+                    "current": current,
+                    "best": best,
+                    "pareto_frontier": frontier,
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,6 +2,8 @@ import time
 
 from fastapi import APIRouter
 
+from ..startup import startup_report
+
 router = APIRouter()
 
 
@@ -18,3 +20,8 @@ def readyz():
 @router.get("/livez")
 def livez():
     return {"status": "alive", "ts": time.time()}
+
+
+@router.get("/startupz")
+def startupz():
+    return startup_report()
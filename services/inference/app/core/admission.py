@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after_s: int) -> None:
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+@dataclass(eq=False)
+class _Ticket:
+    session_id: str | None
+    future: asyncio.Future = field(repr=False)
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a deadline-aware FIFO queue for /predict.
+
+    Requests beyond ``max_in_flight`` wait in a queue of at most ``max_queue``
+    entries. A request is rejected early when its deadline has passed or cannot
+    be met given the expected wait, and a newer frame from the same session
+    supersedes an older one that is still queued.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_in_flight: int,
+        max_queue: int,
+        initial_service_time_s: float = 0.2,
+        ewma_alpha: float = 0.2,
+    ) -> None:
+        self._max_in_flight = int(max_in_flight)
+        self._max_queue = int(max(0, max_queue))
+        self._service_time_s = float(max(0.001, initial_service_time_s))
+        self._alpha = float(max(0.01, min(1.0, ewma_alpha)))
+
+        self._active = 0
+        self._waiters: deque[_Ticket] = deque()
+        self._queued_sessions: dict[str, _Ticket] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_in_flight > 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _retry_after_s(self) -> int:
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(backlog * self._service_time_s / self._max_in_flight))
+
+    def _reject(self, status_code: int, reason: str) -> AdmissionRejected:
+        logger.info(
+            "Admission rejected: reason=%s active=%d queued=%d",
+            reason,
+            self._active,
+            len(self._waiters),
+        )
+        return AdmissionRejected(status_code, reason, self._retry_after_s())
+
+    async def acquire(self, *, deadline: float | None, session_id: str | None) -> None:
+        """Wait for an execution slot; ``deadline`` is a ``time.monotonic()`` value."""
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        if deadline is not None and deadline <= now:
+            raise self._reject(503, "deadline_expired")
+
+        if self._active < self._max_in_flight and not self._waiters:
+            self._active += 1
+            return
+
+        # The session's older queued frame only makes way once this one is sure
+        # to be queued; otherwise the session would lose both frames.
+        stale = self._queued_sessions.get(session_id) if session_id else None
+        if stale is not None and stale.future.done():
+            stale = None
+        waiting = len(self._waiters) - (1 if stale is not None else 0)
+
+        if waiting >= self._max_queue:
+            raise self._reject(429, "queue_full")
+
+        expected_wait_s = (waiting + 1) * self._service_time_s / self._max_in_flight
+        if deadline is not None and now + expected_wait_s > deadline:
+            raise self._reject(503, "deadline_unmeetable")
+
+        if stale is not None:
+            self._forget(stale)
+            stale.future.set_exception(self._reject(503, "superseded"))
+
+        ticket = _Ticket(
+            session_id=session_id,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(ticket)
+        if session_id:
+            self._queued_sessions[session_id] = ticket
+
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(ticket.future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._forget(ticket)
+            raise self._reject(503, "deadline_expired") from None
+        except asyncio.CancelledError:
+            self._forget(ticket)
+            granted = (
+                ticket.future.done()
+                and not ticket.future.cancelled()
+                and ticket.future.exception() is None
+            )
+            if granted:
+                # The slot was handed over just before cancellation; pass it on.
+                self._hand_off()
+            raise
+
+    def release(self, service_time_s: float) -> None:
+        if not self.enabled:
+            return
+
+        self._service_time_s += self._alpha * (
+            float(service_time_s) - self._service_time_s
+        )
+        self._hand_off()
+
+    def _hand_off(self) -> None:
+        # Hand the slot straight to the oldest live waiter instead of freeing it.
+        while self._waiters:
+            ticket = self._waiters.popleft()
+            if ticket.session_id:
+                self._queued_sessions.pop(ticket.session_id, None)
+            if not ticket.future.done():
+                ticket.future.set_result(None)
+                return
+        self._active = max(0, self._active - 1)
+
+    def _forget(self, ticket: _Ticket) -> None:
+        try:
+            self._waiters.remove(ticket)
+        except ValueError:
+            pass
+        if ticket.session_id and self._queued_sessions.get(ticket.session_id) is ticket:
+            del self._queued_sessions[ticket.session_id]
+
+
+def admission_max_in_flight(s: Settings) -> int:
+    """In-flight limit that matches the threads that actually run the matcher.
+
+    Admitted requests beyond the executor thread count would wait unseen for a
+    thread, so the deadline estimates would treat them as already running.
+    """
+    if not s.admission_enabled:
+        return 0
+    if s.admission_max_in_flight is None:
+        return s.executor_threads if s.executor_threads > 0 else 4
+    if 0 < s.executor_threads < s.admission_max_in_flight:
+        logger.warning(
+            "VBIC_ADMISSION_MAX_IN_FLIGHT=%d exceeds VBIC_EXECUTOR_THREADS=%d; "
+            "the extra admitted requests queue for a thread and deadline "
+            "estimates will be optimistic.",
+            s.admission_max_in_flight,
+            s.executor_threads,
+        )
+    return s.admission_max_in_flight
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    s = get_settings()
+    return AdmissionController(
+        max_in_flight=admission_max_in_flight(s),
+        max_queue=s.admission_max_queue,
+    )
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -109,6 +110,287 @@ class Settings(BaseSettings):
         default=0.7,
         validation_alias=AliasChoices("VBIC_CENTER_CROP_FRAC", "CENTER_CROP_FRAC"),
     )
+    # First-stage retrieval: ORB-match only the N SKUs whose global (colour/texture)
+    # descriptor is closest to the query (at least 2, so the score margin has a
+    # runner-up). 0 keeps the exhaustive ORB scan.
+    global_shortlist_size: int = Field(
+        default=0,
+        validation_alias=AliasChoices(
+            "VBIC_GLOBAL_SHORTLIST_SIZE",
+            "GLOBAL_SHORTLIST_SIZE",
+        ),
+    )
+    # IVF partitions for the global descriptor index; 0 uses exact brute-force kNN.
+    global_index_nlist: int = Field(
+        default=0,
+        validation_alias=AliasChoices("VBIC_GLOBAL_INDEX_NLIST", "GLOBAL_INDEX_NLIST"),
+    )
+    global_index_nprobe: int = Field(
+        default=4,
+        validation_alias=AliasChoices(
+            "VBIC_GLOBAL_INDEX_NPROBE", "GLOBAL_INDEX_NPROBE"
+        ),
+    )
+    # Coarse-to-fine cascade: score at this max side first and only escalate to
+    # max_query_side_px when a guardrail rejects the result. 0 disables the cascade.
+    cascade_low_side_px: int = Field(
+        default=0,
+        validation_alias=AliasChoices(
+            "VBIC_CASCADE_LOW_SIDE_PX", "CASCADE_LOW_SIDE_PX"
+        ),
+    )
+    # Per-SKU matching cost (time, knnMatch calls) and outcomes for /debug/sku-costs.
+    # A runner-up is the second-ranked SKU within this margin of the top one.
+    sku_cost_tracking: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("VBIC_SKU_COST_TRACKING", "SKU_COST_TRACKING"),
+    )
+    sku_cost_runner_up_margin: float = Field(
+        default=0.1,
+        validation_alias=AliasChoices(
+            "VBIC_SKU_COST_RUNNER_UP_MARGIN", "SKU_COST_RUNNER_UP_MARGIN"
+        ),
+    )
+    # Load-adaptive quality: step down through predefined tiers (fewer ORB features,
+    # smaller query, shortlist-only, no fallback) when latency or in-flight requests
+    # exceed these targets, and back up once load subsides.
+    load_adaptive_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices(
+            "VBIC_LOAD_ADAPTIVE_ENABLED", "LOAD_ADAPTIVE_ENABLED"
+        ),
+    )
+    load_target_latency_ms: float = Field(
+        default=500.0,
+        validation_alias=AliasChoices(
+            "VBIC_LOAD_TARGET_LATENCY_MS",
+            "LOAD_TARGET_LATENCY_MS",
+        ),
+    )
+    load_target_in_flight: int = Field(
+        default=4,
+        validation_alias=AliasChoices(
+            "VBIC_LOAD_TARGET_IN_FLIGHT", "LOAD_TARGET_IN_FLIGHT"
+        ),
+    )
+    load_tier_cooldown_s: float = Field(
+        default=2.0,
+        validation_alias=AliasChoices(
+            "VBIC_LOAD_TIER_COOLDOWN_S", "LOAD_TIER_COOLDOWN_S"
+        ),
+    )
+    # Opt-in admission control for /predict: at most admission_max_in_flight
+    # requests are matched at once per worker, with a bounded deadline-aware queue
+    # behind them. Unset follows executor_threads (4 when that is unset too).
+    admission_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("VBIC_ADMISSION_ENABLED", "ADMISSION_ENABLED"),
+    )
+    admission_max_in_flight: int | None = Field(
+        default=None,
+        validation_alias=AliasChoices(
+            "VBIC_ADMISSION_MAX_IN_FLIGHT",
+            "ADMISSION_MAX_IN_FLIGHT",
+        ),
+    )
+    admission_max_queue: int = Field(
+        default=8,
+        validation_alias=AliasChoices(
+            "VBIC_ADMISSION_MAX_QUEUE", "ADMISSION_MAX_QUEUE"
+        ),
+    )
+    # Optional directory for prebuilt reference index artifacts (default.pkl, plus
+    # stores/<store_id>.pkl per store), reused across restarts while reference
+    # images and feature settings are unchanged.
+    index_cache_dir: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("VBIC_INDEX_CACHE_DIR", "INDEX_CACHE_DIR"),
+    )
+    # Multi-store serving: each store lives in <stores_root_dir>/<store_id>/ with its
+    # own catalog.csv and images/ directory and is selected per request.
+    stores_root_dir: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("VBIC_STORES_ROOT_DIR", "STORES_ROOT_DIR"),
+    )
+    # Least recently used store indexes are evicted once loaded indexes exceed this.
+    store_index_memory_budget_mb: float = Field(
+        default=512.0,
+        validation_alias=AliasChoices(
+            "VBIC_STORE_INDEX_MEMORY_BUDGET_MB",
+            "STORE_INDEX_MEMORY_BUDGET_MB",
+        ),
+    )
+    # Scatter-gather matching for very large catalogs. "local" partitions the index
+    # across shard_count worker processes; "remote" fans out to shard_urls, each an
+    # inference instance running with shard_mode="worker" for one partition.
+    shard_mode: Literal["off", "local", "remote", "worker"] = Field(
+        default="off",
+        validation_alias=AliasChoices("VBIC_SHARD_MODE", "SHARD_MODE"),
+    )
+    shard_count: int = Field(
+        default=1,
+        validation_alias=AliasChoices("VBIC_SHARD_COUNT", "SHARD_COUNT"),
+    )
+    shard_index: int = Field(
+        default=0,
+        validation_alias=AliasChoices("VBIC_SHARD_INDEX", "SHARD_INDEX"),
+    )
+    # Comma-separated POST /shard/score URLs of the worker instances.
+    shard_urls: str = Field(
+        default="",
+        validation_alias=AliasChoices("VBIC_SHARD_URLS", "SHARD_URLS"),
+    )
+    shard_timeout_s: float = Field(
+        default=5.0,
+        validation_alias=AliasChoices("VBIC_SHARD_TIMEOUT_S", "SHARD_TIMEOUT_S"),
+    )
+    # Basket mode (/predict?mode=basket): split the frame into candidate item regions
+    # and match them in parallel, returning one labelled box per item.
+    basket_max_regions: int = Field(
+        default=8,
+        validation_alias=AliasChoices("VBIC_BASKET_MAX_REGIONS", "BASKET_MAX_REGIONS"),
+    )
+    basket_min_region_frac: float = Field(
+        default=0.02,
+        validation_alias=AliasChoices(
+            "VBIC_BASKET_MIN_REGION_FRAC",
+            "BASKET_MIN_REGION_FRAC",
+        ),
+    )
+    basket_nms_iou: float = Field(
+        default=0.3,
+        validation_alias=AliasChoices("VBIC_BASKET_NMS_IOU", "BASKET_NMS_IOU"),
+    )
+    # Region-matching threads per worker; gunicorn_conf.py sizes this from the CPU
+    # plan (see app/core/cpu_plan.py).
+    basket_workers: int = Field(
+        default=4,
+        validation_alias=AliasChoices("VBIC_BASKET_WORKERS", "BASKET_WORKERS"),
+    )
+    # Upper bound on a /predict body (sized for uncompressed 4K raw frames), checked
+    # against Content-Length before anything is read.
+    max_upload_bytes: int = Field(
+        default=32 * 1024 * 1024,
+        validation_alias=AliasChoices("VBIC_MAX_UPLOAD_BYTES", "MAX_UPLOAD_BYTES"),
+    )
+    # Build the index (and run a few synthetic queries) in the background at startup;
+    # /readyz reports not-ready until this finishes.
+    warmup_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("VBIC_WARMUP_ENABLED", "WARMUP_ENABLED"),
+    )
+    warmup_queries: int = Field(
+        default=2,
+        validation_alias=AliasChoices("VBIC_WARMUP_QUERIES", "WARMUP_QUERIES"),
+    )
+    # Per-worker thread budget, normally filled in by gunicorn_conf.py's CPU planner
+    # (see app/core/cpu_plan.py). executor_threads caps concurrent matching only;
+    # 0 leaves the library defaults alone.
+    executor_threads: int = Field(
+        default=0,
+        validation_alias=AliasChoices("VBIC_EXECUTOR_THREADS", "EXECUTOR_THREADS"),
+    )
+    opencv_threads: int = Field(
+        default=0,
+        validation_alias=AliasChoices("VBIC_OPENCV_THREADS", "OPENCV_THREADS"),
+    )
+    # Matcher decisions go out as JSON lines through a background queue. Only a
+    # sample is kept, plus every decision whose outcome is listed in
+    # decision_log_always (comma-separated, e.g. "min_score_margin,accepted").
+    decision_log_sample_rate: float = Field(
+        default=0.01,
+        validation_alias=AliasChoices(
+            "VBIC_DECISION_LOG_SAMPLE_RATE", "DECISION_LOG_SAMPLE_RATE"
+        ),
+    )
+    decision_log_always: str = Field(
+        default="min_score_margin",
+        validation_alias=AliasChoices(
+            "VBIC_DECISION_LOG_ALWAYS", "DECISION_LOG_ALWAYS"
+        ),
+    )
+    decision_log_queue_size: int = Field(
+        default=10000,
+        validation_alias=AliasChoices(
+            "VBIC_DECISION_LOG_QUEUE_SIZE", "DECISION_LOG_QUEUE_SIZE"
+        ),
+    )
+    # Save /predict inputs that take at least slow_capture_threshold_ms (frame,
+    # stage timings, matcher settings) under slow_capture_dir for offline replay with
+    # scripts/replay_slow_requests.py. Empty disables capturing.
+    slow_capture_dir: str = Field(
+        default="",
+        validation_alias=AliasChoices("VBIC_SLOW_CAPTURE_DIR", "SLOW_CAPTURE_DIR"),
+    )
+    slow_capture_threshold_ms: float = Field(
+        default=1000.0,
+        validation_alias=AliasChoices(
+            "VBIC_SLOW_CAPTURE_THRESHOLD_MS", "SLOW_CAPTURE_THRESHOLD_MS"
+        ),
+    )
+    slow_capture_max_entries: int = Field(
+        default=50,
+        validation_alias=AliasChoices(
+            "VBIC_SLOW_CAPTURE_MAX_ENTRIES", "SLOW_CAPTURE_MAX_ENTRIES"
+        ),
+    )
+    # Read-only /debug views (cascade, index, SKU costs, stores, shadow) need this
+    # token in X-VBIC-Debug-Token; empty (the default) disables them.
+    debug_token: str = Field(
+        default="",
+        validation_alias=AliasChoices("VBIC_DEBUG_TOKEN", "DEBUG_TOKEN"),
+    )
+    # On-demand profiling of single /predict calls: send the token in X-VBIC-Profile,
+    # or arm the next N requests with POST /debug/profile. Profiles (pstats or
+    # collapsed stacks) are kept under profile_dir (default: <tmp>/vbic-profiles).
+    # An empty token disables profiling.
+    profile_token: str = Field(
+        default="",
+        validation_alias=AliasChoices("VBIC_PROFILE_TOKEN", "PROFILE_TOKEN"),
+    )
+    profile_dir: str = Field(
+        default="",
+        validation_alias=AliasChoices("VBIC_PROFILE_DIR", "PROFILE_DIR"),
+    )
+    profile_max_entries: int = Field(
+        default=20,
+        validation_alias=AliasChoices(
+            "VBIC_PROFILE_MAX_ENTRIES", "PROFILE_MAX_ENTRIES"
+        ),
+    )
+    profile_sample_interval_ms: float = Field(
+        default=1.0,
+        validation_alias=AliasChoices(
+            "VBIC_PROFILE_SAMPLE_INTERVAL_MS", "PROFILE_SAMPLE_INTERVAL_MS"
+        ),
+    )
+    # Shadow evaluation: a shadow_sample_rate fraction of single-item /predict frames
+    # is also matched, in a low-priority background thread, by a second matcher built
+    # with shadow_matcher_overrides (a JSON object of matcher settings, e.g.
+    # '{"orb_ratio_test": 0.8}'). Agreement and latency are reported on
+    # /debug/shadow. A rate of 0 or empty overrides disables it.
+    shadow_sample_rate: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("VBIC_SHADOW_SAMPLE_RATE", "SHADOW_SAMPLE_RATE"),
+    )
+    shadow_matcher_overrides: str = Field(
+        default="",
+        validation_alias=AliasChoices(
+            "VBIC_SHADOW_MATCHER_OVERRIDES", "SHADOW_MATCHER_OVERRIDES"
+        ),
+    )
+    # Frames sampled while this many are already waiting are skipped, not queued.
+    shadow_max_pending: int = Field(
+        default=4,
+        validation_alias=AliasChoices("VBIC_SHADOW_MAX_PENDING", "SHADOW_MAX_PENDING"),
+    )
+    shadow_disagreement_samples: int = Field(
+        default=50,
+        validation_alias=AliasChoices(
+            "VBIC_SHADOW_DISAGREEMENT_SAMPLES", "SHADOW_DISAGREEMENT_SAMPLES"
+        ),
+    )
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
@@ -0,0 +1,115 @@
+import math
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+# Stdlib only: gunicorn_conf.py imports this in the master process, before any
+# worker (or OpenCV) is started.
+
+_CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+@dataclass(frozen=True)
+class WorkerPlan:
+    cpus: float
+    cpu_source: str
+    workers: int
+    executor_threads: int
+    opencv_threads: int
+    basket_workers: int
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def describe(self) -> str:
+        return (
+            f"cpus={self.cpus:g} ({self.cpu_source}) workers={self.workers} "
+            f"executor_threads={self.executor_threads} "
+            f"opencv_threads={self.opencv_threads} "
+            f"basket_workers={self.basket_workers}"
+        )
+
+
+def cgroup_cpu_limit(root: Path = _CGROUP_ROOT) -> float | None:
+    """Return the container CPU quota in CPUs, or None when unlimited/unknown."""
+    # cgroup v2: "<quota> <period>" or "max <period>".
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    # cgroup v1: quota is -1 when unlimited.
+    try:
+        quota_us = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period_us = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return quota_us / period_us
+
+
+def available_cpus(root: Path = _CGROUP_ROOT) -> tuple[float, str]:
+    """Return (usable CPUs, where that number came from)."""
+    try:
+        cpus: float = len(os.sched_getaffinity(0))
+        source = "affinity"
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+        source = "cpu_count"
+    quota = cgroup_cpu_limit(root)
+    if quota is not None and quota < cpus:
+        return quota, "cgroup"
+    return float(cpus), source
+
+
+def _env_int(env: dict, name: str) -> int | None:
+    raw = (env.get(name) or "").strip()
+    if not raw:
+        return None
+    return max(1, int(raw))
+
+
+def plan_workers(env: dict | None = None, *, root: Path = _CGROUP_ROOT) -> WorkerPlan:
+    """Size the inference server for the CPUs this container may actually use.
+
+    Matching is CPU-bound, so one worker per whole CPU gives the parallelism
+    and OpenCV is held to one thread per worker to avoid oversubscribing
+    the quota. Each worker matches at most two requests at once on its executor
+    threads, so a quick match need not wait behind a slow one (decoding happens
+    on the request path, not in this pool). Basket mode fans a frame's regions
+    out to a separate pool while its executor thread waits, so that pool gets
+    the worker's CPU share, like OpenCV. Every number can be overridden through
+    the environment (``VBIC_CPU_LIMIT``, ``GUNICORN_WORKERS``,
+    ``VBIC_EXECUTOR_THREADS``, ``VBIC_OPENCV_THREADS`` and
+    ``VBIC_BASKET_WORKERS``).
+    """
+    env = os.environ if env is None else env
+
+    cpu_override = (env.get("VBIC_CPU_LIMIT") or "").strip()
+    if cpu_override:
+        cpus, cpu_source = max(0.1, float(cpu_override)), "env"
+    else:
+        cpus, cpu_source = available_cpus(root)
+
+    workers = _env_int(env, "GUNICORN_WORKERS") or max(1, math.floor(cpus))
+    # CPU left over once every worker has a whole core (e.g. 2.5 CPUs, 2
+    # workers) goes to OpenCV's own threads rather than another worker.
+    opencv_threads = _env_int(env, "VBIC_OPENCV_THREADS") or max(
+        1, math.floor(cpus / workers)
+    )
+    executor_threads = _env_int(env, "VBIC_EXECUTOR_THREADS") or 2
+    basket_workers = _env_int(env, "VBIC_BASKET_WORKERS") or max(
+        1, math.floor(cpus / workers)
+    )
+
+    return WorkerPlan(
+        cpus=round(cpus, 2),
+        cpu_source=cpu_source,
+        workers=workers,
+        executor_threads=executor_threads,
+        opencv_threads=opencv_threads,
+        basket_workers=basket_workers,
+    )
@@ -0,0 +1,110 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+
+from opentelemetry import metrics
+
+from .config import get_settings
+
+DECISION_LOGGER_NAME = "vbic.decisions"
+
+_meter = metrics.get_meter(__name__)
+_dropped_counter = _meter.create_counter(
+    "vbic.inference.decision_log.dropped",
+    description="Sampled decision records dropped because the log queue was full.",
+)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, logger, event and the record's fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records stay in-process, so formatting is left to the listener thread.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped_counter.add(1)
+
+
+class DecisionLog:
+    """Sampled, structured matcher decision records.
+
+    Every decision is kept with probability ``sample_rate``; outcomes listed in
+    ``always`` (e.g. ``min_score_margin``) are always kept. Callers check
+    :meth:`sampled` before building a record, so dropped decisions cost one
+    random draw and nothing is formatted for them.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rate: float,
+        always: frozenset[str],
+        logger: logging.Logger,
+    ) -> None:
+        self._sample_rate = max(0.0, min(1.0, sample_rate))
+        self._always = always
+        self._logger = logger
+
+    def sampled(self, outcome: str) -> bool:
+        if not self._logger.isEnabledFor(logging.INFO):
+            return False
+        return outcome in self._always or random.random() < self._sample_rate
+
+    def emit(self, outcome: str, **fields) -> None:
+        self._logger.info(
+            "match_decision", extra={"fields": {"outcome": outcome, **fields}}
+        )
+
+
+def _start_listener(queue_size: int) -> logging.Logger:
+    records: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JsonFormatter())
+    listener = QueueListener(records, stream)
+    listener.start()
+    # Flush whatever is still queued on a clean shutdown.
+    atexit.register(listener.stop)
+
+    logger = logging.getLogger(DECISION_LOGGER_NAME)
+    logger.setLevel(logging.INFO)
+    logger.addHandler(_NonBlockingQueueHandler(records))
+    # The text handlers on the root logger would format every record again.
+    logger.propagate = False
+    return logger
+
+
+@lru_cache(maxsize=1)
+def get_decision_log() -> DecisionLog:
+    s = get_settings()
+    always = frozenset(
+        outcome.strip()
+        for outcome in s.decision_log_always.split(",")
+        if outcome.strip()
+    )
+    logger = logging.getLogger(DECISION_LOGGER_NAME)
+    if not logger.handlers and (s.decision_log_sample_rate > 0 or always):
+        logger = _start_listener(s.decision_log_queue_size)
+    return DecisionLog(
+        sample_rate=s.decision_log_sample_rate, always=always, logger=logger
+    )
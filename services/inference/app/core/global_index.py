@@ -0,0 +1,162 @@
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Global descriptors are computed on a small thumbnail; the exact size barely
+# affects ranking quality but dominates the per-image cost.
+_THUMB_SIDE_PX = 64
+_HUE_BINS = 16
+_SAT_BINS = 4
+_ORIENT_BINS = 8
+_GRID = 2
+
+GLOBAL_DESCRIPTOR_DIM = _HUE_BINS * _SAT_BINS + _ORIENT_BINS * _GRID * _GRID
+
+
+def _l2_normalize(vec: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vec))
+    if norm <= 0.0:
+        return vec
+    return vec / norm
+
+
+def compute_global_descriptor(bgr: np.ndarray) -> np.ndarray:
+    """Return a compact, L2-normalised colour + texture descriptor for an image.
+
+    The descriptor concatenates a hue/saturation histogram with gradient
+    orientation histograms over a 2x2 grid, so cosine similarity between two
+    descriptors is a single dot product.
+    """
+    if len(bgr.shape) == 2:
+        bgr = cv2.cvtColor(bgr, cv2.COLOR_GRAY2BGR)
+    thumb = cv2.resize(
+        bgr, (_THUMB_SIDE_PX, _THUMB_SIDE_PX), interpolation=cv2.INTER_AREA
+    )
+
+    hsv = cv2.cvtColor(thumb, cv2.COLOR_BGR2HSV)
+    color = cv2.calcHist(
+        [hsv], [0, 1], None, [_HUE_BINS, _SAT_BINS], [0, 180, 0, 256]
+    ).ravel()
+    color = _l2_normalize(color.astype(np.float32))
+
+    gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    magnitude, angle = cv2.cartToPolar(gx, gy, angleInDegrees=True)
+    # Orientation is folded to [0, 180) so edge polarity does not matter.
+    bins = ((angle % 180.0) * (_ORIENT_BINS / 180.0)).astype(np.int32)
+    bins = np.clip(bins, 0, _ORIENT_BINS - 1)
+
+    cell = _THUMB_SIDE_PX // _GRID
+    texture_parts: list[np.ndarray] = []
+    for gy_idx in range(_GRID):
+        for gx_idx in range(_GRID):
+            window = np.s_[
+                gy_idx * cell : (gy_idx + 1) * cell,
+                gx_idx * cell : (gx_idx + 1) * cell,
+            ]
+            hist = np.bincount(
+                bins[window].ravel(),
+                weights=magnitude[window].ravel(),
+                minlength=_ORIENT_BINS,
+            )
+            texture_parts.append(hist.astype(np.float32))
+    texture = _l2_normalize(np.concatenate(texture_parts))
+
+    return _l2_normalize(np.concatenate([color, texture])).astype(np.float32)
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int = 10) -> np.ndarray:
+    # Deterministic seeding keeps the partitioning stable across index rebuilds.
+    rng = np.random.default_rng(0)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(data @ centroids.T, axis=1)
+        for c in range(k):
+            members = data[assignment == c]
+            if len(members):
+                centroids[c] = _l2_normalize(members.mean(axis=0))
+    return centroids
+
+
+class GlobalDescriptorIndex:
+    """Contiguous matrix of global descriptors with exact or IVF kNN search.
+
+    Each row belongs to one reference image; ``owners`` maps rows back to the
+    position of their SKU in the matcher's index so results can be
+    aggregated per SKU.
+    """
+
+    def __init__(
+        self, descriptors: list[np.ndarray], owners: list[int], nlist: int = 0
+    ):
+        if descriptors:
+            self._matrix = np.ascontiguousarray(
+                np.vstack(descriptors), dtype=np.float32
+            )
+        else:
+            self._matrix = np.zeros((0, GLOBAL_DESCRIPTOR_DIM), dtype=np.float32)
+        self._owners = np.asarray(owners, dtype=np.int32)
+
+        self._centroids: np.ndarray | None = None
+        self._lists: list[np.ndarray] = []
+        nlist = int(nlist)
+        if nlist > 1 and len(self._matrix) > nlist:
+            self._centroids = _kmeans(self._matrix, nlist)
+            assignment = np.argmax(self._matrix @ self._centroids.T, axis=1)
+            self._lists = [np.flatnonzero(assignment == c) for c in range(nlist)]
+
+    def __len__(self) -> int:
+        return len(self._matrix)
+
+    @property
+    def nbytes(self) -> int:
+        total = self._matrix.nbytes + self._owners.nbytes
+        if self._centroids is not None:
+            total += self._centroids.nbytes + sum(lst.nbytes for lst in self._lists)
+        return total
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 4) -> list[int]:
+        """Return up to ``k`` distinct SKU positions ranked by best row similarity."""
+        if len(self._matrix) == 0 or k <= 0:
+            return []
+
+        if self._centroids is not None:
+            nprobe = max(1, min(int(nprobe), len(self._centroids)))
+            centroid_scores = self._centroids @ query
+            probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+            rows = np.concatenate([self._lists[c] for c in probe])
+            if len(rows) == 0:
+                return []
+            scores = self._matrix[rows] @ query
+        else:
+            rows = None
+            scores = self._matrix @ query
+
+        owners = self._owners if rows is None else self._owners[rows]
+        # Only the best few rows need sorting; SKUs own several rows each, so
+        # oversample before falling back to a full sort.
+        pool = min(len(scores), k * 8)
+        if pool < len(scores):
+            head = np.argpartition(-scores, pool - 1)[:pool]
+            ranked = self._distinct_owners(head[np.argsort(-scores[head])], owners, k)
+            if len(ranked) >= k:
+                return ranked
+        return self._distinct_owners(np.argsort(-scores, kind="stable"), owners, k)
+
+    @staticmethod
+    def _distinct_owners(order: np.ndarray, owners: np.ndarray, k: int) -> list[int]:
+        ranked: list[int] = []
+        seen: set[int] = set()
+        for row in order:
+            owner = int(owners[row])
+            if owner in seen:
+                continue
+            seen.add(owner)
+            ranked.append(owner)
+            if len(ranked) >= k:
+                break
+        return ranked
@@ -0,0 +1,179 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
+
+from opentelemetry import metrics
+
+from .config import get_settings
+from .product_matcher import ProductMatcher, build_product_matcher
+
+logger = logging.getLogger(__name__)
+
+_STORE_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+_meter = metrics.get_meter(__name__)
+_hits_counter = _meter.create_counter(
+    "vbic.inference.store_index.hits",
+    description="Requests served by an already loaded store index.",
+)
+_loads_counter = _meter.create_counter(
+    "vbic.inference.store_index.loads",
+    description="Store indexes loaded (or reloaded after eviction).",
+)
+_evictions_counter = _meter.create_counter(
+    "vbic.inference.store_index.evictions",
+    description="Store indexes evicted to stay within the memory budget.",
+)
+
+
+class UnknownStoreError(LookupError):
+    pass
+
+
+@dataclass
+class _StoreStats:
+    hits: int = 0
+    loads: int = 0
+    evictions: int = 0
+    last_load_s: float = 0.0
+    nbytes: int = 0
+
+
+class IndexRegistry:
+    """Lazily loads one ProductMatcher per store and evicts cold ones by LRU.
+
+    Each store is a directory under ``stores_root_dir`` with its own
+    ``catalog.csv`` and ``images/``. Loaded indexes are kept while their total
+    size stays within ``memory_budget_bytes``; the most recently used store is
+    never evicted, even if it alone exceeds the budget.
+    """
+
+    def __init__(
+        self,
+        *,
+        stores_root_dir: str,
+        memory_budget_bytes: int,
+        matcher_factory: Callable[..., ProductMatcher],
+        index_cache_dir: str | None = None,
+    ) -> None:
+        self._root = Path(stores_root_dir)
+        self._memory_budget_bytes = int(max(0, memory_budget_bytes))
+        self._matcher_factory = matcher_factory
+        self._index_cache_dir = Path(index_cache_dir) if index_cache_dir else None
+
+        self._lock = threading.Lock()
+        self._loaded: OrderedDict[str, ProductMatcher] = OrderedDict()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._stats: dict[str, _StoreStats] = {}
+
+    def _store_dir(self, store_id: str) -> Path:
+        if not _STORE_ID_RE.match(store_id):
+            raise UnknownStoreError(store_id)
+        store_dir = self._root / store_id
+        if not store_dir.is_dir():
+            raise UnknownStoreError(store_id)
+        return store_dir
+
+    def matcher_overrides(self, store_id: str) -> dict:
+        """Matcher kwargs that, on top of the service settings, build a store index."""
+        store_dir = self._store_dir(store_id)
+        return dict(
+            catalog_csv_path=str(store_dir / "catalog.csv"),
+            reference_images_dir=str(store_dir / "images"),
+            index_cache_path=(
+                # Own subdirectory: a store id may be "default" or "shadow", the
+                # names of the service-wide artifacts next to it.
+                str(self._index_cache_dir / "stores" / f"{store_id}.pkl")
+                if self._index_cache_dir
+                else None
+            ),
+        )
+
+    def get(self, store_id: str) -> ProductMatcher:
+        # Validate first so unknown store ids never leave a load lock behind.
+        overrides = self.matcher_overrides(store_id)
+        with self._lock:
+            matcher = self._loaded.get(store_id)
+            if matcher is not None:
+                self._loaded.move_to_end(store_id)
+                self._stats[store_id].hits += 1
+                _hits_counter.add(1, {"store_id": store_id})
+                return matcher
+            load_lock = self._load_locks.setdefault(store_id, threading.Lock())
+
+        # Per-store lock: concurrent first requests for one store build it once,
+        # while other stores keep being served.
+        with load_lock:
+            with self._lock:
+                matcher = self._loaded.get(store_id)
+                if matcher is not None:
+                    self._loaded.move_to_end(store_id)
+                    self._stats[store_id].hits += 1
+                    _hits_counter.add(1, {"store_id": store_id})
+                    return matcher
+
+            started = time.perf_counter()
+            matcher = self._matcher_factory(**overrides)
+            load_s = time.perf_counter() - started
+            logger.info("Loaded index for store=%s in %.2fs", store_id, load_s)
+
+            with self._lock:
+                stats = self._stats.setdefault(store_id, _StoreStats())
+                stats.loads += 1
+                stats.last_load_s = load_s
+                stats.nbytes = matcher.index_nbytes()
+                self._loaded[store_id] = matcher
+                self._evict_over_budget()
+            _loads_counter.add(1, {"store_id": store_id})
+            return matcher
+
+    def _evict_over_budget(self) -> None:
+        total = sum(self._stats[store_id].nbytes for store_id in self._loaded)
+        while total > self._memory_budget_bytes and len(self._loaded) > 1:
+            store_id, _ = self._loaded.popitem(last=False)
+            self._load_locks.pop(store_id, None)
+            stats = self._stats[store_id]
+            stats.evictions += 1
+            total -= stats.nbytes
+            _evictions_counter.add(1, {"store_id": store_id})
+            logger.info("Evicted index for store=%s (%d bytes)", store_id, stats.nbytes)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_budget_bytes": self._memory_budget_bytes,
+                "loaded_bytes": sum(
+                    self._stats[store_id].nbytes for store_id in self._loaded
+                ),
+                "loaded": list(self._loaded),
+                "stores": {
+                    store_id: {
+                        "loaded": store_id in self._loaded,
+                        "hits": stats.hits,
+                        "loads": stats.loads,
+                        "evictions": stats.evictions,
+                        "last_load_s": stats.last_load_s,
+                        "nbytes": stats.nbytes,
+                    }
+                    for store_id, stats in self._stats.items()
+                },
+            }
+
+
+@lru_cache(maxsize=1)
+def get_index_registry() -> IndexRegistry | None:
+    s = get_settings()
+    if not s.stores_root_dir:
+        return None
+    return IndexRegistry(
+        stores_root_dir=s.stores_root_dir,
+        memory_budget_bytes=int(s.store_index_memory_budget_mb * 1024 * 1024),
+        matcher_factory=lambda **overrides: build_product_matcher(s, **overrides),
+        index_cache_dir=s.index_cache_dir,
+    )
@@ -0,0 +1,90 @@
+import time
+from dataclasses import dataclass
+
+from starlette.requests import Request
+
+# Leading bytes of the image formats cv2.imdecode is expected to handle here.
+_MAGIC_PREFIXES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"BM", "bmp"),
+)
+
+
+class IngestError(Exception):
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class IngestStats:
+    nbytes: int = 0
+    read_s: float = 0.0
+    decode_s: float = 0.0
+
+    @property
+    def total_ms(self) -> float:
+        return (self.read_s + self.decode_s) * 1000.0
+
+
+def sniff_image_type(head: bytes | bytearray | memoryview) -> str | None:
+    """Return the image format named by the payload's magic bytes, if known."""
+    head = bytes(head[:12])
+    for prefix, name in _MAGIC_PREFIXES:
+        if head.startswith(prefix):
+            return name
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def declared_length(request: Request, *, max_bytes: int) -> int | None:
+    """Check ``Content-Length`` before any of the body is read."""
+    raw = request.headers.get("content-length")
+    if raw is None:
+        return None
+    try:
+        length = int(raw)
+    except ValueError:
+        raise IngestError(400, "Invalid Content-Length header.") from None
+    if length < 0:
+        raise IngestError(400, "Invalid Content-Length header.")
+    if length > max_bytes:
+        raise IngestError(413, f"Request body exceeds {max_bytes} bytes.")
+    return length
+
+
+async def read_body(
+    request: Request, *, max_bytes: int, stats: IngestStats
+) -> bytearray:
+    """Stream the request body into one buffer sized from ``Content-Length``.
+
+    Chunks are copied straight into the preallocated buffer instead of being
+    collected and joined. Bodies without a length (chunked uploads) grow the
+    buffer but are still cut off at ``max_bytes``.
+    """
+    started = time.perf_counter()
+    length = declared_length(request, max_bytes=max_bytes)
+    buffer = bytearray(length or 0)
+    filled = 0
+    async for chunk in request.stream():
+        if not chunk:
+            continue
+        end = filled + len(chunk)
+        if end > max_bytes:
+            raise IngestError(413, f"Request body exceeds {max_bytes} bytes.")
+        if length is None:
+            buffer.extend(chunk)
+        elif end > length:
+            raise IngestError(400, "Request body is longer than Content-Length.")
+        else:
+            buffer[filled:end] = chunk
+        filled = end
+    if length is not None and filled != length:
+        raise IngestError(400, "Request body is shorter than Content-Length.")
+
+    stats.nbytes = filled
+    stats.read_s = time.perf_counter() - started
+    return buffer
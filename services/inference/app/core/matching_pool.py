@@ -0,0 +1,33 @@
+import functools
+from typing import Callable, TypeVar
+
+import anyio
+import anyio.to_thread
+
+from .config import get_settings
+
+T = TypeVar("T")
+
+_limiter: anyio.CapacityLimiter | None = None
+
+
+def _matching_limiter() -> anyio.CapacityLimiter | None:
+    global _limiter
+    threads = get_settings().executor_threads
+    if threads <= 0:
+        return None
+    if _limiter is None or _limiter.total_tokens != threads:
+        _limiter = anyio.CapacityLimiter(threads)
+    return _limiter
+
+
+async def run_matching(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run CPU-bound matching on a worker thread, ``executor_threads`` at a time.
+
+    Matching gets its own limiter so that anyio's process-wide default (used by
+    sync endpoints such as the health probes) is never exhausted by it; with
+    no thread plan it falls back to that default limiter.
+    """
+    return await anyio.to_thread.run_sync(
+        functools.partial(fn, *args, **kwargs), limiter=_matching_limiter()
+    )
@@ -4,14 +4,17 @@ import json
 import logging
 from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import cv2
 import numpy as np
-from openai import OpenAI
 
 from .config import get_settings
 from .product_matcher import _center_crop, _resize_max_side
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
 logger = logging.getLogger(__name__)
 
 
@@ -72,10 +75,17 @@ class OpenAIFallbackClassifier:
 
         self._labels = _load_catalog_labels(self._catalog_csv_path)
 
-        self._client: OpenAI | None = None
+        self._client: "OpenAI | None" = None
         if self._enabled and self._api_key:
+            # Imported here so workers with the fallback disabled never load openai.
+            import openai
+
             # openai-python uses httpx; `timeout` is in seconds.
-            self._client = OpenAI(api_key=self._api_key, timeout=self._timeout_s)
+            self._client = openai.OpenAI(api_key=self._api_key, timeout=self._timeout_s)
+
+    @property
+    def active(self) -> bool:
+        return self._client is not None
 
     def predict(self, bgr: np.ndarray) -> list[dict]:
         if not self._client:
@@ -122,8 +132,7 @@ class OpenAIFallbackClassifier:
             "Choose up to the top "
             f"{self._top_k} labels from the allowed list that best match the image.\n"
             "If none of the labels fit, return an empty predictions list.\n\n"
-            "Allowed labels:\n- "
-            + "\n- ".join(labels)
+            "Allowed labels:\n- " + "\n- ".join(labels)
         )
 
         try:
@@ -203,4 +212,3 @@ def get_openai_fallback_classifier() -> OpenAIFallbackClassifier:
         center_crop_frac=s.center_crop_frac,
         top_k=s.top_k,
     )
-
@@ -1,20 +1,41 @@
 import csv
+import hashlib
+import json
 import logging
+import pickle
 import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
 
 import cv2
 import numpy as np
+from opentelemetry import metrics, trace
 
-from .config import get_settings
+from .config import Settings, get_settings
+from .decision_log import get_decision_log
+from .global_index import GlobalDescriptorIndex, compute_global_descriptor
+from .quality_tiers import QualityTier
+from .timing import record_stage, stage
 
 logger = logging.getLogger(__name__)
 
 _ALLOWED_IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
-_VARIANT_SUFFIX_RE = re.compile(
-    r"(?:\s+Dataset|\s+Variant\s+\d+)\s*$", re.IGNORECASE
+# The score-margin gate needs a runner-up, so a shortlist never holds fewer SKUs.
+_MIN_SHORTLIST_SIZE = 2
+_VARIANT_SUFFIX_RE = re.compile(r"(?:\s+Dataset|\s+Variant\s+\d+)\s*$", re.IGNORECASE)
+
+_meter = metrics.get_meter(__name__)
+_decisions_counter = _meter.create_counter(
+    "vbic.inference.match.decisions",
+    description=(
+        "Matcher decisions per cascade level: accepted, no_candidates, or the "
+        "guardrail that rejected the top candidate."
+    ),
 )
 
 
@@ -42,6 +63,7 @@ def _resize_max_side(image: np.ndarray, max_side_px: int) -> np.ndarray:
     new_h = max(1, int(round(h * scale)))
     return cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
 
+
 def _center_crop(image: np.ndarray, frac: float) -> np.ndarray:
     if frac <= 0.0 or frac >= 1.0:
         return image
@@ -58,12 +80,29 @@ def _center_crop(image: np.ndarray, frac: float) -> np.ndarray:
     return cropped if cropped.size else image
 
 
+def shard_for_sku(sku: str, shard_count: int) -> int:
+    # crc32 is stable across processes and Python versions, unlike hash().
+    return zlib.crc32(sku.encode("utf-8")) % max(1, shard_count)
+
+
 @dataclass(frozen=True)
 class _IndexedSku:
     sku: str
     label: str
     descriptors: list[np.ndarray]
     hue_hists: list[np.ndarray]
+    global_descs: list[np.ndarray]
+    # ORB descriptors of the same references at the cascade's low resolution.
+    low_descriptors: list[np.ndarray]
+
+
+@dataclass(frozen=True)
+class _QueryFeatures:
+    descriptors: np.ndarray | None
+    hue_hist: np.ndarray | None
+    # Only computed when a global shortlist is in use.
+    global_desc: np.ndarray | None
+
 
 @dataclass(frozen=True)
 class _ScoredLabel:
@@ -71,6 +110,109 @@ class _ScoredLabel:
     confidence: float
     orb_confidence: float
     hue_confidence: float
+    # Best-scoring SKU behind the label; empty from shards that predate it.
+    sku: str = ""
+
+
+def _sku_nbytes(sku: _IndexedSku) -> int:
+    return sum(
+        array.nbytes
+        for arrays in (
+            sku.descriptors,
+            sku.hue_hists,
+            sku.global_descs,
+            sku.low_descriptors,
+        )
+        for array in arrays
+    )
+
+
+class _SkuCostStats:
+    """Cumulative matching cost and outcomes per SKU since start-up.
+
+    Cost is wall time spent scoring the SKU (ORB and hue) and its knnMatch
+    calls; ``scored`` counts how often it was a candidate at all. A win is an
+    accepted top prediction; a runner-up is the second-ranked SKU of a final
+    decision whose confidence is within ``runner_up_margin`` of the top.
+    """
+
+    def __init__(self, runner_up_margin: float) -> None:
+        self._runner_up_margin = max(0.0, float(runner_up_margin))
+        self._lock = threading.Lock()
+        # sku -> [seconds, knn_calls, scored, wins, runner_ups]
+        self._by_sku: dict[str, list] = {}
+        self._decisions = 0
+
+    def _entry(self, sku: str) -> list:
+        return self._by_sku.setdefault(sku, [0.0, 0, 0, 0, 0])
+
+    def add_costs(self, costs: list[tuple[str, float, int]]) -> None:
+        with self._lock:
+            for sku, seconds, knn_calls in costs:
+                entry = self._entry(sku)
+                entry[0] += seconds
+                entry[1] += knn_calls
+                entry[2] += 1
+
+    def add_decision(
+        self, ranked: list[_ScoredLabel], *, accepted: bool, margin: float
+    ) -> None:
+        with self._lock:
+            self._decisions += 1
+            if accepted and ranked and ranked[0].sku:
+                self._entry(ranked[0].sku)[3] += 1
+            if len(ranked) > 1 and ranked[1].sku and margin <= self._runner_up_margin:
+                self._entry(ranked[1].sku)[4] += 1
+
+    def snapshot(self) -> tuple[int, dict[str, list]]:
+        with self._lock:
+            return self._decisions, {sku: list(v) for sku, v in self._by_sku.items()}
+
+
+class _CascadeStats:
+    """Counts how often the low-resolution pass resolves a request on its own."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._resolved_low = 0
+        self._low_cpu_s = 0.0
+        self._full_cpu_s = 0.0
+
+    def record(self, *, low_cpu_s: float, full_cpu_s: float | None) -> None:
+        with self._lock:
+            self._requests += 1
+            self._low_cpu_s += low_cpu_s
+            if full_cpu_s is None:
+                self._resolved_low += 1
+            else:
+                self._full_cpu_s += full_cpu_s
+
+    def snapshot(self, *, enabled: bool) -> dict:
+        with self._lock:
+            requests = self._requests
+            resolved_low = self._resolved_low
+            escalated = requests - resolved_low
+            mean_low = self._low_cpu_s / requests if requests else 0.0
+            mean_full = self._full_cpu_s / escalated if escalated else None
+
+        # Without the cascade every request would have paid only the full pass, so
+        # savings are (resolved early * full cost) minus (escalated * wasted low cost).
+        mean_saved = None
+        if requests and mean_full is not None:
+            mean_saved = (resolved_low * mean_full - escalated * mean_low) / requests
+        return {
+            "enabled": enabled,
+            "requests": requests,
+            "resolved_low": resolved_low,
+            "escalated": escalated,
+            "resolved_low_fraction": resolved_low / requests if requests else 0.0,
+            "mean_low_cpu_ms": mean_low * 1000.0,
+            "mean_full_cpu_ms": mean_full * 1000.0 if mean_full is not None else None,
+            "mean_cpu_saved_ms": (
+                mean_saved * 1000.0 if mean_saved is not None else None
+            ),
+        }
 
 
 class ProductMatcher:
@@ -93,6 +235,18 @@ class ProductMatcher:
         min_score_margin: float,
         canonicalize_variant_labels: bool,
         center_crop_frac: float,
+        global_shortlist_size: int = 0,
+        global_index_nlist: int = 0,
+        global_index_nprobe: int = 4,
+        index_global_descriptors: bool = False,
+        cascade_low_side_px: int = 0,
+        index_cache_path: str | None = None,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        load_index: bool = True,
+        record_decisions: bool = True,
+        track_sku_costs: bool = False,
+        sku_cost_runner_up_margin: float = 0.1,
     ) -> None:
         self._catalog_csv_path = Path(catalog_csv_path)
         self._reference_images_dir = Path(reference_images_dir)
@@ -111,11 +265,61 @@ class ProductMatcher:
         self._canonicalize_variant_labels = bool(canonicalize_variant_labels)
         # Clamp to a sane range; too small crops can cause unstable ORB scores.
         self._center_crop_frac = float(max(0.0, min(1.0, center_crop_frac)))
+        self._global_shortlist_size = max(0, int(global_shortlist_size))
+        if 0 < self._global_shortlist_size < _MIN_SHORTLIST_SIZE:
+            logger.warning(
+                "global_shortlist_size=%d leaves no runner-up for the score margin; "
+                "using %d",
+                self._global_shortlist_size,
+                _MIN_SHORTLIST_SIZE,
+            )
+            self._global_shortlist_size = _MIN_SHORTLIST_SIZE
+        self._global_index_nprobe = max(1, int(global_index_nprobe))
+        self._global_index_nlist = max(0, int(global_index_nlist))
+        # Global descriptors are only worth building when a shortlist can use them;
+        # load tiers may force one even when global_shortlist_size is 0.
+        self._index_global_descriptors = self._global_shortlist_size > 0 or bool(
+            index_global_descriptors
+        )
+        # The cheap pass only makes sense below the full query resolution.
+        cascade_low_side_px = max(0, int(cascade_low_side_px))
+        if (
+            self._max_query_side_px > 0
+            and cascade_low_side_px >= self._max_query_side_px
+        ):
+            cascade_low_side_px = 0
+        self._cascade_low_side_px = cascade_low_side_px
+        self._cascade_stats = _CascadeStats()
+        # Off for shadow matchers so they do not skew the live decision metrics.
+        self._record_decisions = bool(record_decisions)
+        self._sku_costs = (
+            _SkuCostStats(sku_cost_runner_up_margin) if track_sku_costs else None
+        )
+        # Set per thread by unrecorded(), e.g. for warm-up queries.
+        self._unrecorded = threading.local()
+
+        self._index_cache_path = Path(index_cache_path) if index_cache_path else None
+        # A shard only indexes the SKUs that hash to it (see shard_for_sku).
+        self._shard_count = max(1, int(shard_count))
+        self._shard_index = int(shard_index) % self._shard_count
 
         self._sku_to_label = self._load_catalog(self._catalog_csv_path)
-        self._index = self._build_index(self._reference_images_dir, self._sku_to_label)
+        # Identifies the reference set and feature settings behind this index; also
+        # the cache key for the on-disk index artifact.
+        self._fingerprint = self._index_fingerprint()
+        # Reference images (or whole SKUs) left out of the index, and why.
+        self._index_skipped: list[dict] = []
+        self._index_source = "none"
+        # load_index=False gives a coordinator that only extracts and decides.
+        started = time.perf_counter()
+        self._index = self._load_or_build_index() if load_index else []
+        self._index_build_s = time.perf_counter() - started
+        self._global_index = self._build_global_index(self._index, global_index_nlist)
 
     def _compute_hue_hist(self, bgr: np.ndarray) -> np.ndarray | None:
+        if bgr.ndim == 2:
+            # Grayscale frames (raw ingest) carry no hue; score on ORB alone.
+            return None
         hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
         mask = cv2.inRange(
             hsv,
@@ -164,10 +368,14 @@ class ProductMatcher:
 
         for sku_dir in sorted(p for p in reference_images_dir.iterdir() if p.is_dir()):
             sku = sku_dir.name
+            if shard_for_sku(sku, self._shard_count) != self._shard_index:
+                continue
             label = sku_to_label.get(sku, sku)
 
             descriptors: list[np.ndarray] = []
             hue_hists: list[np.ndarray] = []
+            global_descs: list[np.ndarray] = []
+            low_descriptors: list[np.ndarray] = []
             for image_path in sorted(p for p in sku_dir.iterdir() if p.is_file()):
                 if image_path.suffix.lower() not in _ALLOWED_IMAGE_EXTS:
                     continue
@@ -175,13 +383,16 @@ class ProductMatcher:
                     image_bytes = image_path.read_bytes()
                 except Exception:
                     logger.warning("Could not read reference image: %s", image_path)
+                    self._skip(sku, image_path, "unreadable")
                     continue
 
                 bgr = _decode_image_bytes_to_bgr(image_bytes)
                 if bgr is None:
                     logger.warning("Could not decode reference image: %s", image_path)
+                    self._skip(sku, image_path, "undecodable")
                     continue
 
+                original = bgr
                 bgr = _resize_max_side(bgr, self._max_query_side_px)
                 bgr = _center_crop(bgr, self._center_crop_frac)
 
@@ -189,11 +400,28 @@ class ProductMatcher:
                 _, desc = orb.detectAndCompute(gray, None)
                 if desc is not None and len(desc) >= self._min_ref_descriptors:
                     descriptors.append(desc)
+                    if self._cascade_low_side_px > 0:
+                        low = _resize_max_side(original, self._cascade_low_side_px)
+                        low = _center_crop(low, self._center_crop_frac)
+                        _, low_desc = orb.detectAndCompute(_ensure_gray(low), None)
+                        if low_desc is not None and len(low_desc) > 0:
+                            low_descriptors.append(low_desc)
+                else:
+                    # Still used for hue and the global shortlist, but not for ORB.
+                    self._skip(
+                        sku,
+                        image_path,
+                        "few_descriptors",
+                        descriptors=0 if desc is None else len(desc),
+                    )
 
                 hue_hist = self._compute_hue_hist(bgr)
                 if hue_hist is not None:
                     hue_hists.append(hue_hist)
 
+                if self._index_global_descriptors:
+                    global_descs.append(compute_global_descriptor(bgr))
+
             if descriptors or hue_hists:
                 indexed.append(
                     _IndexedSku(
@@ -201,13 +429,200 @@ class ProductMatcher:
                         label=label,
                         descriptors=descriptors,
                         hue_hists=hue_hists,
+                        global_descs=global_descs,
+                        low_descriptors=low_descriptors,
                     )
                 )
+            else:
+                self._skip(sku, None, "no_features")
 
         if not indexed:
             logger.warning("No reference images indexed from %s", reference_images_dir)
         return indexed
 
+    def _skip(
+        self, sku: str, image_path: Path | None, reason: str, **details: int
+    ) -> None:
+        self._index_skipped.append(
+            {
+                "sku": sku,
+                "image": (
+                    str(image_path.relative_to(self._reference_images_dir))
+                    if image_path is not None
+                    else None
+                ),
+                "reason": reason,
+                **details,
+            }
+        )
+
+    def _index_fingerprint(self) -> str:
+        # Any change to feature settings or to the reference files invalidates a cache.
+        parts: list = [
+            self._max_query_side_px,
+            self._orb_nfeatures,
+            self._min_ref_descriptors,
+            self._hue_hist_bins,
+            self._hue_sat_min,
+            self._hue_val_min,
+            self._center_crop_frac,
+            self._cascade_low_side_px,
+            self._index_global_descriptors,
+            self._shard_index,
+            self._shard_count,
+            sorted(self._sku_to_label.items()),
+        ]
+        if self._reference_images_dir.is_dir():
+            for path in sorted(self._reference_images_dir.rglob("*")):
+                if path.is_file() and path.suffix.lower() in _ALLOWED_IMAGE_EXTS:
+                    stat = path.stat()
+                    parts.append(
+                        [
+                            str(path.relative_to(self._reference_images_dir)),
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                        ]
+                    )
+        payload = json.dumps(parts, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _load_or_build_index(self) -> list[_IndexedSku]:
+        cache_path = self._index_cache_path
+        if cache_path is None:
+            self._index_source = "built"
+            return self._build_index(self._reference_images_dir, self._sku_to_label)
+
+        fingerprint = self._fingerprint
+        # The cache is a local artifact written by this service, never user input.
+        try:
+            with cache_path.open("rb") as fh:
+                cached = pickle.load(fh)
+            if cached.get("fingerprint") == fingerprint:
+                logger.info("Loaded reference index from cache: %s", cache_path)
+                self._index_source = "cache"
+                # Caches written before skipped files were recorded lack the key.
+                self._index_skipped = cached.get("skipped", [])
+                return cached["index"]
+            logger.info("Reference index cache is stale: %s", cache_path)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.warning("Could not read reference index cache: %s", cache_path)
+
+        self._index_source = "built"
+        index = self._build_index(self._reference_images_dir, self._sku_to_label)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+            with tmp_path.open("wb") as fh:
+                pickle.dump(
+                    {
+                        "fingerprint": fingerprint,
+                        "index": index,
+                        "skipped": self._index_skipped,
+                    },
+                    fh,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            tmp_path.replace(cache_path)
+        except Exception:
+            logger.warning("Could not write reference index cache: %s", cache_path)
+        return index
+
+    @property
+    def index_version(self) -> str:
+        return self._fingerprint[:12]
+
+    def index_counts(self) -> dict[str, int]:
+        return {
+            "skus": len(self._index),
+            "reference_images": sum(len(sku.descriptors) for sku in self._index),
+        }
+
+    def index_nbytes(self) -> int:
+        return self._global_index.nbytes + sum(_sku_nbytes(sku) for sku in self._index)
+
+    def index_stats(self, top: int | None = None) -> dict:
+        """Describe the loaded index: totals, skipped files and per-SKU sizes.
+
+        SKUs are ordered by bytes, largest first, which also approximates their
+        share of ORB matching cost; ``top`` limits how many are listed.
+        """
+        per_sku = sorted(
+            (
+                {
+                    "sku": sku.sku,
+                    "label": sku.label,
+                    "reference_images": len(sku.descriptors),
+                    "orb_descriptors": sum(len(d) for d in sku.descriptors),
+                    "low_descriptors": sum(len(d) for d in sku.low_descriptors),
+                    "hue_hists": len(sku.hue_hists),
+                    "global_descs": len(sku.global_descs),
+                    "nbytes": _sku_nbytes(sku),
+                }
+                for sku in self._index
+            ),
+            key=lambda entry: entry["nbytes"],
+            reverse=True,
+        )
+        skipped_skus = sum(
+            1 for entry in self._index_skipped if entry["reason"] == "no_features"
+        )
+        return {
+            "index_version": self.index_version,
+            "fingerprint": self._fingerprint,
+            "source": self._index_source,
+            "cache_path": (
+                str(self._index_cache_path) if self._index_cache_path else None
+            ),
+            "build_s": self._index_build_s,
+            "min_ref_descriptors": self._min_ref_descriptors,
+            "shard_index": self._shard_index,
+            "shard_count": self._shard_count,
+            "totals": {
+                "catalog_skus": len(self._sku_to_label),
+                "skus": len(self._index),
+                "skipped_skus": skipped_skus,
+                "skipped_images": len(self._index_skipped) - skipped_skus,
+                "reference_images": sum(e["reference_images"] for e in per_sku),
+                "orb_descriptors": sum(e["orb_descriptors"] for e in per_sku),
+                "low_descriptors": sum(e["low_descriptors"] for e in per_sku),
+                "hue_hists": sum(e["hue_hists"] for e in per_sku),
+                "global_descs": sum(e["global_descs"] for e in per_sku),
+                "global_index_nbytes": self._global_index.nbytes,
+                "nbytes": self.index_nbytes(),
+            },
+            "skipped": list(self._index_skipped),
+            "skus": per_sku if top is None else per_sku[: max(0, top)],
+        }
+
+    @staticmethod
+    def _build_global_index(
+        index: list[_IndexedSku], nlist: int
+    ) -> GlobalDescriptorIndex:
+        descriptors: list[np.ndarray] = []
+        owners: list[int] = []
+        for position, sku in enumerate(index):
+            for desc in sku.global_descs:
+                descriptors.append(desc)
+                owners.append(position)
+        return GlobalDescriptorIndex(descriptors, owners, nlist=nlist)
+
+    def _shortlist(
+        self, query: np.ndarray | None, shortlist_size: int
+    ) -> list[_IndexedSku]:
+        shortlist_size = (
+            max(shortlist_size, _MIN_SHORTLIST_SIZE) if shortlist_size > 0 else 0
+        )
+        if query is None or shortlist_size <= 0 or shortlist_size >= len(self._index):
+            return self._index
+        positions = self._global_index.search(
+            query, shortlist_size, nprobe=self._global_index_nprobe
+        )
+        if not positions:
+            return self._index
+        return [self._index[position] for position in positions]
+
     @staticmethod
     def _count_good_unique_matches(
         bf: cv2.BFMatcher, query_desc: np.ndarray, ref_desc: np.ndarray, ratio: float
@@ -234,36 +649,297 @@ class ProductMatcher:
         canonical = _VARIANT_SUFFIX_RE.sub("", label).strip()
         return canonical or label
 
-    def predict(self, bgr: np.ndarray) -> list[dict]:
-        if not self._index:
+    def _has_index(self) -> bool:
+        return bool(self._index)
+
+    def predict(
+        self,
+        bgr: np.ndarray,
+        *,
+        tier: QualityTier | None = None,
+        center_crop: bool = True,
+    ) -> list[dict]:
+        if not self._has_index():
             return []
 
+        if self._cascade_low_side_px <= 0:
+            return self._predict_level(
+                bgr, low_res=False, tier=tier, center_crop=center_crop
+            )
+
+        # Coarse-to-fine: accept the cheap low-resolution answer when it clears every
+        # guardrail, otherwise escalate to the full-resolution pass.
+        started = time.thread_time()
+        predictions = self._predict_level(
+            bgr, low_res=True, tier=tier, center_crop=center_crop
+        )
+        low_cpu_s = time.thread_time() - started
+        if predictions:
+            if self._recording():
+                self._cascade_stats.record(low_cpu_s=low_cpu_s, full_cpu_s=None)
+            return predictions
+
+        started = time.thread_time()
+        predictions = self._predict_level(
+            bgr, low_res=False, tier=tier, center_crop=center_crop
+        )
+        if self._recording():
+            self._cascade_stats.record(
+                low_cpu_s=low_cpu_s, full_cpu_s=time.thread_time() - started
+            )
+        return predictions
+
+    @contextmanager
+    def unrecorded(self):
+        """Keep this thread's queries out of decision, cascade and SKU-cost stats."""
+        self._unrecorded.active = True
+        try:
+            yield
+        finally:
+            self._unrecorded.active = False
+
+    def _recording(self) -> bool:
+        return not getattr(self._unrecorded, "active", False)
+
+    def cascade_stats(self) -> dict:
+        return self._cascade_stats.snapshot(enabled=self._cascade_low_side_px > 0)
+
+    def sku_cost_report(self, top: int | None = None) -> dict:
+        """Rank SKUs by matching cost against how often they win or nearly win.
+
+        ``excess_share`` is a SKU's share of matching time minus its share of
+        wins and runner-ups; the SKUs at the top cost much more than they
+        contribute and are the first candidates for compacting or pruning their
+        references. ``top`` limits how many are listed.
+        """
+        if self._sku_costs is None:
+            return {"enabled": False}
+        decisions, by_sku = self._sku_costs.snapshot()
+        indexed = {sku.sku: sku for sku in self._index}
+        total_s = sum(entry[0] for entry in by_sku.values())
+        total_useful = sum(entry[3] + entry[4] for entry in by_sku.values())
+        rows = []
+        for sku, (seconds, knn_calls, scored, wins, runner_ups) in by_sku.items():
+            cost_share = seconds / total_s if total_s else 0.0
+            useful_share = (wins + runner_ups) / total_useful if total_useful else 0.0
+            reference = indexed.get(sku)
+            rows.append(
+                {
+                    "sku": sku,
+                    "label": self._sku_to_label.get(sku, sku),
+                    "time_ms": seconds * 1000.0,
+                    "knn_calls": knn_calls,
+                    "scored": scored,
+                    "mean_ms_per_scored": seconds * 1000.0 / scored if scored else None,
+                    "wins": wins,
+                    "runner_ups": runner_ups,
+                    "cost_share": cost_share,
+                    "useful_share": useful_share,
+                    "excess_share": cost_share - useful_share,
+                    "reference_images": (
+                        len(reference.descriptors) if reference else None
+                    ),
+                    "orb_descriptors": (
+                        sum(len(d) for d in reference.descriptors)
+                        if reference
+                        else None
+                    ),
+                }
+            )
+        rows.sort(key=lambda row: row["excess_share"], reverse=True)
+        return {
+            "enabled": True,
+            "index_version": self.index_version,
+            "decisions": decisions,
+            "total_time_ms": total_s * 1000.0,
+            "tracked_skus": len(rows),
+            "skus": rows if top is None else rows[: max(0, top)],
+        }
+
+    def _predict_level(
+        self,
+        bgr: np.ndarray,
+        *,
+        low_res: bool,
+        tier: QualityTier | None,
+        center_crop: bool = True,
+    ) -> list[dict]:
+        max_side_px = self._cascade_low_side_px if low_res else self._max_query_side_px
+        orb_nfeatures = self._orb_nfeatures
+        shortlist_size = self._global_shortlist_size
+        if tier is not None:
+            if tier.max_query_side_px > 0:
+                max_side_px = (
+                    min(max_side_px, tier.max_query_side_px)
+                    if max_side_px > 0
+                    else tier.max_query_side_px
+                )
+            orb_nfeatures = max(50, int(orb_nfeatures * tier.orb_nfeatures_scale))
+            if tier.shortlist_size > 0:
+                shortlist_size = (
+                    min(shortlist_size, tier.shortlist_size)
+                    if shortlist_size > 0
+                    else tier.shortlist_size
+                )
+
+        level = "low" if low_res else "full"
+        # Cascade levels get their own Server-Timing entries (orb_detect_low, ...).
+        suffix = "_low" if low_res else ""
+        with stage(f"resize{suffix}", level=level, max_side_px=max_side_px):
+            bgr = _resize_max_side(bgr, max_side_px)
+            if center_crop:
+                bgr = _center_crop(bgr, self._center_crop_frac)
+        query = self._extract_query(
+            bgr,
+            orb_nfeatures=orb_nfeatures,
+            with_global=shortlist_size > 0,
+            suffix=suffix,
+        )
+        with stage(
+            f"match{suffix}", level=level, index_version=self.index_version
+        ) as span:
+            scored = self._score_query(
+                query, low_res=low_res, shortlist_size=shortlist_size
+            )
+            span.set_attribute("vbic.scored_candidates", len(scored))
+        with stage(f"decide{suffix}", level=level) as span:
+            predictions = self._decide(scored, level=level)
+            span.set_attribute("vbic.accepted", bool(predictions))
+        return predictions
+
+    def _extract_query(
+        self,
+        bgr: np.ndarray,
+        *,
+        orb_nfeatures: int,
+        with_global: bool,
+        suffix: str = "",
+    ) -> _QueryFeatures:
+        with stage(f"orb_detect{suffix}", orb_nfeatures=orb_nfeatures) as span:
+            orb = cv2.ORB_create(nfeatures=orb_nfeatures)
+            _, query_desc = orb.detectAndCompute(_ensure_gray(bgr), None)
+            span.set_attribute(
+                "vbic.query_descriptors", 0 if query_desc is None else len(query_desc)
+            )
+        with stage(f"hue_hist{suffix}"):
+            hue_hist = self._compute_hue_hist(bgr)
+        global_desc = None
+        if with_global:
+            with stage(f"global_desc{suffix}"):
+                global_desc = compute_global_descriptor(bgr)
+        return _QueryFeatures(
+            descriptors=query_desc, hue_hist=hue_hist, global_desc=global_desc
+        )
+
+    def raw_scores(self, bgr: np.ndarray, *, center_crop: bool = True) -> list[dict]:
+        """Per-SKU ORB and hue scores for ``bgr`` before ``hue_scale`` and guardrails.
+
+        Scores the full-resolution level over the configured shortlist, exactly
+        as ``predict`` does without a cascade, so thresholds can be tuned offline
+        against cached scores (see ``scripts/sweep_inference_thresholds.py``).
+        """
+        if not self._has_index():
+            return []
         bgr = _resize_max_side(bgr, self._max_query_side_px)
-        bgr = _center_crop(bgr, self._center_crop_frac)
-        gray = _ensure_gray(bgr)
+        if center_crop:
+            bgr = _center_crop(bgr, self._center_crop_frac)
+        query = self._extract_query(
+            bgr,
+            orb_nfeatures=self._orb_nfeatures,
+            with_global=self._global_shortlist_size > 0,
+        )
+        return [
+            {
+                "sku": sku.sku,
+                "label": self._canonical_label(sku.label),
+                "orb": orb_score,
+                "hue": hue_score,
+            }
+            for sku, orb_score, hue_score in self._score_candidates(
+                query, low_res=False, shortlist_size=self._global_shortlist_size
+            )
+        ]
 
-        orb = cv2.ORB_create(nfeatures=self._orb_nfeatures)
-        _, query_desc = orb.detectAndCompute(gray, None)
-        query_hue = self._compute_hue_hist(bgr)
+    @property
+    def raw_score_version(self) -> str:
+        """Changes whenever ``raw_scores`` could change for the same image."""
+        parts = [
+            self._fingerprint,
+            self._orb_ratio_test,
+            self._global_shortlist_size,
+            self._global_index_nprobe,
+            self._global_index_nlist,
+            self._canonicalize_variant_labels,
+        ]
+        payload = json.dumps(parts, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:12]
+
+    def _score_query(
+        self, query: _QueryFeatures, *, low_res: bool, shortlist_size: int
+    ) -> list[_ScoredLabel]:
+        scored: list[_ScoredLabel] = []
+        for sku, orb_score, hue_score in self._score_candidates(
+            query, low_res=low_res, shortlist_size=shortlist_size
+        ):
+            confidence = max(orb_score, self._hue_scale * hue_score)
+            if confidence > 0.0:
+                scored.append(
+                    _ScoredLabel(
+                        label=self._canonical_label(sku.label),
+                        confidence=float(confidence),
+                        orb_confidence=float(orb_score),
+                        hue_confidence=float(hue_score),
+                        sku=sku.sku,
+                    )
+                )
+        return scored
+
+    def _score_candidates(
+        self, query: _QueryFeatures, *, low_res: bool, shortlist_size: int
+    ) -> list[tuple[_IndexedSku, float, float]]:
+        """Best ORB and hue score of every candidate SKU, unthresholded."""
+        query_desc = query.descriptors
+        query_hue = query.hue_hist
 
         bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=False)
         ratio = self._orb_ratio_test
 
-        scored: list[_ScoredLabel] = []
-        for sku in self._index:
+        candidates = self._shortlist(query.global_desc, shortlist_size)
+        span = trace.get_current_span()
+        span.set_attribute("vbic.index_skus", len(self._index))
+        span.set_attribute("vbic.candidates", len(candidates))
+
+        # Per-candidate loops are too hot for spans; time ORB and hue in aggregate.
+        orb_s = 0.0
+        hue_s = 0.0
+        scores: list[tuple[_IndexedSku, float, float]] = []
+        costs: list[tuple[str, float, int]] = []
+        for sku in candidates:
+            ref_descriptors = sku.low_descriptors if low_res else sku.descriptors
             best_orb = 0.0
-            if query_desc is not None and len(query_desc) > 0 and sku.descriptors:
-                for ref_desc in sku.descriptors:
-                    good = self._count_good_unique_matches(bf, query_desc, ref_desc, ratio)
+            knn_calls = 0
+            started = time.perf_counter()
+            if query_desc is not None and len(query_desc) > 0 and ref_descriptors:
+                knn_calls = len(ref_descriptors)
+                for ref_desc in ref_descriptors:
+                    good = self._count_good_unique_matches(
+                        bf, query_desc, ref_desc, ratio
+                    )
                     denom = max(1, min(len(query_desc), len(ref_desc)))
                     confidence = good / denom
                     if confidence > best_orb:
                         best_orb = confidence
 
+            sku_orb_s = time.perf_counter() - started
+            orb_s += sku_orb_s
+
+            started = time.perf_counter()
             hue_score = 0.0
             if query_hue is not None and sku.hue_hists:
                 for ref_hue in sku.hue_hists:
-                    dist = cv2.compareHist(query_hue, ref_hue, cv2.HISTCMP_BHATTACHARYYA)
+                    dist = cv2.compareHist(
+                        query_hue, ref_hue, cv2.HISTCMP_BHATTACHARYYA
+                    )
                     score = 1.0 - float(dist)
                     if score < 0.0:
                         score = 0.0
@@ -271,20 +947,21 @@ class ProductMatcher:
                         score = 1.0
                     if score > hue_score:
                         hue_score = score
+            sku_hue_s = time.perf_counter() - started
+            hue_s += sku_hue_s
+            scores.append((sku, float(best_orb), float(hue_score)))
+            if self._sku_costs is not None:
+                costs.append((sku.sku, sku_orb_s + sku_hue_s, knn_calls))
+        if self._sku_costs is not None and self._recording():
+            self._sku_costs.add_costs(costs)
+        suffix = "_low" if low_res else ""
+        record_stage(f"orb_match{suffix}", orb_s * 1000.0)
+        record_stage(f"hue_score{suffix}", hue_s * 1000.0)
+        return scores
 
-            confidence = max(best_orb, self._hue_scale * hue_score)
-            if confidence > 0.0:
-                scored.append(
-                    _ScoredLabel(
-                        label=self._canonical_label(sku.label),
-                        confidence=float(confidence),
-                        orb_confidence=float(best_orb),
-                        hue_confidence=float(hue_score),
-                    )
-                )
-
+    def _decide(self, scored: list[_ScoredLabel], *, level: str = "full") -> list[dict]:
         if not scored:
-            logger.info("Matcher produced no candidate scores.")
+            self._record_decision("no_candidates", level=level, ranked=[], margin=0.0)
             return []
 
         # Merge duplicate or generated variant labels to reduce ambiguity.
@@ -296,38 +973,22 @@ class ProductMatcher:
 
         ranked = sorted(merged.values(), key=lambda item: item.confidence, reverse=True)
         top = ranked[0]
+        # Unscored SKUs count as 0, so a lone candidate's margin is its confidence
+        # and the ambiguity gate still applies to it.
         margin = (
             top.confidence - ranked[1].confidence if len(ranked) > 1 else top.confidence
         )
-        preview = ", ".join(
-            (
-                f"{item.label}:c={item.confidence:.3f},"
-                f"orb={item.orb_confidence:.3f},hue={item.hue_confidence:.3f}"
-            )
-            for item in ranked[:3]
-        )
-        logger.info("Matcher top candidates: %s | margin=%.4f", preview, margin)
 
         if top.confidence < self._min_confidence:
-            logger.info(
-                "Matcher rejected top candidate by min_confidence: top=%.4f threshold=%.4f",
-                top.confidence,
-                self._min_confidence,
-            )
-            return []
-        if top.orb_confidence < self._min_top_orb_confidence:
-            logger.info(
-                "Matcher rejected top candidate by min_top_orb_confidence: top_orb=%.4f threshold=%.4f",
-                top.orb_confidence,
-                self._min_top_orb_confidence,
-            )
-            return []
-        if len(ranked) > 1 and margin < self._min_score_margin:
-            logger.info(
-                "Matcher rejected top candidate by min_score_margin: margin=%.4f threshold=%.4f",
-                margin,
-                self._min_score_margin,
-            )
+            outcome = "min_confidence"
+        elif top.orb_confidence < self._min_top_orb_confidence:
+            outcome = "min_top_orb_confidence"
+        elif margin < self._min_score_margin:
+            outcome = "min_score_margin"
+        else:
+            outcome = "accepted"
+        self._record_decision(outcome, level=level, ranked=ranked, margin=margin)
+        if outcome != "accepted":
             return []
 
         predictions: list[dict] = []
@@ -339,19 +1000,50 @@ class ProductMatcher:
                     "box": None,
                 }
             )
-        logger.info(
-            "Matcher accepted label=%s confidence=%.4f margin=%.4f",
-            top.label,
-            top.confidence,
-            margin,
-        )
         return predictions
 
+    def _record_decision(
+        self, outcome: str, *, level: str, ranked: list[_ScoredLabel], margin: float
+    ) -> None:
+        if not self._recording():
+            return
+        # A rejected low-resolution pass is followed by the full one, which decides.
+        if self._sku_costs is not None and (outcome == "accepted" or level == "full"):
+            self._sku_costs.add_decision(
+                ranked, accepted=outcome == "accepted", margin=margin
+            )
+        if not self._record_decisions:
+            return
+        _decisions_counter.add(1, {"level": level, "outcome": outcome})
+        decision_log = get_decision_log()
+        # Only sampled decisions pay for building the candidate preview.
+        if not decision_log.sampled(outcome):
+            return
+        decision_log.emit(
+            outcome,
+            # "level" is the record's log severity.
+            cascade_level=level,
+            index_version=self.index_version,
+            margin=round(margin, 4),
+            thresholds={
+                "min_confidence": self._min_confidence,
+                "min_top_orb_confidence": self._min_top_orb_confidence,
+                "min_score_margin": self._min_score_margin,
+            },
+            top=[
+                {
+                    "label": item.label,
+                    "confidence": round(item.confidence, 4),
+                    "orb": round(item.orb_confidence, 4),
+                    "hue": round(item.hue_confidence, 4),
+                }
+                for item in ranked[:3]
+            ],
+        )
+
 
-@lru_cache(maxsize=1)
-def get_product_matcher() -> ProductMatcher:
-    s = get_settings()
-    return ProductMatcher(
+def product_matcher_kwargs(s: Settings) -> dict:
+    return dict(
         catalog_csv_path=s.catalog_csv_path,
         reference_images_dir=s.reference_images_dir,
         max_query_side_px=s.max_query_side_px,
@@ -368,4 +1060,88 @@ def get_product_matcher() -> ProductMatcher:
         min_score_margin=s.min_score_margin,
         canonicalize_variant_labels=s.canonicalize_variant_labels,
         center_crop_frac=s.center_crop_frac,
+        global_shortlist_size=s.global_shortlist_size,
+        global_index_nlist=s.global_index_nlist,
+        global_index_nprobe=s.global_index_nprobe,
+        index_global_descriptors=s.load_adaptive_enabled,
+        cascade_low_side_px=s.cascade_low_side_px,
+        track_sku_costs=s.sku_cost_tracking,
+        sku_cost_runner_up_margin=s.sku_cost_runner_up_margin,
+        index_cache_path=(
+            str(Path(s.index_cache_dir) / "default.pkl") if s.index_cache_dir else None
+        ),
+    )
+
+
+def build_product_matcher(s: Settings, **overrides) -> ProductMatcher:
+    kwargs = product_matcher_kwargs(s)
+    kwargs.update(overrides)
+    return ProductMatcher(**kwargs)
+
+
+def _register_index_gauges(matcher: ProductMatcher) -> None:
+    counts = matcher.index_counts()
+    nbytes = matcher.index_nbytes()
+    attributes = {"index_version": matcher.index_version}
+    _meter.create_observable_gauge(
+        "vbic.inference.index.skus",
+        callbacks=[lambda _options: [metrics.Observation(counts["skus"], attributes)]],
+        description="SKUs in the default reference index.",
+    )
+    _meter.create_observable_gauge(
+        "vbic.inference.index.reference_images",
+        callbacks=[
+            lambda _options: [
+                metrics.Observation(counts["reference_images"], attributes)
+            ]
+        ],
+        description="Reference images in the default reference index.",
     )
+    _meter.create_observable_gauge(
+        "vbic.inference.index.size",
+        callbacks=[lambda _options: [metrics.Observation(nbytes, attributes)]],
+        unit="By",
+        description="Descriptor bytes held by the default reference index.",
+    )
+
+
+def _build_default_matcher() -> ProductMatcher:
+    s = get_settings()
+    if s.shard_mode in ("local", "remote"):
+        from .sharding import build_sharded_matcher
+
+        return build_sharded_matcher(s)
+    if s.shard_mode == "worker":
+        return build_product_matcher(
+            s, shard_index=s.shard_index, shard_count=s.shard_count
+        )
+    return build_product_matcher(s)
+
+
+_default_matcher_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _load_product_matcher() -> ProductMatcher:
+    matcher = _build_default_matcher()
+    # The index is immutable once built, so its size is measured once.
+    _register_index_gauges(matcher)
+    return matcher
+
+
+def get_product_matcher() -> ProductMatcher:
+    # lru_cache alone lets concurrent first callers (warm-up and an early /predict)
+    # each build the index, so the first build is serialized.
+    with _default_matcher_lock:
+        return _load_product_matcher()
+
+
+def product_matcher_loaded() -> bool:
+    """True once the default matcher is built; never starts a build."""
+    return _load_product_matcher.cache_info().currsize > 0
+
+
+# Keeps the lru_cache reset API that tests and scripts use.
+get_product_matcher.cache_clear = (  # type: ignore[attr-defined]
+    _load_product_matcher.cache_clear
+)
@@ -0,0 +1,261 @@
+import cProfile
+import hmac
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Literal
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ProfilerKind = Literal["cprofile", "sampling"]
+
+
+@dataclass(frozen=True)
+class ProfileRequest:
+    kind: ProfilerKind = "cprofile"
+    tracemalloc: bool = False
+
+
+def parse_profile_options(value: str | None) -> ProfileRequest:
+    """Parse a comma-separated option list such as ``sampling,tracemalloc``."""
+    options = {part.strip().lower() for part in (value or "").split(",")}
+    return ProfileRequest(
+        kind="sampling" if "sampling" in options else "cprofile",
+        tracemalloc="tracemalloc" in options,
+    )
+
+
+class _StackSampler:
+    """Sample one thread's Python stack at a fixed interval into collapsed stacks.
+
+    Output is the ``frame;frame;frame count`` format read by flamegraph.pl and
+    speedscope. Only the profiled thread is sampled.
+    """
+
+    def __init__(self, thread_id: int, interval_s: float) -> None:
+        self._thread_id = thread_id
+        self._interval_s = max(0.0001, interval_s)
+        self._stop = threading.Event()
+        self._stacks: Counter[str] = Counter()
+        self._thread = threading.Thread(
+            target=self._run, name="vbic-profile-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_s):
+            frame = sys._current_frames().get(self._thread_id)
+            names: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self._stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.items())
+
+
+class RequestProfiler:
+    """Profile individual /predict calls on demand.
+
+    A request is profiled when it carries the profiling token, or while an
+    admin has armed the profiler for the next N requests. ``cprofile`` writes
+    a ``.pstats`` file; ``sampling`` writes collapsed stacks. With
+    ``tracemalloc`` the largest allocation sites during the call are added to
+    the summary; tracing is process-wide, so concurrent requests show up too.
+    Only the thread that runs the matcher is profiled (basket regions run in
+    their own executor). The newest ``max_entries`` profiles are kept.
+    """
+
+    def __init__(
+        self,
+        *,
+        token: str,
+        root: str | Path,
+        max_entries: int,
+        sample_interval_ms: float,
+    ) -> None:
+        self._token = token
+        self._root = Path(root)
+        self._max_entries = max(1, int(max_entries))
+        self._sample_interval_s = sample_interval_ms / 1000.0
+        self._lock = threading.Lock()
+        self._armed: ProfileRequest | None = None
+        self._armed_remaining = 0
+        self._seq = 0
+        # tracemalloc is process-wide: overlapping profiles share one session,
+        # stopped by the last of them (and only if a profile started it).
+        self._tracemalloc_users = 0
+        self._tracemalloc_owned = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._token)
+
+    def authorized(self, token: str | None) -> bool:
+        return self.enabled and hmac.compare_digest(
+            (token or "").encode(), self._token.encode()
+        )
+
+    def arm(self, count: int, request: ProfileRequest) -> None:
+        with self._lock:
+            self._armed = request if count > 0 else None
+            self._armed_remaining = max(0, count)
+
+    def armed(self) -> dict:
+        with self._lock:
+            return {
+                "remaining": self._armed_remaining,
+                "kind": self._armed.kind if self._armed else None,
+                "tracemalloc": bool(self._armed and self._armed.tracemalloc),
+            }
+
+    def claim(
+        self, token: str | None, request: ProfileRequest
+    ) -> ProfileRequest | None:
+        """Return how to profile this request, or None to run it normally."""
+        if not self.enabled:
+            return None
+        if token is not None:
+            return request if self.authorized(token) else None
+        with self._lock:
+            if self._armed_remaining <= 0:
+                return None
+            self._armed_remaining -= 1
+            return self._armed
+
+    def _start_tracemalloc(self) -> None:
+        with self._lock:
+            if self._tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracemalloc_owned = True
+            self._tracemalloc_users += 1
+
+    def _stop_tracemalloc(self) -> None:
+        with self._lock:
+            self._tracemalloc_users -= 1
+            if self._tracemalloc_users == 0 and self._tracemalloc_owned:
+                tracemalloc.stop()
+                self._tracemalloc_owned = False
+
+    def run(
+        self, request: ProfileRequest, fn: Callable[..., Any], *args
+    ) -> tuple[Any, str]:
+        """Call ``fn(*args)`` under the requested profiler; return (result, id)."""
+        if not request.tracemalloc:
+            return self._run(request, fn, *args)
+        self._start_tracemalloc()
+        try:
+            return self._run(request, fn, *args)
+        finally:
+            self._stop_tracemalloc()
+
+    def _run(
+        self, request: ProfileRequest, fn: Callable[..., Any], *args
+    ) -> tuple[Any, str]:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        profile_id = (
+            f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.getpid()}-{seq:04d}"
+        )
+        self._root.mkdir(parents=True, exist_ok=True)
+
+        before = tracemalloc.take_snapshot() if request.tracemalloc else None
+
+        started = time.perf_counter()
+        if request.kind == "sampling":
+            sampler = _StackSampler(threading.get_ident(), self._sample_interval_s)
+            sampler.start()
+            try:
+                result = fn(*args)
+            finally:
+                sampler.stop()
+            artifact = self._root / f"{profile_id}.collapsed"
+            artifact.write_text(sampler.collapsed(), encoding="utf-8")
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                result = fn(*args)
+            finally:
+                profiler.disable()
+            artifact = self._root / f"{profile_id}.pstats"
+            profiler.dump_stats(artifact)
+        wall_ms = (time.perf_counter() - started) * 1000.0
+
+        summary: dict[str, Any] = {
+            "id": profile_id,
+            "kind": request.kind,
+            "wall_ms": wall_ms,
+            "artifact": artifact.name,
+        }
+        if before is not None:
+            after = tracemalloc.take_snapshot()
+            summary["tracemalloc_top"] = [
+                {
+                    "site": str(stat.traceback),
+                    "size_diff_bytes": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in after.compare_to(before, "lineno")[:20]
+            ]
+        (self._root / f"{profile_id}.json").write_text(
+            json.dumps(summary, indent=2), encoding="utf-8"
+        )
+        logger.info(
+            "Profiled request %s (%s, %.1f ms)", profile_id, request.kind, wall_ms
+        )
+        self._prune()
+        return result, profile_id
+
+    def summaries(self) -> list[dict]:
+        if not self._root.is_dir():
+            return []
+        return [
+            json.loads(path.read_text(encoding="utf-8"))
+            for path in sorted(self._root.glob("*.json"))
+        ]
+
+    def artifact_path(self, profile_id: str, artifact: str) -> Path | None:
+        """Resolve a stored file for ``profile_id``, refusing anything outside root."""
+        path = self._root / f"{profile_id}.{artifact}"
+        if path.parent != self._root or not path.is_file():
+            return None
+        return path
+
+    def _prune(self) -> None:
+        summaries = sorted(self._root.glob("*.json"))
+        for stale in summaries[: max(0, len(summaries) - self._max_entries)]:
+            for path in self._root.glob(f"{stale.stem}.*"):
+                path.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=1)
+def get_request_profiler() -> RequestProfiler:
+    s = get_settings()
+    return RequestProfiler(
+        token=s.profile_token,
+        root=s.profile_dir or Path(tempfile.gettempdir()) / "vbic-profiles",
+        max_entries=s.profile_max_entries,
+        sample_interval_ms=s.profile_sample_interval_ms,
+    )
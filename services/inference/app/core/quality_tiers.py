@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+from opentelemetry import metrics
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    name: str
+    # Multiplier applied to orb_nfeatures for the query.
+    orb_nfeatures_scale: float = 1.0
+    # Upper bound on the query's max side; 0 keeps max_query_side_px.
+    max_query_side_px: int = 0
+    # Forces a global-descriptor shortlist of this size; 0 keeps the configured one.
+    shortlist_size: int = 0
+    allow_fallback: bool = True
+
+
+# Ordered from best quality to cheapest; each tier keeps the savings of the
+# previous one.
+QUALITY_TIERS: tuple[QualityTier, ...] = (
+    QualityTier(name="full"),
+    QualityTier(name="reduced-features", orb_nfeatures_scale=0.5),
+    QualityTier(name="small-query", orb_nfeatures_scale=0.5, max_query_side_px=400),
+    QualityTier(
+        name="shortlist-only",
+        orb_nfeatures_scale=0.5,
+        max_query_side_px=400,
+        shortlist_size=5,
+    ),
+    QualityTier(
+        name="no-fallback",
+        orb_nfeatures_scale=0.5,
+        max_query_side_px=400,
+        shortlist_size=5,
+        allow_fallback=False,
+    ),
+)
+
+
+class LoadGovernor:
+    """Steps through QUALITY_TIERS based on in-flight requests and latency.
+
+    Latency is tracked as an EWMA of completed requests. The governor moves at
+    most one tier per cooldown period and uses hysteresis so it does not flap
+    around the targets.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        target_latency_ms: float,
+        target_in_flight: int,
+        cooldown_s: float,
+        ewma_alpha: float = 0.2,
+    ) -> None:
+        self._enabled = bool(enabled)
+        self._target_latency_ms = float(max(1.0, target_latency_ms))
+        self._target_in_flight = int(max(1, target_in_flight))
+        self._cooldown_s = float(max(0.0, cooldown_s))
+        self._alpha = float(max(0.01, min(1.0, ewma_alpha)))
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latency_ewma_ms = 0.0
+        self._tier_index = 0
+        self._last_change = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def latency_ewma_ms(self) -> float:
+        return self._latency_ewma_ms
+
+    @property
+    def tier_index(self) -> int:
+        return self._tier_index
+
+    @property
+    def tier(self) -> QualityTier:
+        return QUALITY_TIERS[self._tier_index]
+
+    def enter(self) -> QualityTier:
+        with self._lock:
+            self._in_flight += 1
+            self._adjust(time.monotonic())
+            return QUALITY_TIERS[self._tier_index]
+
+    def exit(self, latency_ms: float | None) -> None:
+        """Leave the in-flight set; ``None`` skips the latency sample (rejections)."""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if latency_ms is not None:
+                if self._latency_ewma_ms <= 0.0:
+                    self._latency_ewma_ms = float(latency_ms)
+                else:
+                    self._latency_ewma_ms += self._alpha * (
+                        float(latency_ms) - self._latency_ewma_ms
+                    )
+            self._adjust(time.monotonic())
+
+    def _adjust(self, now: float) -> None:
+        if not self._enabled:
+            return
+        if now - self._last_change < self._cooldown_s:
+            return
+
+        overloaded = (
+            self._in_flight > self._target_in_flight
+            or self._latency_ewma_ms > self._target_latency_ms
+        )
+        relaxed = (
+            self._in_flight <= self._target_in_flight // 2
+            and self._latency_ewma_ms < 0.7 * self._target_latency_ms
+        )
+        previous = self._tier_index
+        if overloaded and self._tier_index < len(QUALITY_TIERS) - 1:
+            self._tier_index += 1
+        elif relaxed and self._tier_index > 0:
+            self._tier_index -= 1
+        if self._tier_index != previous:
+            self._last_change = now
+            logger.warning(
+                "Quality tier changed %s -> %s (in_flight=%d latency_ewma_ms=%.1f)",
+                QUALITY_TIERS[previous].name,
+                QUALITY_TIERS[self._tier_index].name,
+                self._in_flight,
+                self._latency_ewma_ms,
+            )
+
+
+def _register_gauges(governor: LoadGovernor) -> None:
+    meter = metrics.get_meter(__name__)
+    meter.create_observable_gauge(
+        "vbic.inference.quality_tier",
+        callbacks=[lambda _options: [metrics.Observation(governor.tier_index)]],
+        description="Active load-adaptive quality tier (0 = full quality).",
+    )
+    meter.create_observable_gauge(
+        "vbic.inference.latency_ewma",
+        callbacks=[lambda _options: [metrics.Observation(governor.latency_ewma_ms)]],
+        unit="ms",
+        description="EWMA of /predict latency used by the load governor.",
+    )
+
+
+@lru_cache(maxsize=1)
+def get_load_governor() -> LoadGovernor:
+    s = get_settings()
+    governor = LoadGovernor(
+        enabled=s.load_adaptive_enabled,
+        target_latency_ms=s.load_target_latency_ms,
+        target_in_flight=s.load_target_in_flight,
+        cooldown_s=s.load_tier_cooldown_s,
+    )
+    _register_gauges(governor)
+    return governor
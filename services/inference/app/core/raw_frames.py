@@ -0,0 +1,64 @@
+"""Uncompressed 8-bit camera frames for the raw /predict route.
+
+Accepted formats are ``bgr`` (3 interleaved bytes per pixel), ``gray`` (1 byte
+per pixel) and ``nv12`` (a Y plane followed by an interleaved UV plane at half
+resolution; width and height must be even). Every row, UV rows included, is
+``stride`` bytes, of which the first ``width * channels`` are pixels and the
+rest padding. Bytes after the last row are ignored. Non-positive sizes, a
+stride shorter than a row, odd NV12 sizes and short bodies raise
+``RawFrameError``.
+"""
+
+from typing import Literal
+
+import cv2
+import numpy as np
+
+RawFrameFormat = Literal["bgr", "nv12", "gray"]
+
+_CHANNELS = {"bgr": 3, "gray": 1, "nv12": 1}
+
+
+class RawFrameError(ValueError):
+    pass
+
+
+def frame_from_buffer(
+    buffer: bytes,
+    *,
+    fmt: RawFrameFormat,
+    width: int,
+    height: int,
+    stride: int | None = None,
+) -> np.ndarray:
+    """Wrap a raw pixel buffer as an image the matcher accepts, without copying.
+
+    ``stride`` defaults to tightly packed rows. BGR and grayscale frames are
+    returned as read-only views into ``buffer``; NV12 is converted to BGR, which
+    is the only copy.
+    """
+    if width <= 0 or height <= 0:
+        raise RawFrameError("Frame width and height must be positive.")
+    row_bytes = width * _CHANNELS[fmt]
+    stride = row_bytes if stride is None else stride
+    if stride < row_bytes:
+        raise RawFrameError(f"Stride {stride} is smaller than a row ({row_bytes}).")
+    if fmt == "nv12" and (width % 2 or height % 2):
+        raise RawFrameError("NV12 frames need even width and height.")
+
+    rows = height * 3 // 2 if fmt == "nv12" else height
+    expected = stride * rows
+    if len(buffer) < expected:
+        raise RawFrameError(
+            f"Frame body has {len(buffer)} bytes, expected at least {expected}."
+        )
+
+    plane = np.frombuffer(buffer, dtype=np.uint8, count=expected).reshape(rows, stride)
+    if fmt == "gray":
+        return plane[:, :row_bytes]
+    if fmt == "bgr":
+        return plane[:, :row_bytes].reshape(height, width, 3)
+
+    # OpenCV wants the Y and interleaved UV planes as one contiguous image.
+    yuv = plane if stride == row_bytes else np.ascontiguousarray(plane[:, :row_bytes])
+    return cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_NV12)
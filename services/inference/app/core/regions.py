@@ -0,0 +1,147 @@
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from .config import get_settings
+from .product_matcher import ProductMatcher, _resize_max_side
+from .quality_tiers import QualityTier
+from .timing import stage
+
+logger = logging.getLogger(__name__)
+
+# Proposals are computed on a downscaled copy; boxes are mapped back afterwards.
+_PROPOSAL_SIDE_PX = 640
+
+
+def propose_regions(
+    bgr: np.ndarray, *, max_regions: int, min_area_frac: float
+) -> list[tuple[int, int, int, int]]:
+    """Return candidate item boxes ``(x, y, w, h)`` in ``bgr`` pixel coordinates.
+
+    Items on a checkout surface are separated by background, so closed edge
+    contours are a cheap and good-enough proposal source. The largest regions
+    win when there are more than ``max_regions``.
+    """
+    h, w = bgr.shape[:2]
+    small = _resize_max_side(bgr, _PROPOSAL_SIDE_PX)
+    sh, sw = small.shape[:2]
+    scale_x, scale_y = w / sw, h / sh
+
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(gray, 50, 150)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (7, 7))
+    edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel, iterations=2)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    frame_area = float(sw * sh)
+    boxes: list[tuple[int, int, int, int]] = []
+    for contour in contours:
+        x, y, bw, bh = cv2.boundingRect(contour)
+        area = float(bw * bh)
+        # Skip specks and the "whole frame" contour produced by image borders.
+        if area < min_area_frac * frame_area or area > 0.95 * frame_area:
+            continue
+        boxes.append((x, y, bw, bh))
+
+    boxes.sort(key=lambda box: box[2] * box[3], reverse=True)
+    return [
+        (
+            int(round(x * scale_x)),
+            int(round(y * scale_y)),
+            max(1, int(round(bw * scale_x))),
+            max(1, int(round(bh * scale_y))),
+        )
+        for x, y, bw, bh in boxes[: max(1, max_regions)]
+    ]
+
+
+def _iou(a: tuple[int, int, int, int], b: tuple[int, int, int, int]) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def non_max_suppression(
+    boxes: list[tuple[int, int, int, int]], scores: list[float], iou_threshold: float
+) -> list[int]:
+    """Return indices of boxes to keep, highest score first."""
+    order = sorted(range(len(boxes)), key=lambda i: scores[i], reverse=True)
+    keep: list[int] = []
+    for i in order:
+        if all(_iou(boxes[i], boxes[j]) <= iou_threshold for j in keep):
+            keep.append(i)
+    return keep
+
+
+def predict_basket(
+    matcher: ProductMatcher,
+    bgr: np.ndarray,
+    *,
+    executor: ThreadPoolExecutor,
+    max_regions: int,
+    min_area_frac: float,
+    nms_iou: float,
+    tier: QualityTier | None = None,
+) -> list[dict]:
+    """Match every proposed region in parallel and return one labelled box per item."""
+    with stage("regions") as span:
+        regions = propose_regions(
+            bgr, max_regions=max_regions, min_area_frac=min_area_frac
+        )
+        span.set_attribute("vbic.regions", len(regions))
+    if not regions:
+        return []
+
+    def _match(region: tuple[int, int, int, int]) -> list[dict]:
+        x, y, w, h = region
+        # Regions are already tight around an item, so skip the frame centre crop.
+        return matcher.predict(bgr[y : y + h, x : x + w], tier=tier, center_crop=False)
+
+    boxes: list[tuple[int, int, int, int]] = []
+    tops: list[dict] = []
+    # One context copy per task: region stages join this request's span and
+    # Server-Timing entries even though they run on the basket pool.
+    contexts = [contextvars.copy_context() for _ in regions]
+    results = executor.map(
+        lambda ctx, region: ctx.run(_match, region), contexts, regions
+    )
+    for region, predictions in zip(regions, results):
+        if predictions:
+            boxes.append(region)
+            tops.append(predictions[0])
+
+    keep = non_max_suppression(boxes, [top["confidence"] for top in tops], nms_iou)
+    logger.info(
+        "Basket matched %d/%d regions, %d after NMS", len(tops), len(regions), len(keep)
+    )
+    return [
+        {
+            "label": tops[i]["label"],
+            "confidence": float(tops[i]["confidence"]),
+            "box": {
+                "x": boxes[i][0],
+                "y": boxes[i][1],
+                "w": boxes[i][2],
+                "h": boxes[i][3],
+            },
+        }
+        for i in keep
+    ]
+
+
+@lru_cache(maxsize=1)
+def get_basket_executor() -> ThreadPoolExecutor:
+    # OpenCV releases the GIL in detection and matching, so threads scale here.
+    return ThreadPoolExecutor(
+        max_workers=max(1, get_settings().basket_workers),
+        thread_name_prefix="vbic-basket",
+    )
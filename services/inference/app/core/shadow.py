@@ -0,0 +1,267 @@
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from opentelemetry import metrics, trace
+
+from .config import get_settings
+from .product_matcher import ProductMatcher, build_product_matcher
+from .quality_tiers import QualityTier
+
+logger = logging.getLogger(__name__)
+
+_tracer = trace.get_tracer(__name__)
+_meter = metrics.get_meter(__name__)
+_comparisons_counter = _meter.create_counter(
+    "vbic.inference.shadow.comparisons",
+    description="Frames scored by the shadow matcher, by agreement with the primary.",
+)
+_skipped_counter = _meter.create_counter(
+    "vbic.inference.shadow.skipped",
+    description="Sampled frames not shadowed because the shadow queue was full.",
+)
+_cpu_delta_histogram = _meter.create_histogram(
+    "vbic.inference.shadow.cpu_delta",
+    unit="ms",
+    description="Shadow minus primary matcher CPU time per shadowed frame.",
+)
+
+
+def _lower_priority() -> None:
+    # On Linux a thread id renices just that thread; elsewhere this is a no-op.
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+def _top(predictions: list[dict]) -> list[dict]:
+    return [
+        {"label": p["label"], "confidence": round(float(p["confidence"]), 4)}
+        for p in predictions[:3]
+    ]
+
+
+class ShadowEvaluator:
+    """Score a sample of live frames with a candidate matcher, off the request path.
+
+    ``submit`` is called with the primary matcher's answer; with probability
+    ``sample_rate`` the frame is handed to a single, reniced background thread
+    that runs the shadow matcher on it. Nothing waits for the result: frames
+    sampled while ``max_pending`` are already queued are skipped. The shadow
+    matcher is built lazily on that thread, so index building never delays
+    start-up. Predictions agree when their top labels match (both empty also
+    agrees). Latency is compared as per-thread CPU time because the shadow
+    thread's wall time reflects its low priority, not the settings under test;
+    wall times are reported alongside. The newest ``max_samples``
+    disagreements are kept for inspection.
+    """
+
+    def __init__(
+        self,
+        build_matcher: Callable[[], ProductMatcher],
+        *,
+        overrides: dict,
+        sample_rate: float,
+        max_pending: int,
+        max_samples: int,
+    ) -> None:
+        self._build_matcher = build_matcher
+        self._overrides = overrides
+        self._sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self._max_pending = max(1, int(max_pending))
+        self._matcher: ProductMatcher | None = None
+        self._build_error: str | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="vbic-shadow", initializer=_lower_priority
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._skipped = 0
+        self._compared = 0
+        self._agreed = 0
+        self._primary_cpu_ms = 0.0
+        self._shadow_cpu_ms = 0.0
+        self._primary_wall_ms = 0.0
+        self._shadow_wall_ms = 0.0
+        self._disagreements: deque[dict] = deque(maxlen=max(1, int(max_samples)))
+
+    def submit(
+        self,
+        bgr: np.ndarray,
+        *,
+        tier: QualityTier | None,
+        primary: list[dict],
+        primary_wall_ms: float,
+        primary_cpu_ms: float,
+    ) -> bool:
+        """Queue ``bgr`` for shadow scoring if sampled; never blocks."""
+        if self._build_error is not None or random.random() >= self._sample_rate:
+            return False
+        with self._lock:
+            if self._pending >= self._max_pending:
+                self._skipped += 1
+                _skipped_counter.add(1)
+                return False
+            self._pending += 1
+        self._executor.submit(
+            self._evaluate, bgr, tier, primary, primary_wall_ms, primary_cpu_ms
+        )
+        return True
+
+    def _evaluate(
+        self,
+        bgr: np.ndarray,
+        tier: QualityTier | None,
+        primary: list[dict],
+        primary_wall_ms: float,
+        primary_cpu_ms: float,
+    ) -> None:
+        try:
+            if self._matcher is None:
+                try:
+                    self._matcher = self._build_matcher()
+                except Exception as exc:
+                    self._build_error = repr(exc)
+                    logger.exception("Could not build the shadow matcher")
+                    return
+            with _tracer.start_as_current_span("shadow_match"):
+                wall_started = time.perf_counter()
+                cpu_started = time.thread_time()
+                shadow = self._matcher.predict(bgr, tier=tier)
+                shadow_cpu_ms = (time.thread_time() - cpu_started) * 1000.0
+                shadow_wall_ms = (time.perf_counter() - wall_started) * 1000.0
+            self._record(
+                primary,
+                shadow,
+                primary_wall_ms=primary_wall_ms,
+                primary_cpu_ms=primary_cpu_ms,
+                shadow_wall_ms=shadow_wall_ms,
+                shadow_cpu_ms=shadow_cpu_ms,
+            )
+        except Exception:
+            logger.exception("Shadow evaluation failed")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _record(
+        self,
+        primary: list[dict],
+        shadow: list[dict],
+        *,
+        primary_wall_ms: float,
+        primary_cpu_ms: float,
+        shadow_wall_ms: float,
+        shadow_cpu_ms: float,
+    ) -> None:
+        primary_label = primary[0]["label"] if primary else None
+        shadow_label = shadow[0]["label"] if shadow else None
+        agreed = primary_label == shadow_label
+        _comparisons_counter.add(1, {"agreement": "agree" if agreed else "disagree"})
+        _cpu_delta_histogram.record(shadow_cpu_ms - primary_cpu_ms)
+        with self._lock:
+            self._compared += 1
+            self._agreed += int(agreed)
+            self._primary_cpu_ms += primary_cpu_ms
+            self._shadow_cpu_ms += shadow_cpu_ms
+            self._primary_wall_ms += primary_wall_ms
+            self._shadow_wall_ms += shadow_wall_ms
+            if not agreed:
+                self._disagreements.append(
+                    {
+                        "at": time.time(),
+                        "primary": _top(primary),
+                        "shadow": _top(shadow),
+                        "primary_cpu_ms": primary_cpu_ms,
+                        "shadow_cpu_ms": shadow_cpu_ms,
+                    }
+                )
+
+    def stats(self) -> dict:
+        with self._lock:
+            compared = self._compared
+
+            def mean(total: float) -> float | None:
+                return total / compared if compared else None
+
+            primary_cpu = mean(self._primary_cpu_ms)
+            shadow_cpu = mean(self._shadow_cpu_ms)
+            return {
+                "enabled": True,
+                "overrides": self._overrides,
+                "sample_rate": self._sample_rate,
+                "index_version": (
+                    self._matcher.index_version if self._matcher is not None else None
+                ),
+                "build_error": self._build_error,
+                "pending": self._pending,
+                "skipped": self._skipped,
+                "compared": compared,
+                "agreed": self._agreed,
+                "agreement_rate": self._agreed / compared if compared else None,
+                "mean_primary_cpu_ms": primary_cpu,
+                "mean_shadow_cpu_ms": shadow_cpu,
+                "mean_cpu_delta_ms": (shadow_cpu - primary_cpu if compared else None),
+                "mean_primary_wall_ms": mean(self._primary_wall_ms),
+                "mean_shadow_wall_ms": mean(self._shadow_wall_ms),
+                "disagreements": list(self._disagreements),
+            }
+
+    def drain(self) -> None:
+        """Wait for queued shadow work (tests and shutdown)."""
+        self._executor.submit(lambda: None).result()
+
+
+def parse_matcher_overrides(raw: str) -> dict:
+    overrides = json.loads(raw) if raw.strip() else {}
+    if not isinstance(overrides, dict):
+        raise ValueError("Shadow matcher overrides must be a JSON object.")
+    known = inspect.signature(ProductMatcher).parameters
+    unknown = sorted(set(overrides) - set(known))
+    if unknown:
+        raise ValueError(f"Unknown shadow matcher settings: {', '.join(unknown)}.")
+    return overrides
+
+
+@lru_cache(maxsize=1)
+def get_shadow_evaluator() -> ShadowEvaluator | None:
+    s = get_settings()
+    if s.shadow_sample_rate <= 0:
+        return None
+    try:
+        overrides = parse_matcher_overrides(s.shadow_matcher_overrides)
+    except ValueError as exc:
+        # Cached like a disabled shadow, so /predict never sees the error.
+        logger.error(
+            "Shadow matching disabled, bad VBIC_SHADOW_MATCHER_OVERRIDES: %s", exc
+        )
+        return None
+    if not overrides:
+        return None
+
+    def build() -> ProductMatcher:
+        # A separate cache file so the primary's cached index is never overwritten.
+        cache_path = (
+            str(Path(s.index_cache_dir) / "shadow.pkl") if s.index_cache_dir else None
+        )
+        kwargs = {"index_cache_path": cache_path, "track_sku_costs": False, **overrides}
+        return build_product_matcher(s, record_decisions=False, **kwargs)
+
+    return ShadowEvaluator(
+        build,
+        overrides=overrides,
+        sample_rate=s.shadow_sample_rate,
+        max_pending=s.shadow_max_pending,
+        max_samples=s.shadow_disagreement_samples,
+    )
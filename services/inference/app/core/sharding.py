@@ -0,0 +1,210 @@
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol, Sequence
+
+import numpy as np
+
+from .config import Settings
+from .product_matcher import (
+    ProductMatcher,
+    _QueryFeatures,
+    _ScoredLabel,
+    product_matcher_kwargs,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ShardClient(Protocol):
+    name: str
+
+    def score(
+        self, query: _QueryFeatures, *, low_res: bool, shortlist_size: int
+    ) -> list[_ScoredLabel]: ...
+
+    def close(self) -> None: ...
+
+
+def encode_query(query: _QueryFeatures) -> bytes:
+    """Serialise query features as an ``.npz`` payload (no pickle on the wire)."""
+    arrays = {
+        name: value
+        for name, value in (
+            ("descriptors", query.descriptors),
+            ("hue_hist", query.hue_hist),
+            ("global_desc", query.global_desc),
+        )
+        if value is not None
+    }
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def decode_query(data: bytes) -> _QueryFeatures:
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        return _QueryFeatures(
+            descriptors=npz["descriptors"] if "descriptors" in npz else None,
+            hue_hist=npz["hue_hist"] if "hue_hist" in npz else None,
+            global_desc=npz["global_desc"] if "global_desc" in npz else None,
+        )
+
+
+# Set once per shard process by _init_shard_process.
+_shard_matcher: ProductMatcher | None = None
+
+
+def _init_shard_process(matcher_kwargs: dict) -> None:
+    global _shard_matcher
+    _shard_matcher = ProductMatcher(**matcher_kwargs)
+
+
+def _score_in_shard_process(
+    query: _QueryFeatures, low_res: bool, shortlist_size: int
+) -> list[_ScoredLabel]:
+    assert _shard_matcher is not None
+    return _shard_matcher._score_query(
+        query, low_res=low_res, shortlist_size=shortlist_size
+    )
+
+
+class LocalProcessShard:
+    """One partition of the index held by a dedicated local worker process."""
+
+    def __init__(self, *, shard_index: int, shard_count: int, matcher_kwargs: dict):
+        self.name = f"local-{shard_index}/{shard_count}"
+        kwargs = dict(matcher_kwargs, shard_index=shard_index, shard_count=shard_count)
+        if kwargs.get("index_cache_path"):
+            cache_path = Path(kwargs["index_cache_path"])
+            shard_suffix = f".shard{shard_index}of{shard_count}{cache_path.suffix}"
+            kwargs["index_cache_path"] = str(
+                cache_path.with_name(cache_path.stem + shard_suffix)
+            )
+        # spawn avoids forking a process that already runs OpenCV/executor threads.
+        self._executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_shard_process,
+            initargs=(kwargs,),
+        )
+
+    def score(
+        self, query: _QueryFeatures, *, low_res: bool, shortlist_size: int
+    ) -> list[_ScoredLabel]:
+        future = self._executor.submit(
+            _score_in_shard_process, query, low_res, shortlist_size
+        )
+        return future.result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class HttpShard:
+    """A partition served by another inference instance in ``shard_mode=worker``."""
+
+    def __init__(
+        self, url: str, *, timeout_s: float, client: "httpx.Client | None" = None
+    ):
+        self.name = url
+        self._url = url
+        if client is None:
+            # Only remote coordinators need an HTTP client; keep httpx off the
+            # import path of every other worker.
+            import httpx
+
+            client = httpx.Client(timeout=timeout_s)
+        self._client = client
+
+    def score(
+        self, query: _QueryFeatures, *, low_res: bool, shortlist_size: int
+    ) -> list[_ScoredLabel]:
+        response = self._client.post(
+            self._url,
+            content=encode_query(query),
+            params={"low_res": low_res, "shortlist_size": shortlist_size},
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        response.raise_for_status()
+        return [_ScoredLabel(**item) for item in response.json()["scored"]]
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class ShardedProductMatcher(ProductMatcher):
+    """Coordinator that scatters query features to shards and gathers candidates.
+
+    Query features are extracted once here; every shard scores only its own
+    SKUs and the merged candidates go through the usual thresholds and margin
+    check, so decisions are global rather than per shard.
+    """
+
+    def __init__(self, *, shards: Sequence[ShardClient], **matcher_kwargs) -> None:
+        self._shards = list(shards)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, len(self._shards)), thread_name_prefix="vbic-shard"
+        )
+        super().__init__(load_index=False, **matcher_kwargs)
+
+    def _has_index(self) -> bool:
+        return bool(self._shards)
+
+    def _score_query(
+        self, query: _QueryFeatures, *, low_res: bool, shortlist_size: int
+    ) -> list[_ScoredLabel]:
+        futures = [
+            self._pool.submit(
+                shard.score, query, low_res=low_res, shortlist_size=shortlist_size
+            )
+            for shard in self._shards
+        ]
+        scored: list[_ScoredLabel] = []
+        failed = False
+        for shard, future in zip(self._shards, futures):
+            try:
+                scored.extend(future.result())
+            except Exception:
+                logger.exception("Shard %s failed to score query.", shard.name)
+                failed = True
+        # A missing shard could hide the true best match and turn a close call into
+        # a confident wrong answer, so fail closed.
+        return [] if failed else scored
+
+    def index_stats(self, top: int | None = None) -> dict:
+        # The coordinator holds no references; each shard builds its own index.
+        return {
+            **super().index_stats(top),
+            "shards": [shard.name for shard in self._shards],
+        }
+
+    def close(self) -> None:
+        for shard in self._shards:
+            shard.close()
+        self._pool.shutdown(wait=False)
+
+
+def build_sharded_matcher(s: Settings) -> ShardedProductMatcher:
+    kwargs = product_matcher_kwargs(s)
+    shards: list[ShardClient]
+    if s.shard_mode == "remote":
+        urls = [url.strip() for url in s.shard_urls.split(",") if url.strip()]
+        shards = [HttpShard(url, timeout_s=s.shard_timeout_s) for url in urls]
+    else:
+        shard_count = max(1, s.shard_count)
+        shards = [
+            LocalProcessShard(
+                shard_index=shard_index,
+                shard_count=shard_count,
+                matcher_kwargs=kwargs,
+            )
+            for shard_index in range(shard_count)
+        ]
+    logger.info("Sharded matcher with %d shard(s): mode=%s", len(shards), s.shard_mode)
+    return ShardedProductMatcher(shards=shards, **kwargs)
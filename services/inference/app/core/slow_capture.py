@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .config import get_settings
+from .index_registry import get_index_registry
+from .product_matcher import product_matcher_kwargs
+
+logger = logging.getLogger(__name__)
+
+FRAME_FILE = "frame.png"
+META_FILE = "meta.json"
+
+
+class SlowRequestCapture:
+    """Bounded on-disk ring buffer of slow /predict inputs.
+
+    Each capture is a directory holding the decoded frame (lossless PNG) and a
+    ``meta.json`` with the latency, stage timings, quality tier, index version
+    and the matcher settings in force, so ``scripts/replay_slow_requests.py``
+    can rerun it in-process. Directories are named so that they sort by
+    capture time; once there are more than ``max_entries`` the oldest are
+    removed. Workers may share the directory.
+    """
+
+    def __init__(self, root: str | Path, *, threshold_ms: float, max_entries: int):
+        self._root = Path(root)
+        self.threshold_ms = float(threshold_ms)
+        self._max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def save(self, frame: np.ndarray, *, latency_ms: float, **details) -> Path | None:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        name = f"{stamp}-{os.getpid()}-{seq:06d}"
+        staging = self._root / f".{name}.tmp"
+        meta = {
+            "captured_at": time.time(),
+            "latency_ms": latency_ms,
+            "threshold_ms": self.threshold_ms,
+            "frame_shape": list(frame.shape),
+            **details,
+        }
+        try:
+            staging.mkdir(parents=True)
+            if not cv2.imwrite(str(staging / FRAME_FILE), frame):
+                raise OSError("could not encode frame")
+            (staging / META_FILE).write_text(
+                json.dumps(meta, indent=2, default=str), encoding="utf-8"
+            )
+            # Publish atomically so a replay never sees a half-written capture.
+            target = staging.rename(self._root / name)
+        except OSError:
+            logger.warning("Could not write slow-request capture %s", name)
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        logger.info("Captured slow request (%.1f ms) to %s", latency_ms, target)
+        self._prune()
+        return target
+
+    def entries(self) -> list[Path]:
+        return list_captures(self._root)
+
+    def _prune(self) -> None:
+        entries = self.entries()
+        for stale in entries[: max(0, len(entries) - self._max_entries)]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+def list_captures(root: str | Path) -> list[Path]:
+    """Return the captures under ``root``, oldest first."""
+    root = Path(root)
+    if (root / META_FILE).is_file():
+        return [root]
+    if not root.is_dir():
+        return []
+    return sorted(
+        path
+        for path in root.iterdir()
+        if path.is_dir()
+        and not path.name.startswith(".")
+        and (path / META_FILE).is_file()
+    )
+
+
+def load_capture(path: str | Path) -> tuple[np.ndarray, dict]:
+    path = Path(path)
+    meta = json.loads((path / META_FILE).read_text(encoding="utf-8"))
+    frame = cv2.imread(str(path / FRAME_FILE), cv2.IMREAD_UNCHANGED)
+    if frame is None:
+        raise ValueError(f"Could not read captured frame in {path}")
+    return frame, meta
+
+
+def capture_details(mode: str, store_id: str | None = None) -> dict:
+    """Settings a replay needs besides the frame: matcher and basket parameters.
+
+    For per-store requests the matcher kwargs are those of the store's index, as
+    built by the index registry, not the default index.
+    """
+    s = get_settings()
+    matcher = product_matcher_kwargs(s)
+    registry = get_index_registry()
+    if store_id and registry is not None:
+        matcher.update(registry.matcher_overrides(store_id))
+    details = {"mode": mode, "store_id": store_id, "matcher": matcher}
+    if mode == "basket":
+        details["basket"] = {
+            "max_regions": s.basket_max_regions,
+            "min_area_frac": s.basket_min_region_frac,
+            "nms_iou": s.basket_nms_iou,
+        }
+    return details
+
+
+@lru_cache(maxsize=1)
+def get_slow_capture() -> SlowRequestCapture | None:
+    s = get_settings()
+    if not s.slow_capture_dir:
+        return None
+    return SlowRequestCapture(
+        s.slow_capture_dir,
+        threshold_ms=s.slow_capture_threshold_ms,
+        max_entries=s.slow_capture_max_entries,
+    )
@@ -0,0 +1,76 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from opentelemetry import trace
+
+_tracer = trace.get_tracer(__name__)
+
+
+class StageTimings:
+    """Per-request stage durations, rendered as a ``Server-Timing`` header.
+
+    Stages that run more than once in a request (basket regions, cascade
+    levels) accumulate, so the header shows where the time went in total.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._durations_ms: dict[str, float] = {}
+
+    def add(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            self._durations_ms[name] = self._durations_ms.get(name, 0.0) + duration_ms
+
+    def as_dict(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._durations_ms)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000.0
+
+    def server_timing(self) -> str:
+        """Render every stage plus ``total`` (time since the timings started)."""
+        durations = self.as_dict()
+        durations["total"] = self.elapsed_ms()
+        return ", ".join(
+            f"{name};dur={duration_ms:.2f}" for name, duration_ms in durations.items()
+        )
+
+
+_current: ContextVar[StageTimings | None] = ContextVar(
+    "vbic_stage_timings", default=None
+)
+
+
+def start_request_timings() -> StageTimings:
+    """Start collecting stage timings for the current request context.
+
+    Threadpool work started afterwards (``run_in_threadpool``) runs in a copy of
+    this context and so records into the same object.
+    """
+    timings = StageTimings()
+    _current.set(timings)
+    return timings
+
+
+def record_stage(name: str, duration_ms: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, duration_ms)
+
+
+@contextmanager
+def stage(name: str, **attributes) -> Iterator[trace.Span]:
+    """Time a stage as a child span and as a ``Server-Timing`` entry."""
+    with _tracer.start_as_current_span(f"vbic.{name}") as span:
+        for key, value in attributes.items():
+            span.set_attribute(f"vbic.{key}", value)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            record_stage(name, (time.perf_counter() - started) * 1000.0)
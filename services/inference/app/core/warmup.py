@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from .config import get_settings
+from .product_matcher import get_product_matcher
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """Tracks background start-up so readiness reflects a warm index.
+
+    Status moves ``pending -> warming -> ready`` (or ``failed``). Each phase's
+    wall time is recorded so slow starts can be attributed to index loading or
+    to the warm-up queries.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._created = time.monotonic()
+        self._status = "pending"
+        self._error: str | None = None
+        self._phases: dict[str, float] = {}
+        self._ready_after_s: float | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def status(self) -> str:
+        with self._lock:
+            return self._status
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def start(self, *, enabled: bool, queries: int) -> None:
+        with self._lock:
+            if self._status != "pending":
+                return
+            if not enabled:
+                # Warm-up disabled: keep the old lazy behaviour and report ready.
+                self._status = "ready"
+                self._ready_after_s = time.monotonic() - self._created
+                return
+            self._status = "warming"
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(queries,),
+                name="vbic-warmup",
+                daemon=True,
+            )
+        self._thread.start()
+
+    def wait(self, timeout_s: float | None = None) -> bool:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout_s)
+        return self.ready
+
+    def record_phase(self, name: str, elapsed_s: float) -> None:
+        with self._lock:
+            self._phases[name] = elapsed_s
+        logger.info("Startup phase %s took %.3fs", name, elapsed_s)
+
+    def _run(self, queries: int) -> None:
+        try:
+            started = time.perf_counter()
+            matcher = get_product_matcher()
+            self.record_phase("index_load", time.perf_counter() - started)
+
+            if queries > 0:
+                started = time.perf_counter()
+                side = max(64, get_settings().max_query_side_px)
+                rng = np.random.default_rng(0)
+                # Noise has plenty of ORB keypoints, so every matching path is
+                # exercised.
+                query = rng.integers(0, 256, size=(side, side, 3), dtype=np.uint8)
+                with matcher.unrecorded():
+                    for _ in range(queries):
+                        matcher.predict(query)
+                self.record_phase("warmup_queries", time.perf_counter() - started)
+        except Exception as exc:
+            logger.exception("Inference warm-up failed.")
+            with self._lock:
+                self._status = "failed"
+                self._error = f"{type(exc).__name__}: {exc}"
+            return
+
+        with self._lock:
+            self._status = "ready"
+            self._ready_after_s = time.monotonic() - self._created
+        logger.info("Inference service ready after %.3fs", self._ready_after_s)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "status": self._status,
+                "error": self._error,
+                "phases_s": dict(self._phases),
+                "ready_after_s": self._ready_after_s,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_warmup_state() -> WarmupState:
+    return WarmupState()
@@ -1,11 +1,20 @@
-import os
 import logging
+import os
+import time
+from contextlib import asynccontextmanager
 
+import cv2
 from fastapi import FastAPI
 
-from .core.config import get_settings
+from .core.config import Settings, get_settings
+from .core.warmup import get_warmup_state
 from .instrumentation import setup_telemetry
-from .routers import health, predict
+from .routers import debug, health, predict, shard
+from .startup import process_uptime_s, record_phase
+
+record_phase("imports", process_uptime_s())
+
+logger = logging.getLogger(__name__)
 
 
 def _configure_logging() -> None:
@@ -18,13 +27,47 @@ def _configure_logging() -> None:
     )
 
 
+def _apply_thread_plan(settings: Settings) -> None:
+    if settings.opencv_threads > 0:
+        cv2.setNumThreads(settings.opencv_threads)
+    # executor_threads bounds matching only (see core/matching_pool.py); anyio's
+    # default limiter stays as is so probes never queue behind matching.
+    logger.info(
+        "Worker %d thread plan: executor_threads=%s opencv_threads=%s "
+        "basket_workers=%s",
+        os.getpid(),
+        settings.executor_threads or "default",
+        settings.opencv_threads or "default",
+        settings.basket_workers,
+    )
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    settings = get_settings()
+    _apply_thread_plan(settings)
+    # Index loading runs in the background so the worker can answer probes while
+    # it warms up; /readyz stays 503 until it is done.
+    get_warmup_state().start(
+        enabled=settings.warmup_enabled, queries=settings.warmup_queries
+    )
+    yield
+
+
 def create_app() -> FastAPI:
     _configure_logging()
-    app = FastAPI(title="Inference Service", version="0.1.0")
+    app = FastAPI(title="Inference Service", version="0.1.0", lifespan=_lifespan)
     app.include_router(health.router)
     app.include_router(predict.router)
+    app.include_router(debug.router)
+    app.include_router(shard.router)
     return app
 
 
+_started = time.perf_counter()
 app = create_app()
+record_phase("create_app", time.perf_counter() - _started)
+
+_started = time.perf_counter()
 setup_telemetry(app, service_name=os.getenv("OTEL_SERVICE_NAME", "inference"))
+record_phase("setup_telemetry", time.perf_counter() - _started)
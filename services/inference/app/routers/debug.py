@@ -0,0 +1,126 @@
+import hmac
+import os
+import resource
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from ..core.config import get_settings
+from ..core.index_registry import get_index_registry
+from ..core.product_matcher import (
+    ProductMatcher,
+    get_product_matcher,
+    product_matcher_loaded,
+)
+from ..core.profiling import (
+    RequestProfiler,
+    get_request_profiler,
+    parse_profile_options,
+)
+from ..core.shadow import get_shadow_evaluator
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+def require_debug_token(
+    x_vbic_debug_token: Annotated[str | None, Header()] = None,
+) -> None:
+    expected = get_settings().debug_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Debug endpoints are not enabled.")
+    if not hmac.compare_digest((x_vbic_debug_token or "").encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid debug token.")
+
+
+def _loaded_matcher() -> ProductMatcher:
+    # A debug call must never start a synchronous index build.
+    if not product_matcher_loaded():
+        raise HTTPException(status_code=503, detail="Index is not loaded yet.")
+    return get_product_matcher()
+
+
+@router.get("/cascade", dependencies=[Depends(require_debug_token)])
+def cascade():
+    return _loaded_matcher().cascade_stats()
+
+
+def _process_memory() -> dict:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            rss_bytes = int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        rss_bytes = None
+    # ru_maxrss is in KiB on Linux.
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"rss_bytes": rss_bytes, "peak_rss_bytes": peak_kib * 1024}
+
+
+@router.get("/index", dependencies=[Depends(require_debug_token)])
+def index(top: Annotated[int | None, Query(ge=0)] = 50):
+    """Loaded reference index (``top`` largest SKUs) plus process memory."""
+    return {
+        **_loaded_matcher().index_stats(top),
+        "process": _process_memory(),
+    }
+
+
+@router.get("/sku-costs", dependencies=[Depends(require_debug_token)])
+def sku_costs(top: Annotated[int | None, Query(ge=0)] = 50):
+    """SKUs ranked by matching cost beyond their share of wins and runner-ups."""
+    return _loaded_matcher().sku_cost_report(top)
+
+
+@router.get("/stores", dependencies=[Depends(require_debug_token)])
+def stores():
+    registry = get_index_registry()
+    if registry is None:
+        return {"enabled": False}
+    return {"enabled": True, **registry.stats()}
+
+
+@router.get("/shadow", dependencies=[Depends(require_debug_token)])
+def shadow():
+    evaluator = get_shadow_evaluator()
+    if evaluator is None:
+        return {"enabled": False}
+    return evaluator.stats()
+
+
+def _profiler(token: str | None) -> RequestProfiler:
+    profiler = get_request_profiler()
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is not enabled.")
+    if not profiler.authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token.")
+    return profiler
+
+
+@router.post("/profile")
+def arm_profile(
+    x_vbic_profile: Annotated[str | None, Header()] = None,
+    requests: Annotated[int, Query(ge=0, le=1000)] = 1,
+    options: Annotated[str | None, Query()] = None,
+):
+    """Profile the next ``requests`` /predict calls (0 disarms)."""
+    profiler = _profiler(x_vbic_profile)
+    profiler.arm(requests, parse_profile_options(options))
+    return profiler.armed()
+
+
+@router.get("/profile")
+def list_profiles(x_vbic_profile: Annotated[str | None, Header()] = None):
+    profiler = _profiler(x_vbic_profile)
+    return {"armed": profiler.armed(), "profiles": profiler.summaries()}
+
+
+@router.get("/profile/{profile_id}/{artifact}")
+def profile_artifact(
+    profile_id: str,
+    artifact: Literal["json", "pstats", "collapsed"],
+    x_vbic_profile: Annotated[str | None, Header()] = None,
+):
+    path = _profiler(x_vbic_profile).artifact_path(profile_id, artifact)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}")
+    return FileResponse(path, filename=path.name)
@@ -1,6 +1,9 @@
 import time
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+
+from ..core.warmup import get_warmup_state
+from ..startup import startup_report
 
 router = APIRouter()
 
@@ -11,10 +14,18 @@ def healthz():
 
 
 @router.get("/readyz")
-def readyz():
-    return {"status": "ready"}
+def readyz(response: Response):
+    state = get_warmup_state().snapshot()
+    if state["status"] != "ready":
+        response.status_code = 503
+    return state
 
 
 @router.get("/livez")
 def livez():
     return {"status": "alive", "ts": time.time()}
+
+
+@router.get("/startupz")
+def startupz():
+    return startup_report()
@@ -1,15 +1,65 @@
-from typing import Annotated, List
+import logging
+import time
+from typing import Annotated, List, Literal
 
 import cv2
 import numpy as np
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from opentelemetry import metrics, trace
 from pydantic import BaseModel
+from starlette.datastructures import UploadFile
 
-from ..core.product_matcher import get_product_matcher
+from ..core.admission import AdmissionRejected, get_admission_controller
+from ..core.config import get_settings
+from ..core.index_registry import UnknownStoreError, get_index_registry
+from ..core.ingest import (
+    IngestError,
+    IngestStats,
+    declared_length,
+    read_body,
+    sniff_image_type,
+)
+from ..core.matching_pool import run_matching
 from ..core.openai_fallback import get_openai_fallback_classifier
+from ..core.product_matcher import ProductMatcher, get_product_matcher
+from ..core.profiling import ProfileRequest, get_request_profiler, parse_profile_options
+from ..core.quality_tiers import QualityTier, get_load_governor
+from ..core.raw_frames import RawFrameError, RawFrameFormat, frame_from_buffer
+from ..core.regions import get_basket_executor, predict_basket
+from ..core.shadow import get_shadow_evaluator
+from ..core.slow_capture import capture_details, get_slow_capture
+from ..core.timing import StageTimings, record_stage, stage, start_request_timings
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+QUALITY_TIER_HEADER = "X-VBIC-Quality-Tier"
+INGEST_BYTES_HEADER = "X-VBIC-Ingest-Bytes"
+INGEST_MS_HEADER = "X-VBIC-Ingest-Ms"
+SERVER_TIMING_HEADER = "Server-Timing"
+PROFILE_ID_HEADER = "X-VBIC-Profile-Id"
+
+_MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+_meter = metrics.get_meter(__name__)
+_outcomes_counter = _meter.create_counter(
+    "vbic.inference.predict.outcomes",
+    description="Predict requests by mode and outcome (matched, empty, not_admitted).",
+)
+_fallback_counter = _meter.create_counter(
+    "vbic.inference.fallback.calls",
+    description="OpenAI fallback calls after the matcher found nothing, by outcome.",
+)
+
 
 class Box(BaseModel):
     x: int
@@ -28,17 +78,329 @@ class PredictResponse(BaseModel):
     predictions: List[Prediction]
 
 
-@router.post("/predict", response_model=PredictResponse)
-async def predict(file: Annotated[UploadFile, File()]):
-    contents = await file.read()
-    array = np.frombuffer(contents, dtype=np.uint8)
-    bgr = cv2.imdecode(array, cv2.IMREAD_COLOR)
+def _resolve_matcher(store_id: str | None) -> ProductMatcher:
+    if not store_id:
+        return get_product_matcher()
+    registry = get_index_registry()
+    if registry is None:
+        raise HTTPException(
+            status_code=400, detail="Multi-store serving is not enabled."
+        )
+    try:
+        return registry.get(store_id)
+    except UnknownStoreError:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown store: {store_id}"
+        ) from None
+
+
+def _run_prediction(
+    bgr: np.ndarray, tier: QualityTier, store_id: str | None, mode: str
+) -> tuple[list[dict], str]:
+    """Return the predictions and the version of the index that produced them."""
+    matcher = _resolve_matcher(store_id)
+    span = trace.get_current_span()
+    span.set_attribute("vbic.index_version", matcher.index_version)
+    span.set_attribute("vbic.quality_tier", tier.name)
+    if mode == "basket":
+        s = get_settings()
+        predictions = predict_basket(
+            matcher,
+            bgr,
+            executor=get_basket_executor(),
+            max_regions=s.basket_max_regions,
+            min_area_frac=s.basket_min_region_frac,
+            nms_iou=s.basket_nms_iou,
+            tier=tier,
+        )
+        return predictions, matcher.index_version
+
+    wall_started = time.perf_counter()
+    cpu_started = time.thread_time()
+    predictions = matcher.predict(bgr, tier=tier)
+    shadow = get_shadow_evaluator()
+    if shadow is not None and not store_id:
+        shadow.submit(
+            bgr,
+            tier=tier,
+            primary=predictions,
+            primary_wall_ms=(time.perf_counter() - wall_started) * 1000.0,
+            primary_cpu_ms=(time.thread_time() - cpu_started) * 1000.0,
+        )
+    # The fallback only knows the default catalog's labels, so it is not used for
+    # per-store indexes.
+    if not predictions and tier.allow_fallback and not store_id:
+        with stage("fallback"):
+            fallback = get_openai_fallback_classifier()
+            predictions = fallback.predict(bgr)
+        if fallback.active:
+            outcome = "matched" if predictions else "empty"
+            _fallback_counter.add(1, {"outcome": outcome})
+    return predictions, matcher.index_version
+
+
+def _claim_profile(token: str | None, options: str | None) -> ProfileRequest | None:
+    profiler = get_request_profiler()
+    if token is not None and profiler.enabled and not profiler.authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token.")
+    return profiler.claim(token, parse_profile_options(options))
+
+
+async def _serve(
+    bgr: np.ndarray,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    *,
+    deadline: float | None,
+    session_id: str | None,
+    store_id: str | None,
+    mode: str,
+    ingest: IngestStats,
+    timings: StageTimings,
+    profile: ProfileRequest | None,
+) -> dict:
+    governor = get_load_governor()
+    admission = get_admission_controller()
+    tier = governor.enter()
+    started = time.perf_counter()
+    latency_ms = None
+    try:
+        try:
+            with stage("admission_wait"):
+                await admission.acquire(deadline=deadline, session_id=session_id)
+        except AdmissionRejected as exc:
+            _outcomes_counter.add(
+                1, {"mode": mode, "outcome": "not_admitted", "reason": exc.reason}
+            )
+            raise HTTPException(
+                status_code=exc.status_code,
+                detail=f"Request not admitted: {exc.reason}.",
+                headers={"Retry-After": str(exc.retry_after_s)},
+            ) from None
+
+        service_started = time.perf_counter()
+        try:
+            # Matching is CPU-bound; keep it off the event loop so concurrent requests
+            # queue visibly (and the governor can see them).
+            with stage("predict", mode=mode):
+                if profile is None:
+                    predictions, index_version = await run_matching(
+                        _run_prediction, bgr, tier, store_id, mode
+                    )
+                else:
+                    # The profiler has to start on the worker thread it measures.
+                    (predictions, index_version), profile_id = await run_matching(
+                        get_request_profiler().run,
+                        profile,
+                        _run_prediction,
+                        bgr,
+                        tier,
+                        store_id,
+                        mode,
+                    )
+                    response.headers[PROFILE_ID_HEADER] = profile_id
+        finally:
+            admission.release(time.perf_counter() - service_started)
+        latency_ms = (time.perf_counter() - started) * 1000.0
+    finally:
+        governor.exit(latency_ms)
+
+    _outcomes_counter.add(
+        1, {"mode": mode, "outcome": "matched" if predictions else "empty"}
+    )
+    response.headers[QUALITY_TIER_HEADER] = tier.name
+    response.headers[INGEST_BYTES_HEADER] = str(ingest.nbytes)
+    response.headers[INGEST_MS_HEADER] = f"{ingest.total_ms:.3f}"
+    response.headers[SERVER_TIMING_HEADER] = timings.server_timing()
+
+    capture = get_slow_capture()
+    elapsed_ms = timings.elapsed_ms()
+    if capture is not None and elapsed_ms >= capture.threshold_ms:
+        # Written after the response is sent, off the event loop.
+        background_tasks.add_task(
+            capture.save,
+            bgr,
+            latency_ms=elapsed_ms,
+            stages_ms=timings.as_dict(),
+            quality_tier=tier.name,
+            index_version=index_version,
+            predictions=predictions,
+            **capture_details(mode, store_id),
+        )
+    logger.debug(
+        "Ingested %d bytes in %.3f ms (read=%.3f ms, decode=%.3f ms)",
+        ingest.nbytes,
+        ingest.total_ms,
+        ingest.read_s * 1000.0,
+        ingest.decode_s * 1000.0,
+    )
+    return {"predictions": predictions}
+
+
+def _deadline(arrived: float, deadline_ms: int | None) -> float | None:
+    # The deadline is a relative budget so kiosk and server clocks need not agree.
+    return arrived + deadline_ms / 1000.0 if deadline_ms is not None else None
+
+
+async def _read_upload(request: Request, stats: IngestStats) -> bytes | bytearray:
+    max_bytes = get_settings().max_upload_bytes
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("multipart/form-data"):
+        return await read_body(request, max_bytes=max_bytes, stats=stats)
+
+    # Kept for browser and legacy clients; a plain binary body avoids the spooling.
+    started = time.perf_counter()
+    # The form envelope adds a few hundred bytes on top of the image itself.
+    declared_length(request, max_bytes=max_bytes + _MULTIPART_OVERHEAD_BYTES)
+    form = await request.form()
+    upload = form.get("file")
+    if not isinstance(upload, UploadFile):
+        raise IngestError(400, "Multipart body must contain a 'file' field.")
+    contents = await upload.read()
+    if len(contents) > max_bytes:
+        raise IngestError(413, f"Request body exceeds {max_bytes} bytes.")
+    stats.nbytes = len(contents)
+    stats.read_s = time.perf_counter() - started
+    return contents
+
+
+@router.post(
+    "/predict",
+    response_model=PredictResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "image/jpeg": {"schema": {"type": "string", "format": "binary"}},
+                "image/png": {"schema": {"type": "string", "format": "binary"}},
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"}
+                },
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                },
+            },
+        }
+    },
+)
+async def predict(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    x_vbic_deadline_ms: Annotated[int | None, Header(ge=0)] = None,
+    x_vbic_session_id: Annotated[str | None, Header()] = None,
+    x_vbic_store_id: Annotated[str | None, Header()] = None,
+    x_vbic_profile: Annotated[str | None, Header()] = None,
+    x_vbic_profile_options: Annotated[str | None, Header()] = None,
+    store: Annotated[str | None, Query()] = None,
+    mode: Annotated[Literal["single", "basket"], Query()] = "single",
+):
+    """Match an encoded image sent as the raw body or as a multipart ``file``."""
+    deadline = _deadline(time.monotonic(), x_vbic_deadline_ms)
+    profile = _claim_profile(x_vbic_profile, x_vbic_profile_options)
+    timings = start_request_timings()
+
+    ingest = IngestStats()
+    try:
+        contents = await _read_upload(request, ingest)
+    except IngestError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from None
+    record_stage("read", ingest.read_s * 1000.0)
+    # Sniff before decoding so junk never reaches the image codecs.
+    if sniff_image_type(contents) is None:
+        raise HTTPException(status_code=415, detail="Unsupported image format.")
+
+    decode_started = time.perf_counter()
+    with stage("decode", bytes=len(contents)):
+        array = np.frombuffer(contents, dtype=np.uint8)
+        bgr = cv2.imdecode(array, cv2.IMREAD_COLOR)
+    ingest.decode_s = time.perf_counter() - decode_started
     if bgr is None:
         raise HTTPException(status_code=400, detail="Could not decode uploaded image.")
 
-    matcher = get_product_matcher()
-    predictions = matcher.predict(bgr)
-    if not predictions:
-        fallback = get_openai_fallback_classifier()
-        predictions = fallback.predict(bgr)
-    return {"predictions": predictions}
+    return await _serve(
+        bgr,
+        response,
+        background_tasks,
+        deadline=deadline,
+        session_id=x_vbic_session_id,
+        store_id=x_vbic_store_id or store,
+        mode=mode,
+        ingest=ingest,
+        timings=timings,
+        profile=profile,
+    )
+
+
+@router.post(
+    "/predict/raw",
+    response_model=PredictResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def predict_raw(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    x_vbic_frame_format: Annotated[RawFrameFormat, Header()],
+    x_vbic_frame_width: Annotated[int, Header(gt=0)],
+    x_vbic_frame_height: Annotated[int, Header(gt=0)],
+    x_vbic_frame_stride: Annotated[int | None, Header(gt=0)] = None,
+    x_vbic_deadline_ms: Annotated[int | None, Header(ge=0)] = None,
+    x_vbic_session_id: Annotated[str | None, Header()] = None,
+    x_vbic_store_id: Annotated[str | None, Header()] = None,
+    x_vbic_profile: Annotated[str | None, Header()] = None,
+    x_vbic_profile_options: Annotated[str | None, Header()] = None,
+    store: Annotated[str | None, Query()] = None,
+    mode: Annotated[Literal["single", "basket"], Query()] = "single",
+):
+    """Match an uncompressed camera frame sent as ``application/octet-stream``.
+
+    Skips the kiosk-side JPEG encode, multipart parsing and ``cv2.imdecode``;
+    the body is wrapped in place and handed straight to the matcher.
+    """
+    deadline = _deadline(time.monotonic(), x_vbic_deadline_ms)
+    profile = _claim_profile(x_vbic_profile, x_vbic_profile_options)
+    timings = start_request_timings()
+
+    ingest = IngestStats()
+    try:
+        body = await read_body(
+            request, max_bytes=get_settings().max_upload_bytes, stats=ingest
+        )
+        record_stage("read", ingest.read_s * 1000.0)
+        decode_started = time.perf_counter()
+        with stage("decode", bytes=len(body), frame_format=x_vbic_frame_format):
+            bgr = frame_from_buffer(
+                body,
+                fmt=x_vbic_frame_format,
+                width=x_vbic_frame_width,
+                height=x_vbic_frame_height,
+                stride=x_vbic_frame_stride,
+            )
+        ingest.decode_s = time.perf_counter() - decode_started
+    except IngestError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from None
+    except RawFrameError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from None
+
+    return await _serve(
+        bgr,
+        response,
+        background_tasks,
+        deadline=deadline,
+        session_id=x_vbic_session_id,
+        store_id=x_vbic_store_id or store,
+        mode=mode,
+        ingest=ingest,
+        timings=timings,
+        profile=profile,
+    )
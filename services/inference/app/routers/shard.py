@@ -0,0 +1,42 @@
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from ..core.config import get_settings
+from ..core.matching_pool import run_matching
+from ..core.product_matcher import get_product_matcher
+from ..core.sharding import decode_query
+
+router = APIRouter(prefix="/shard", tags=["shard"])
+
+
+@router.post("/score")
+async def score(
+    request: Request,
+    low_res: Annotated[bool, Query()] = False,
+    shortlist_size: Annotated[int, Query(ge=0)] = 0,
+):
+    if get_settings().shard_mode != "worker":
+        raise HTTPException(status_code=404, detail="Not a shard worker.")
+
+    try:
+        query = decode_query(await request.body())
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid query features.") from None
+
+    matcher = get_product_matcher()
+    scored = await run_matching(
+        matcher._score_query, query, low_res=low_res, shortlist_size=shortlist_size
+    )
+    return {
+        "scored": [
+            {
+                "label": item.label,
+                "sku": item.sku,
+                "confidence": item.confidence,
+                "orb_confidence": item.orb_confidence,
+                "hue_confidence": item.hue_confidence,
+            }
+            for item in scored
+        ]
+    }
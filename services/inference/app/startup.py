@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+# Heavy dependencies that should only be imported when their feature is enabled.
+_OPTIONAL_MODULES = ("openai", "grpc", "opentelemetry.sdk", "httpx")
+
+_phases: dict[str, float] = {}
+
+
+def process_uptime_s() -> float | None:
+    """Return seconds since this process started (Linux only), or None.
+
+    Called right after ``app.main``'s imports, this covers interpreter start-up
+    and every module import that happened before it.
+    """
+    try:
+        with open("/proc/self/stat", "rb") as fh:
+            # Field 22 is the start time in clock ticks after boot; the command
+            # name (field 2) may contain spaces, so split after its ')'.
+            fields = fh.read().rsplit(b")", 1)[1].split()
+        with open("/proc/uptime", "rb") as fh:
+            uptime_s = float(fh.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    started_s = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    return max(0.0, uptime_s - started_s)
+
+
+def record_phase(name: str, elapsed_s: float | None) -> None:
+    if elapsed_s is not None:
+        _phases[name] = elapsed_s
+
+
+def startup_report() -> dict:
+    return {
+        "phases_s": dict(_phases),
+        "modules_loaded": len(sys.modules),
+        "optional_modules_loaded": [
+            name for name in _OPTIONAL_MODULES if name in sys.modules
+        ],
+        "reported_at": time.time(),
+    }
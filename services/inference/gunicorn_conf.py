@@ -1,10 +1,26 @@
-import multiprocessing
 import os
 
+from app.core.cpu_plan import plan_workers
+
+# Size workers and per-worker threads from the CPUs the container may actually
+# use (cgroup quota, affinity) instead of the host's core count.
+plan = plan_workers()
+
+# Workers inherit the master's environment; explicit settings still win.
+os.environ.setdefault("VBIC_EXECUTOR_THREADS", str(plan.executor_threads))
+os.environ.setdefault("VBIC_OPENCV_THREADS", str(plan.opencv_threads))
+os.environ.setdefault("VBIC_BASKET_WORKERS", str(plan.basket_workers))
+# OpenMP/BLAS pools would otherwise size themselves from the host core count.
+os.environ.setdefault("OMP_NUM_THREADS", str(plan.opencv_threads))
+
 bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8080")
-workers = (multiprocessing.cpu_count() * 2) + 1
+workers = plan.workers
 worker_class = "uvicorn.workers.UvicornWorker"
-threads = 2
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
 accesslog = "-"
 errorlog = "-"
 loglevel = "info"
+
+
+def when_ready(server):
+    server.log.info("Inference worker plan: %s", plan.describe())
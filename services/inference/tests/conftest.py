@@ -1,5 +1,29 @@
 import os
 
+import cv2
+import numpy as np
+
 # Avoid OTLP exporter retries keeping `pytest` alive when no collector is running.
 os.environ.setdefault("OTEL_SDK_DISABLED", "true")
 
+
+def encode_jpeg(image: np.ndarray) -> bytes:
+    ok, buffer = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+    assert ok
+    return buffer.tobytes()
+
+
+def make_reference_image(text: str) -> np.ndarray:
+    image = np.full((480, 640, 3), 255, dtype=np.uint8)
+    cv2.rectangle(image, (20, 20), (620, 460), (0, 0, 0), 3)
+    cv2.putText(
+        image,
+        text,
+        (60, 280),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        2.5,
+        (0, 0, 0),
+        6,
+        cv2.LINE_AA,
+    )
+    return image
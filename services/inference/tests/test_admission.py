@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+from app.core.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    admission_max_in_flight,
+)
+from app.core.config import Settings
+
+
+def test_queue_full_is_rejected_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1)
+        await controller.acquire(deadline=None, session_id=None)
+        waiter = asyncio.ensure_future(
+            controller.acquire(deadline=None, session_id=None)
+        )
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(deadline=None, session_id=None)
+        assert excinfo.value.status_code == 429
+        assert excinfo.value.retry_after_s >= 1
+
+        controller.release(0.05)
+        await waiter
+        assert controller.active == 1
+        controller.release(0.05)
+        assert controller.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_newer_frame_supersedes_queued_frame_from_same_session():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=4)
+        await controller.acquire(deadline=None, session_id=None)
+        older = asyncio.ensure_future(
+            controller.acquire(deadline=None, session_id="kiosk-1")
+        )
+        await asyncio.sleep(0)
+        newer = asyncio.ensure_future(
+            controller.acquire(deadline=None, session_id="kiosk-1")
+        )
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await older
+        assert excinfo.value.reason == "superseded"
+        assert controller.queued == 1
+
+        controller.release(0.05)
+        await newer
+
+    asyncio.run(scenario())
+
+
+def test_unmeetable_and_expired_deadlines_are_rejected():
+    async def scenario():
+        controller = AdmissionController(
+            max_in_flight=1, max_queue=4, initial_service_time_s=1.0
+        )
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(deadline=time.monotonic() - 1, session_id=None)
+        assert excinfo.value.reason == "deadline_expired"
+
+        await controller.acquire(deadline=None, session_id=None)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(deadline=time.monotonic() + 0.1, session_id=None)
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.reason == "deadline_unmeetable"
+        assert controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_rejected_newer_frame_leaves_queued_frame_in_place():
+    async def scenario():
+        controller = AdmissionController(
+            max_in_flight=1, max_queue=4, initial_service_time_s=1.0
+        )
+        await controller.acquire(deadline=None, session_id=None)
+        older = asyncio.ensure_future(
+            controller.acquire(deadline=None, session_id="kiosk-1")
+        )
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(
+                deadline=time.monotonic() + 0.1, session_id="kiosk-1"
+            )
+        assert excinfo.value.reason == "deadline_unmeetable"
+        assert not older.done()
+        assert controller.queued == 1
+
+        controller.release(0.05)
+        await older
+
+    asyncio.run(scenario())
+
+
+def test_in_flight_limit_is_opt_in_and_follows_executor_threads():
+    assert admission_max_in_flight(Settings()) == 0
+    assert admission_max_in_flight(Settings(VBIC_EXECUTOR_THREADS=2)) == 0
+    enabled = {"VBIC_ADMISSION_ENABLED": True}
+    assert admission_max_in_flight(Settings(**enabled, VBIC_EXECUTOR_THREADS=2)) == 2
+    assert admission_max_in_flight(Settings(**enabled)) == 4
+    assert (
+        admission_max_in_flight(Settings(**enabled, VBIC_ADMISSION_MAX_IN_FLIGHT=0))
+        == 0
+    )
+    assert (
+        admission_max_in_flight(
+            Settings(**enabled, VBIC_EXECUTOR_THREADS=2, VBIC_ADMISSION_MAX_IN_FLIGHT=3)
+        )
+        == 3
+    )
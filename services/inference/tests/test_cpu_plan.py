@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+import anyio.to_thread
+from app import main
+from app.core.config import get_settings
+from app.core.cpu_plan import cgroup_cpu_limit, plan_workers
+from app.core.matching_pool import run_matching
+
+
+def test_cgroup_v2_and_v1_quotas(tmp_path):
+    v2 = tmp_path / "v2"
+    v2.mkdir()
+    (v2 / "cpu.max").write_text("150000 100000\n")
+    assert cgroup_cpu_limit(v2) == 1.5
+
+    (v2 / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpu_limit(v2) is None
+
+    v1 = tmp_path / "v1" / "cpu"
+    v1.mkdir(parents=True)
+    (v1 / "cpu.cfs_quota_us").write_text("200000\n")
+    (v1 / "cpu.cfs_period_us").write_text("100000\n")
+    assert cgroup_cpu_limit(tmp_path / "v1") == 2.0
+
+    assert cgroup_cpu_limit(tmp_path / "missing") is None
+
+
+def test_plan_scales_workers_with_cpus_and_pins_opencv():
+    plan = plan_workers({"VBIC_CPU_LIMIT": "4"})
+    assert (plan.workers, plan.opencv_threads, plan.executor_threads) == (4, 1, 2)
+    # Basket regions get the worker's CPU share, not a fixed pool per worker.
+    assert plan.basket_workers == 1
+    assert plan.cpu_source == "env"
+
+    # A fractional quota never yields more workers than whole CPUs.
+    assert plan_workers({"VBIC_CPU_LIMIT": "0.5"}).workers == 1
+
+
+def test_plan_honours_overrides():
+    plan = plan_workers(
+        {
+            "VBIC_CPU_LIMIT": "8",
+            "GUNICORN_WORKERS": "2",
+            "VBIC_EXECUTOR_THREADS": "3",
+        }
+    )
+    assert plan.workers == 2
+    # Cores not used by workers go to OpenCV and the basket pool.
+    assert plan.opencv_threads == 4
+    assert plan.basket_workers == 4
+    assert plan.executor_threads == 3
+    assert plan_workers({"VBIC_BASKET_WORKERS": "6"}).basket_workers == 6
+
+
+def test_matching_limiter_leaves_default_limiter_alone(monkeypatch):
+    monkeypatch.setenv("VBIC_EXECUTOR_THREADS", "2")
+    get_settings.cache_clear()
+    peak = running = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal peak, running
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    async def scenario():
+        default_tokens = anyio.to_thread.current_default_thread_limiter().total_tokens
+        await asyncio.gather(*(run_matching(work) for _ in range(6)))
+        assert anyio.to_thread.current_default_thread_limiter().total_tokens == (
+            default_tokens
+        )
+
+    try:
+        main._apply_thread_plan(get_settings())
+        asyncio.run(scenario())
+    finally:
+        get_settings.cache_clear()
+    assert peak == 2
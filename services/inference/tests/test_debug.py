@@ -0,0 +1,67 @@
+import pytest
+from app.core.config import get_settings
+from app.core.product_matcher import get_product_matcher, product_matcher_loaded
+from app.main import app
+from fastapi.testclient import TestClient
+
+TOKEN = {"X-VBIC-Debug-Token": "secret"}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("sku,name,price_cents\n1001,Apple,50\n", encoding="utf-8")
+    (tmp_path / "images").mkdir()
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(tmp_path / "images"))
+    monkeypatch.setenv("VBIC_DEBUG_TOKEN", "secret")
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+    yield TestClient(app)
+    get_settings.cache_clear()
+
+
+DEBUG_VIEWS = (
+    "/debug/cascade",
+    "/debug/index",
+    "/debug/sku-costs",
+    "/debug/stores",
+    "/debug/shadow",
+)
+
+
+@pytest.mark.parametrize("path", DEBUG_VIEWS)
+def test_debug_views_are_disabled_without_a_token(client, monkeypatch, path):
+    monkeypatch.delenv("VBIC_DEBUG_TOKEN")
+    get_settings.cache_clear()
+    assert client.get(path, headers=TOKEN).status_code == 404
+
+
+@pytest.mark.parametrize("path", DEBUG_VIEWS)
+def test_debug_views_reject_a_wrong_token(client, path):
+    assert client.get(path).status_code == 403
+    r = client.get(path, headers={"X-VBIC-Debug-Token": "nope"})
+    assert r.status_code == 403
+
+
+def test_matcher_views_need_a_loaded_index(client):
+    # A cold index is reported, not built by the debug call.
+    for path in ("/debug/cascade", "/debug/index", "/debug/sku-costs"):
+        assert client.get(path, headers=TOKEN).status_code == 503
+    assert not product_matcher_loaded()
+
+    get_product_matcher()
+    r = client.get("/debug/cascade", headers=TOKEN)
+    assert r.status_code == 200
+    assert r.json()["enabled"] is False
+    r = client.get("/debug/index?top=1", headers=TOKEN)
+    assert r.status_code == 200
+    assert r.json()["totals"]["skus"] == 0
+    r = client.get("/debug/sku-costs", headers=TOKEN)
+    assert r.json() == {"enabled": False}
+
+
+def test_store_and_shadow_views_with_the_right_token(client):
+    assert client.get("/debug/stores", headers=TOKEN).json() == {"enabled": False}
+    assert client.get("/debug/shadow", headers=TOKEN).json() == {"enabled": False}
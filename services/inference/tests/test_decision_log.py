@@ -0,0 +1,45 @@
+import json
+import logging
+import queue
+
+from app.core.decision_log import DecisionLog, JsonFormatter, _NonBlockingQueueHandler
+
+
+def test_decision_log_samples_and_always_keeps_listed_outcomes():
+    records: queue.Queue = queue.Queue(maxsize=1)
+    logger = logging.getLogger("vbic.decisions.test")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = _NonBlockingQueueHandler(records)
+    logger.addHandler(handler)
+    try:
+        log = DecisionLog(
+            sample_rate=0.0, always=frozenset({"min_score_margin"}), logger=logger
+        )
+        assert not log.sampled("accepted")
+        assert log.sampled("min_score_margin")
+
+        log.emit(
+            "min_score_margin", cascade_level="full", margin=0.01, top=[{"label": "A"}]
+        )
+        # The queue is full: the next record is dropped instead of blocking.
+        log.emit("min_score_margin", cascade_level="full", margin=0.02, top=[])
+        assert records.qsize() == 1
+
+        line = JsonFormatter().format(records.get_nowait())
+        payload = json.loads(line)
+        assert payload["event"] == "match_decision"
+        assert payload["outcome"] == "min_score_margin"
+        assert payload["level"] == "INFO"
+        assert payload["cascade_level"] == "full"
+        assert payload["margin"] == 0.01
+        assert payload["top"] == [{"label": "A"}]
+    finally:
+        logger.removeHandler(handler)
+
+
+def test_decision_log_off_when_logger_disabled():
+    logger = logging.getLogger("vbic.decisions.disabled")
+    logger.setLevel(logging.WARNING)
+    log = DecisionLog(sample_rate=1.0, always=frozenset({"accepted"}), logger=logger)
+    assert not log.sampled("accepted")
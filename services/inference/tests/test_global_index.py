@@ -0,0 +1,48 @@
+import numpy as np
+from app.core.global_index import (
+    GLOBAL_DESCRIPTOR_DIM,
+    GlobalDescriptorIndex,
+    compute_global_descriptor,
+)
+
+
+def _make_swatch(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    image = np.zeros((120, 160, 3), dtype=np.uint8)
+    image[:] = rng.integers(0, 256, size=3, dtype=np.uint8)
+    # Add a seeded stripe pattern so texture differs between swatches too.
+    period = int(rng.integers(4, 20))
+    image[:, ::period] = rng.integers(0, 256, size=3, dtype=np.uint8)
+    return image
+
+
+def test_global_descriptor_is_normalized():
+    desc = compute_global_descriptor(_make_swatch(1))
+    assert desc.shape == (GLOBAL_DESCRIPTOR_DIM,)
+    assert desc.dtype == np.float32
+    assert abs(float(np.linalg.norm(desc)) - 1.0) < 1e-4
+
+
+def test_exact_and_ivf_search_rank_own_sku_first():
+    descriptors = []
+    owners = []
+    for sku_position in range(40):
+        for variant in range(2):
+            descriptors.append(compute_global_descriptor(_make_swatch(sku_position)))
+            owners.append(sku_position)
+
+    exact = GlobalDescriptorIndex(descriptors, owners)
+    ivf = GlobalDescriptorIndex(descriptors, owners, nlist=4)
+    assert len(exact) == 80
+
+    for sku_position in (0, 17, 39):
+        query = compute_global_descriptor(_make_swatch(sku_position))
+        ranked = exact.search(query, k=5)
+        assert ranked[0] == sku_position
+        assert len(ranked) == len(set(ranked)) == 5
+        assert ivf.search(query, k=5, nprobe=4)[0] == sku_position
+
+
+def test_search_on_empty_index_returns_nothing():
+    index = GlobalDescriptorIndex([], [])
+    assert index.search(np.ones(GLOBAL_DESCRIPTOR_DIM, dtype=np.float32), k=3) == []
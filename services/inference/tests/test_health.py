@@ -1,10 +1,97 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from app.core import product_matcher
+from app.core.config import get_settings
+from app.core.product_matcher import get_product_matcher, product_matcher_loaded
+from app.core.warmup import get_warmup_state
 from app.main import app
 from fastapi.testclient import TestClient
 
 
 def test_health_endpoints():
     client = TestClient(app)
-    for path in ("/healthz", "/readyz", "/livez"):
+    for path in ("/healthz", "/livez", "/startupz"):
         r = client.get(path)
         assert r.status_code == 200
         assert isinstance(r.json(), dict)
+
+
+def test_readyz_waits_for_background_warmup(monkeypatch, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("sku,name,price_cents\n1001,Apple,50\n", encoding="utf-8")
+    (tmp_path / "images").mkdir()
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(tmp_path / "images"))
+    monkeypatch.setenv("VBIC_WARMUP_QUERIES", "1")
+
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+    get_warmup_state.cache_clear()
+
+    # Without the lifespan (no startup), nothing has been loaded yet.
+    r = TestClient(app).get("/readyz")
+    assert r.status_code == 503
+    assert r.json()["status"] == "pending"
+
+    with TestClient(app) as client:
+        assert get_warmup_state().wait(timeout_s=30)
+        r = client.get("/readyz")
+        assert r.status_code == 200
+        payload = r.json()
+        assert payload["status"] == "ready"
+        assert set(payload["phases_s"]) >= {"index_load", "warmup_queries"}
+
+    get_warmup_state.cache_clear()
+
+
+def test_concurrent_first_callers_build_the_default_matcher_once(monkeypatch):
+    builds = []
+
+    def slow_build():
+        time.sleep(0.1)
+        builds.append(object())
+        return builds[-1]
+
+    monkeypatch.setattr(product_matcher, "_build_default_matcher", slow_build)
+    monkeypatch.setattr(product_matcher, "_register_index_gauges", lambda _m: None)
+    get_product_matcher.cache_clear()
+    try:
+        assert not product_matcher_loaded()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_product_matcher()))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(builds) == 1
+        assert all(result is builds[0] for result in results)
+        assert product_matcher_loaded()
+    finally:
+        get_product_matcher.cache_clear()
+
+
+def test_optional_dependencies_are_not_imported_at_startup():
+    # A fresh interpreter: the test process may already have imported them.
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('openai', 'grpc', 'httpx') if m in sys.modules))"
+    )
+    env = dict(os.environ, OTEL_SDK_DISABLED="true", VBIC_OPENAI_ENABLED="false")
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,99 @@
+import pytest
+from app.core.config import Settings
+from app.core.index_registry import IndexRegistry, UnknownStoreError
+from app.core.product_matcher import build_product_matcher, product_matcher_kwargs
+from conftest import encode_jpeg, make_reference_image
+
+
+def _make_store(root, store_id: str, products: dict[str, str]) -> None:
+    store_dir = root / store_id
+    rows = ["sku,name,price_cents"]
+    for sku, name in products.items():
+        rows.append(f"{sku},{name},100")
+        sku_dir = store_dir / "images" / sku
+        sku_dir.mkdir(parents=True)
+        image = make_reference_image(name.upper())
+        (sku_dir / "ref.jpg").write_bytes(encode_jpeg(image))
+    (store_dir / "catalog.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+
+def _registry(root, budget_bytes: int, cache_dir=None) -> IndexRegistry:
+    settings = Settings(VBIC_MIN_REF_DESCRIPTORS=0)
+    return IndexRegistry(
+        stores_root_dir=str(root),
+        memory_budget_bytes=budget_bytes,
+        matcher_factory=lambda **overrides: build_product_matcher(
+            settings, **overrides
+        ),
+        index_cache_dir=str(cache_dir) if cache_dir else None,
+    )
+
+
+def test_registry_serves_each_store_from_its_own_catalog(tmp_path):
+    _make_store(tmp_path, "metro", {"1": "Kiwi"})
+    _make_store(tmp_path, "novus", {"1": "Mango"})
+    registry = _registry(tmp_path, budget_bytes=1 << 30)
+
+    kiwi = registry.get("metro").predict(make_reference_image("KIWI"))
+    mango = registry.get("novus").predict(make_reference_image("MANGO"))
+    assert kiwi[0]["label"] == "Kiwi"
+    assert mango[0]["label"] == "Mango"
+
+    registry.get("metro")
+    stats = registry.stats()
+    assert stats["stores"]["metro"] == {
+        **stats["stores"]["metro"],
+        "loads": 1,
+        "hits": 1,
+        "loaded": True,
+    }
+
+
+def test_registry_evicts_least_recently_used_store_over_budget(tmp_path):
+    for store_id in ("a", "b", "c"):
+        _make_store(tmp_path, store_id, {"1": "Lime"})
+    registry = _registry(tmp_path, budget_bytes=1)
+
+    registry.get("a")
+    registry.get("b")
+    assert registry.stats()["loaded"] == ["b"]
+    registry.get("a")
+    stats = registry.stats()
+    assert stats["loaded"] == ["a"]
+    assert stats["stores"]["a"]["loads"] == 2
+    assert stats["stores"]["a"]["evictions"] == 1
+    # Evicted stores drop their load lock too.
+    assert set(registry._load_locks) == {"a"}
+
+
+def test_registry_rejects_unknown_or_unsafe_store_ids(tmp_path):
+    _make_store(tmp_path, "metro", {"1": "Kiwi"})
+    registry = _registry(tmp_path, budget_bytes=1 << 30)
+    for store_id in ("missing", "../metro", ""):
+        with pytest.raises(UnknownStoreError):
+            registry.get(store_id)
+    assert registry._load_locks == {}
+
+
+def test_index_cache_artifact_is_reused(tmp_path):
+    _make_store(tmp_path / "stores", "metro", {"1": "Kiwi"})
+    cache_dir = tmp_path / "cache"
+
+    _registry(tmp_path / "stores", 1 << 30, cache_dir).get("metro")
+    artifact = cache_dir / "stores" / "metro.pkl"
+    assert artifact.exists()
+    mtime = artifact.stat().st_mtime_ns
+
+    matcher = _registry(tmp_path / "stores", 1 << 30, cache_dir).get("metro")
+    assert artifact.stat().st_mtime_ns == mtime
+    assert matcher.predict(make_reference_image("KIWI"))[0]["label"] == "Kiwi"
+
+
+def test_store_named_default_does_not_share_the_default_index_cache(tmp_path):
+    _make_store(tmp_path / "stores", "default", {"1": "Kiwi"})
+    cache_dir = tmp_path / "cache"
+    settings = Settings(VBIC_INDEX_CACHE_DIR=str(cache_dir))
+
+    registry = _registry(tmp_path / "stores", 1 << 30, cache_dir)
+    store_cache = registry.matcher_overrides("default")["index_cache_path"]
+    assert store_cache != product_matcher_kwargs(settings)["index_cache_path"]
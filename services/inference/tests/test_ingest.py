@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from app.core.ingest import IngestError, IngestStats, read_body, sniff_image_type
+from starlette.requests import Request
+
+
+def _request(chunks: list[bytes], content_length: int | None) -> Request:
+    headers = []
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    pending = list(chunks)
+
+    async def receive():
+        body = pending.pop(0) if pending else b""
+        return {"type": "http.request", "body": body, "more_body": bool(pending)}
+
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers}
+    return Request(scope, receive)
+
+
+def test_sniff_image_type():
+    assert sniff_image_type(b"\xff\xd8\xff\xe0rest") == "jpeg"
+    assert sniff_image_type(b"\x89PNG\r\n\x1a\nrest") == "png"
+    assert sniff_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "webp"
+    assert sniff_image_type(b"<html>") is None
+
+
+def test_read_body_fills_preallocated_buffer():
+    stats = IngestStats()
+    body = asyncio.run(
+        read_body(_request([b"abc", b"defg"], 7), max_bytes=100, stats=stats)
+    )
+    assert body == bytearray(b"abcdefg")
+    assert stats.nbytes == 7
+
+
+def test_read_body_rejects_oversized_and_truncated_bodies():
+    with pytest.raises(IngestError) as exc:
+        asyncio.run(
+            read_body(_request([b"x" * 10], 10), max_bytes=5, stats=IngestStats())
+        )
+    assert exc.value.status_code == 413
+
+    # Without a Content-Length the limit is enforced while streaming.
+    with pytest.raises(IngestError) as exc:
+        asyncio.run(
+            read_body(_request([b"x" * 4] * 3, None), max_bytes=10, stats=IngestStats())
+        )
+    assert exc.value.status_code == 413
+
+    with pytest.raises(IngestError) as exc:
+        asyncio.run(
+            read_body(_request([b"abc"], 7), max_bytes=100, stats=IngestStats())
+        )
+    assert exc.value.status_code == 400
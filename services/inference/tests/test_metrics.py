@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+import pytest
+from app.core.config import get_settings
+from app.core.product_matcher import get_product_matcher
+from app.instrumentation import setup_telemetry
+from app.main import create_app
+from fastapi.testclient import TestClient
+from opentelemetry.metrics import _internal as metrics_internal
+from opentelemetry.util._once import Once
+
+
+@pytest.fixture
+def isolated_meter_provider():
+    # setup_telemetry installs a process-wide MeterProvider that the SDK only lets
+    # be set once; put the unset state back so later tests start clean.
+    yield
+    provider = metrics_internal._METER_PROVIDER
+    if provider is not None and hasattr(provider, "shutdown"):
+        provider.shutdown()
+    metrics_internal._METER_PROVIDER = None
+    metrics_internal._METER_PROVIDER_SET_ONCE = Once()
+
+
+def test_metrics_pull_endpoint(monkeypatch, tmp_path, isolated_meter_provider):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("sku,name,price_cents\n1001,Apple,50\n", encoding="utf-8")
+    (tmp_path / "images").mkdir()
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(tmp_path / "images"))
+    monkeypatch.setenv("OTEL_SDK_DISABLED", "false")
+    monkeypatch.setenv("OTEL_TRACES_EXPORTER", "none")
+    monkeypatch.setenv("OTEL_METRICS_EXPORTER", "prometheus")
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+
+    app = create_app()
+    setup_telemetry(app, service_name="inference-test")
+    client = TestClient(app)
+
+    ok, jpeg = cv2.imencode(".jpg", np.full((64, 64, 3), 127, dtype=np.uint8))
+    assert ok
+    r = client.post(
+        "/predict", content=jpeg.tobytes(), headers={"Content-Type": "image/jpeg"}
+    )
+    assert r.status_code == 200
+    assert r.json() == {"predictions": []}
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert "# TYPE http_server_duration_milliseconds histogram" in body
+    assert 'le="+Inf"' in body
+    assert "http_server_active_requests" in body
+    assert (
+        'vbic_inference_predict_outcomes_total{mode="single",outcome="empty"} 1' in body
+    )
+    assert "vbic_inference_index_skus{" in body
+    assert "vbic_inference_index_size_bytes{" in body
@@ -1,34 +1,13 @@
 import io
 
-import cv2
 import numpy as np
-from fastapi.testclient import TestClient
-
+from app.core.admission import get_admission_controller
 from app.core.config import get_settings
+from app.core.index_registry import get_index_registry
 from app.core.product_matcher import get_product_matcher
 from app.main import app
-
-
-def _encode_jpeg(image: np.ndarray) -> bytes:
-    ok, buffer = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
-    assert ok
-    return buffer.tobytes()
-
-
-def _make_reference_image(text: str) -> np.ndarray:
-    image = np.full((480, 640, 3), 255, dtype=np.uint8)
-    cv2.rectangle(image, (20, 20), (620, 460), (0, 0, 0), 3)
-    cv2.putText(
-        image,
-        text,
-        (60, 280),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        2.5,
-        (0, 0, 0),
-        6,
-        cv2.LINE_AA,
-    )
-    return image
+from conftest import encode_jpeg, make_reference_image
+from fastapi.testclient import TestClient
 
 
 def test_predict_matches_reference(monkeypatch, tmp_path):
@@ -45,8 +24,8 @@ def test_predict_matches_reference(monkeypatch, tmp_path):
 
     apple_ref = apple_dir / "ref.jpg"
     banana_ref = banana_dir / "ref.jpg"
-    apple_ref.write_bytes(_encode_jpeg(_make_reference_image("APPLE")))
-    banana_ref.write_bytes(_encode_jpeg(_make_reference_image("BANANA")))
+    apple_ref.write_bytes(encode_jpeg(make_reference_image("APPLE")))
+    banana_ref.write_bytes(encode_jpeg(make_reference_image("BANANA")))
 
     monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
     monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(images))
@@ -66,6 +45,12 @@ def test_predict_matches_reference(monkeypatch, tmp_path):
     assert payload["predictions"]
     assert payload["predictions"][0]["label"] == "Apple"
     assert payload["predictions"][0]["confidence"] > 0.0
+    assert r.headers["X-VBIC-Quality-Tier"] == "full"
+
+    stages = {
+        entry.split(";")[0].strip() for entry in r.headers["Server-Timing"].split(",")
+    }
+    assert {"read", "decode", "orb_detect", "match", "orb_match", "total"} <= stages
 
 
 def test_predict_no_confident_match(monkeypatch, tmp_path):
@@ -77,7 +62,7 @@ def test_predict_no_confident_match(monkeypatch, tmp_path):
     images = tmp_path / "images"
     apple_dir = images / "1001"
     apple_dir.mkdir(parents=True)
-    (apple_dir / "ref.jpg").write_bytes(_encode_jpeg(_make_reference_image("APPLE")))
+    (apple_dir / "ref.jpg").write_bytes(encode_jpeg(make_reference_image("APPLE")))
 
     monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
     monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(images))
@@ -90,7 +75,7 @@ def test_predict_no_confident_match(monkeypatch, tmp_path):
     blank = np.full((480, 640, 3), 255, dtype=np.uint8)
     r = client.post(
         "/predict",
-        files={"file": ("blank.jpg", io.BytesIO(_encode_jpeg(blank)), "image/jpeg")},
+        files={"file": ("blank.jpg", io.BytesIO(encode_jpeg(blank)), "image/jpeg")},
     )
     assert r.status_code == 200
     payload = r.json()
@@ -110,7 +95,7 @@ def test_predict_rejects_ambiguous_top_match_with_margin_gate(monkeypatch, tmp_p
     banana_dir.mkdir(parents=True)
 
     # Use the exact same reference image for two labels so the confidence margin is ~0.
-    shared_reference = _encode_jpeg(_make_reference_image("FRUIT"))
+    shared_reference = encode_jpeg(make_reference_image("FRUIT"))
     (apple_dir / "ref.jpg").write_bytes(shared_reference)
     (banana_dir / "ref.jpg").write_bytes(shared_reference)
 
@@ -132,3 +117,179 @@ def test_predict_rejects_ambiguous_top_match_with_margin_gate(monkeypatch, tmp_p
     assert r.status_code == 200
     payload = r.json()
     assert payload["predictions"] == []
+
+
+def test_predict_with_global_shortlist(monkeypatch, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text(
+        "sku,name,price_cents\n1001,Apple,50\n1002,Banana,30\n", encoding="utf-8"
+    )
+
+    images = tmp_path / "images"
+    apple_dir = images / "1001"
+    banana_dir = images / "1002"
+    apple_dir.mkdir(parents=True)
+    banana_dir.mkdir(parents=True)
+
+    apple_ref = apple_dir / "ref.jpg"
+    apple_ref.write_bytes(encode_jpeg(make_reference_image("APPLE")))
+    (banana_dir / "ref.jpg").write_bytes(encode_jpeg(make_reference_image("BANANA")))
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(images))
+    monkeypatch.setenv("VBIC_MIN_REF_DESCRIPTORS", "0")
+    monkeypatch.setenv("VBIC_GLOBAL_SHORTLIST_SIZE", "1")
+
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+
+    client = TestClient(app)
+    r = client.post(
+        "/predict",
+        files={"file": ("query.jpg", io.BytesIO(apple_ref.read_bytes()), "image/jpeg")},
+    )
+    assert r.status_code == 200
+    payload = r.json()
+    assert payload["predictions"]
+    assert payload["predictions"][0]["label"] == "Apple"
+
+
+def test_predict_rejects_request_past_its_deadline(monkeypatch, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("sku,name,price_cents\n1001,Apple,50\n", encoding="utf-8")
+
+    images = tmp_path / "images"
+    apple_dir = images / "1001"
+    apple_dir.mkdir(parents=True)
+    apple_ref = apple_dir / "ref.jpg"
+    apple_ref.write_bytes(encode_jpeg(make_reference_image("APPLE")))
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(images))
+    monkeypatch.setenv("VBIC_MIN_REF_DESCRIPTORS", "0")
+    monkeypatch.setenv("VBIC_ADMISSION_ENABLED", "true")
+
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+    get_admission_controller.cache_clear()
+
+    client = TestClient(app)
+    r = client.post(
+        "/predict",
+        files={"file": ("query.jpg", io.BytesIO(apple_ref.read_bytes()), "image/jpeg")},
+        headers={"X-VBIC-Deadline-Ms": "0"},
+    )
+    assert r.status_code == 503
+    assert int(r.headers["Retry-After"]) >= 1
+
+    get_admission_controller.cache_clear()
+
+
+def test_predict_routes_to_store_index(monkeypatch, tmp_path):
+    store_dir = tmp_path / "stores" / "metro"
+    kiwi_dir = store_dir / "images" / "2008"
+    kiwi_dir.mkdir(parents=True)
+    (store_dir / "catalog.csv").write_text(
+        "sku,name,price_cents\n2008,Kiwi,40\n", encoding="utf-8"
+    )
+    kiwi_ref = kiwi_dir / "ref.jpg"
+    kiwi_ref.write_bytes(encode_jpeg(make_reference_image("KIWI")))
+
+    monkeypatch.setenv("VBIC_STORES_ROOT_DIR", str(tmp_path / "stores"))
+    monkeypatch.setenv("VBIC_MIN_REF_DESCRIPTORS", "0")
+
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+    get_index_registry.cache_clear()
+
+    client = TestClient(app)
+    files = {"file": ("query.jpg", io.BytesIO(kiwi_ref.read_bytes()), "image/jpeg")}
+    r = client.post("/predict", files=files, headers={"X-VBIC-Store-Id": "metro"})
+    assert r.status_code == 200
+    assert r.json()["predictions"][0]["label"] == "Kiwi"
+
+    files = {"file": ("query.jpg", io.BytesIO(kiwi_ref.read_bytes()), "image/jpeg")}
+    r = client.post("/predict?store=unknown", files=files)
+    assert r.status_code == 404
+
+    get_index_registry.cache_clear()
+
+
+def test_predict_raw_frame_matches_reference(monkeypatch, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text(
+        "sku,name,price_cents\n1001,Apple,50\n1002,Banana,30\n", encoding="utf-8"
+    )
+
+    images = tmp_path / "images"
+    apple_dir = images / "1001"
+    banana_dir = images / "1002"
+    apple_dir.mkdir(parents=True)
+    banana_dir.mkdir(parents=True)
+    (apple_dir / "ref.jpg").write_bytes(encode_jpeg(make_reference_image("APPLE")))
+    (banana_dir / "ref.jpg").write_bytes(encode_jpeg(make_reference_image("BANANA")))
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(images))
+    monkeypatch.setenv("VBIC_MIN_REF_DESCRIPTORS", "0")
+
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+
+    client = TestClient(app)
+    frame = make_reference_image("APPLE")
+    headers = {
+        "Content-Type": "application/octet-stream",
+        "X-VBIC-Frame-Format": "bgr",
+        "X-VBIC-Frame-Width": str(frame.shape[1]),
+        "X-VBIC-Frame-Height": str(frame.shape[0]),
+    }
+    r = client.post("/predict/raw", content=frame.tobytes(), headers=headers)
+    assert r.status_code == 200
+    assert r.json()["predictions"][0]["label"] == "Apple"
+
+    r = client.post("/predict/raw", content=frame.tobytes()[:1000], headers=headers)
+    assert r.status_code == 400
+
+
+def test_predict_accepts_binary_body_and_sniffs_payload(monkeypatch, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("sku,name,price_cents\n1001,Apple,50\n", encoding="utf-8")
+
+    images = tmp_path / "images"
+    apple_dir = images / "1001"
+    apple_dir.mkdir(parents=True)
+    apple_ref = apple_dir / "ref.jpg"
+    apple_ref.write_bytes(encode_jpeg(make_reference_image("APPLE")))
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(images))
+    monkeypatch.setenv("VBIC_MIN_REF_DESCRIPTORS", "0")
+    monkeypatch.setenv("VBIC_MAX_UPLOAD_BYTES", "1000000")
+
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+
+    client = TestClient(app)
+    query_bytes = apple_ref.read_bytes()
+    r = client.post(
+        "/predict", content=query_bytes, headers={"Content-Type": "image/jpeg"}
+    )
+    assert r.status_code == 200
+    assert r.json()["predictions"][0]["label"] == "Apple"
+    assert int(r.headers["X-VBIC-Ingest-Bytes"]) == len(query_bytes)
+    assert float(r.headers["X-VBIC-Ingest-Ms"]) >= 0.0
+
+    r = client.post(
+        "/predict",
+        content=b"<html>not an image</html>",
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert r.status_code == 415
+
+    r = client.post(
+        "/predict",
+        content=b"\xff\xd8\xff" + b"\x00" * 2_000_000,
+        headers={"Content-Type": "image/jpeg"},
+    )
+    assert r.status_code == 413
@@ -0,0 +1,189 @@
+import numpy as np
+from app.core.product_matcher import ProductMatcher, _ScoredLabel
+from app.core.quality_tiers import QUALITY_TIERS
+from conftest import encode_jpeg, make_reference_image
+
+
+def _matcher_kwargs(tmp_path, **overrides) -> dict:
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text(
+        "sku,name,price_cents\n1001,Apple,50\n1002,Banana,30\n", encoding="utf-8"
+    )
+    images = tmp_path / "images"
+    for sku, text in (("1001", "APPLE"), ("1002", "BANANA")):
+        sku_dir = images / sku
+        sku_dir.mkdir(parents=True, exist_ok=True)
+        (sku_dir / "ref.jpg").write_bytes(encode_jpeg(make_reference_image(text)))
+
+    kwargs = dict(
+        catalog_csv_path=str(catalog),
+        reference_images_dir=str(images),
+        max_query_side_px=640,
+        top_k=3,
+        min_confidence=0.15,
+        orb_nfeatures=800,
+        orb_ratio_test=0.8,
+        min_ref_descriptors=0,
+        hue_hist_bins=60,
+        hue_sat_min=50,
+        hue_val_min=50,
+        hue_scale=0.23,
+        min_top_orb_confidence=0.025,
+        min_score_margin=0.03,
+        canonicalize_variant_labels=True,
+        center_crop_frac=0.7,
+    )
+    kwargs.update(overrides)
+    return kwargs
+
+
+def _build_matcher(tmp_path, **overrides) -> ProductMatcher:
+    return ProductMatcher(**_matcher_kwargs(tmp_path, **overrides))
+
+
+def test_cascade_resolves_easy_query_at_low_resolution(tmp_path):
+    matcher = _build_matcher(tmp_path, cascade_low_side_px=320)
+
+    predictions = matcher.predict(make_reference_image("APPLE"))
+    assert predictions and predictions[0]["label"] == "Apple"
+
+    blank = np.full((480, 640, 3), 255, dtype=np.uint8)
+    assert matcher.predict(blank) == []
+
+    stats = matcher.cascade_stats()
+    assert stats["enabled"] is True
+    assert stats["requests"] == 2
+    assert stats["resolved_low"] == 1
+    assert stats["escalated"] == 1
+    assert stats["resolved_low_fraction"] == 0.5
+    assert stats["mean_cpu_saved_ms"] is not None
+
+
+def test_cascade_disabled_when_low_side_not_below_full(tmp_path):
+    matcher = _build_matcher(tmp_path, cascade_low_side_px=640)
+
+    assert matcher.predict(make_reference_image("APPLE"))[0]["label"] == "Apple"
+    stats = matcher.cascade_stats()
+    assert stats["enabled"] is False
+    assert stats["requests"] == 0
+
+
+def test_degraded_quality_tier_still_matches(tmp_path):
+    matcher = _build_matcher(tmp_path)
+    cheapest = QUALITY_TIERS[-1]
+
+    predictions = matcher.predict(make_reference_image("APPLE"), tier=cheapest)
+    assert predictions and predictions[0]["label"] == "Apple"
+
+
+def test_raw_scores_reproduce_predict_confidence(tmp_path):
+    matcher = _build_matcher(tmp_path)
+    query = make_reference_image("APPLE")
+
+    raw = {row["label"]: row for row in matcher.raw_scores(query)}
+    assert set(raw) == {"Apple", "Banana"}
+    assert raw["Apple"]["orb"] > raw["Banana"]["orb"]
+
+    top = matcher.predict(query)[0]
+    apple = raw["Apple"]
+    assert top["confidence"] == max(apple["orb"], 0.23 * apple["hue"])
+    assert (
+        matcher.raw_score_version
+        != _build_matcher(tmp_path, orb_ratio_test=0.7).raw_score_version
+    )
+
+
+def test_index_stats_report_skipped_references_across_cache(tmp_path):
+    images = tmp_path / "images"
+    (images / "1003").mkdir(parents=True)
+    (images / "1003" / "blank.jpg").write_bytes(
+        encode_jpeg(np.full((480, 640, 3), 255, dtype=np.uint8))
+    )
+    (images / "1001").mkdir(parents=True)
+    (images / "1001" / "broken.jpg").write_bytes(b"not a jpeg")
+    kwargs = _matcher_kwargs(tmp_path, index_cache_path=str(tmp_path / "index.pkl"))
+
+    built = ProductMatcher(**kwargs).index_stats(top=1)
+    assert built["source"] == "built"
+    assert built["totals"]["skus"] == 2
+    assert built["totals"]["skipped_skus"] == 1
+    assert len(built["skus"]) == 1
+    assert built["skus"][0]["nbytes"] > 0
+    assert {(e["sku"], e["reason"]) for e in built["skipped"]} == {
+        ("1001", "undecodable"),
+        ("1003", "few_descriptors"),
+        ("1003", "no_features"),
+    }
+
+    cached = ProductMatcher(**kwargs).index_stats()
+    assert cached["source"] == "cache"
+    assert cached["skipped"] == built["skipped"]
+    assert cached["totals"] == built["totals"]
+
+
+def test_sku_cost_report_counts_cost_and_outcomes(tmp_path):
+    assert _build_matcher(tmp_path).sku_cost_report() == {"enabled": False}
+
+    matcher = _build_matcher(tmp_path, track_sku_costs=True)
+    for _ in range(2):
+        assert matcher.predict(make_reference_image("APPLE"))[0]["label"] == "Apple"
+    assert matcher.predict(np.full((480, 640, 3), 255, dtype=np.uint8)) == []
+
+    report = matcher.sku_cost_report()
+    assert report["enabled"] is True
+    assert report["decisions"] == 3
+    rows = {row["sku"]: row for row in report["skus"]}
+    assert set(rows) == {"1001", "1002"}
+    assert rows["1001"]["wins"] == 2
+    assert rows["1002"]["wins"] == 0
+    assert rows["1002"]["scored"] == 3
+    assert rows["1002"]["knn_calls"] == 2
+    assert rows["1002"]["time_ms"] > 0
+    # Banana costs as much as Apple but never wins, so it ranks first.
+    assert report["skus"][0]["sku"] == "1002"
+    assert len(matcher.sku_cost_report(top=1)["skus"]) == 1
+
+
+def test_global_descriptors_only_indexed_when_a_shortlist_can_use_them(tmp_path):
+    assert _build_matcher(tmp_path).index_stats()["totals"]["global_descs"] == 0
+    shortlisted = _build_matcher(tmp_path, global_shortlist_size=1)
+    assert shortlisted.index_stats()["totals"]["global_descs"] == 2
+    tiered = _build_matcher(tmp_path, index_global_descriptors=True)
+    assert tiered.index_stats()["totals"]["global_descs"] == 2
+
+
+def test_unrecorded_queries_leave_stats_untouched(tmp_path):
+    matcher = _build_matcher(tmp_path, cascade_low_side_px=320, track_sku_costs=True)
+
+    with matcher.unrecorded():
+        assert matcher.predict(make_reference_image("APPLE"))[0]["label"] == "Apple"
+    assert matcher.cascade_stats()["requests"] == 0
+    assert matcher.sku_cost_report()["decisions"] == 0
+    assert matcher.sku_cost_report()["skus"] == []
+
+    matcher.predict(make_reference_image("APPLE"))
+    assert matcher.cascade_stats()["requests"] == 1
+    assert matcher.sku_cost_report()["decisions"] == 1
+
+
+def test_shortlist_of_one_keeps_a_runner_up_for_the_margin_gate(tmp_path):
+    kwargs = _matcher_kwargs(tmp_path, global_shortlist_size=1)
+    with open(kwargs["catalog_csv_path"], "a", encoding="utf-8") as fh:
+        fh.write("1003,Cherry,20\n")
+    (tmp_path / "images" / "1003").mkdir()
+    (tmp_path / "images" / "1003" / "ref.jpg").write_bytes(
+        encode_jpeg(make_reference_image("CHERRY"))
+    )
+    matcher = ProductMatcher(**kwargs)
+    assert len(matcher._index) == 3
+
+    query = matcher._index[0].global_descs[0]
+    assert len(matcher._shortlist(query, 1)) == 2
+    assert matcher.predict(make_reference_image("APPLE"))[0]["label"] == "Apple"
+
+    # A lone candidate is still held to the margin, measured against 0.
+    strict = _build_matcher(tmp_path, min_confidence=0.0, min_score_margin=0.5)
+    lone = _ScoredLabel(
+        label="Apple", confidence=0.3, orb_confidence=0.3, hue_confidence=0.0
+    )
+    assert strict._decide([lone]) == []
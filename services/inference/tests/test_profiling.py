@@ -0,0 +1,141 @@
+import pstats
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from app.core.config import get_settings
+from app.core.product_matcher import get_product_matcher
+from app.core.profiling import ProfileRequest, RequestProfiler, get_request_profiler
+from app.main import app
+from fastapi.testclient import TestClient
+
+
+def _busy(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def test_sampling_profile_with_tracemalloc(tmp_path):
+    profiler = RequestProfiler(
+        token="t", root=tmp_path, max_entries=1, sample_interval_ms=0.5
+    )
+    request = ProfileRequest(kind="sampling", tracemalloc=True)
+    profiler.run(request, _busy, 10)
+    result, profile_id = profiler.run(request, _busy, 3_000_000)
+
+    assert result == _busy(3_000_000)
+    # Only the newest profile is kept.
+    (summary,) = profiler.summaries()
+    assert summary["id"] == profile_id
+    assert "tracemalloc_top" in summary
+    collapsed = profiler.artifact_path(profile_id, "collapsed").read_text()
+    assert "test_profiling:_busy" in collapsed
+
+
+def test_profiler_arms_next_requests(tmp_path):
+    profiler = RequestProfiler(
+        token="secret", root=tmp_path, max_entries=5, sample_interval_ms=1.0
+    )
+    assert profiler.claim(None, ProfileRequest()) is None
+    assert profiler.claim("wrong", ProfileRequest()) is None
+
+    armed = ProfileRequest(kind="sampling")
+    profiler.arm(2, armed)
+    assert profiler.claim(None, ProfileRequest()) == armed
+    assert profiler.claim(None, ProfileRequest()) == armed
+    assert profiler.claim(None, ProfileRequest()) is None
+
+    disabled = RequestProfiler(
+        token="", root=tmp_path, max_entries=5, sample_interval_ms=1.0
+    )
+    assert disabled.claim("", ProfileRequest()) is None
+
+
+def test_predict_profiled_on_demand(monkeypatch, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("sku,name,price_cents\n1001,Apple,50\n", encoding="utf-8")
+    (tmp_path / "images").mkdir()
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(tmp_path / "images"))
+    monkeypatch.setenv("VBIC_PROFILE_TOKEN", "secret")
+    monkeypatch.setenv("VBIC_PROFILE_DIR", str(tmp_path / "profiles"))
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+    get_request_profiler.cache_clear()
+    try:
+        client = TestClient(app)
+        ok, jpeg = cv2.imencode(".jpg", np.full((48, 64, 3), 200, dtype=np.uint8))
+        assert ok
+        body = jpeg.tobytes()
+        headers = {"Content-Type": "image/jpeg"}
+
+        r = client.post("/predict", content=body, headers=headers)
+        assert "X-VBIC-Profile-Id" not in r.headers
+        r = client.post(
+            "/predict", content=body, headers={**headers, "X-VBIC-Profile": "nope"}
+        )
+        assert r.status_code == 403
+
+        r = client.post(
+            "/predict", content=body, headers={**headers, "X-VBIC-Profile": "secret"}
+        )
+        assert r.status_code == 200
+        profile_id = r.headers["X-VBIC-Profile-Id"]
+        r = client.get(
+            f"/debug/profile/{profile_id}/pstats",
+            headers={"X-VBIC-Profile": "secret"},
+        )
+        assert r.status_code == 200
+        stats_path = tmp_path / "profiles" / f"{profile_id}.pstats"
+        assert pstats.Stats(str(stats_path)).total_calls > 0
+
+        assert client.post("/debug/profile?requests=1").status_code == 403
+        r = client.post(
+            "/debug/profile?requests=1&options=sampling",
+            headers={"X-VBIC-Profile": "secret"},
+        )
+        assert r.json() == {"remaining": 1, "kind": "sampling", "tracemalloc": False}
+        r = client.post("/predict", content=body, headers=headers)
+        assert "X-VBIC-Profile-Id" in r.headers
+        r = client.post("/predict", content=body, headers=headers)
+        assert "X-VBIC-Profile-Id" not in r.headers
+
+        r = client.get("/debug/profile", headers={"X-VBIC-Profile": "secret"})
+        assert [p["kind"] for p in r.json()["profiles"]] == ["cprofile", "sampling"]
+    finally:
+        get_request_profiler.cache_clear()
+
+
+def test_overlapping_tracemalloc_profiles_share_one_session(tmp_path):
+    profiler = RequestProfiler(
+        token="t", root=tmp_path, max_entries=5, sample_interval_ms=1.0
+    )
+    request = ProfileRequest(tracemalloc=True)
+    second_running = threading.Event()
+    first_done = threading.Event()
+
+    def first():
+        second_running.wait(5)
+        return "first"
+
+    def second():
+        second_running.set()
+        first_done.wait(5)
+        return "second"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first_future = pool.submit(profiler.run, request, first)
+        while not tracemalloc.is_tracing():
+            time.sleep(0.001)
+        second_future = pool.submit(profiler.run, request, second)
+        # The profile that started tracing ends first; the other one must still
+        # be able to take its closing snapshot.
+        assert first_future.result(timeout=5)[0] == "first"
+        assert tracemalloc.is_tracing()
+        first_done.set()
+        assert second_future.result(timeout=5)[0] == "second"
+    assert not tracemalloc.is_tracing()
+    assert all("tracemalloc_top" in summary for summary in profiler.summaries())
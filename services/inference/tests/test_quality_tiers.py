@@ -0,0 +1,47 @@
+from app.core.quality_tiers import QUALITY_TIERS, LoadGovernor
+
+
+def _governor(**overrides) -> LoadGovernor:
+    kwargs = dict(
+        enabled=True,
+        target_latency_ms=100.0,
+        target_in_flight=4,
+        cooldown_s=0.0,
+        ewma_alpha=1.0,
+    )
+    kwargs.update(overrides)
+    return LoadGovernor(**kwargs)
+
+
+def test_governor_steps_down_under_load_and_recovers():
+    governor = _governor()
+    assert governor.enter().name == "full"
+    governor.exit(latency_ms=400.0)
+    assert governor.tier_index == 1
+
+    for _ in range(10):
+        governor.enter()
+        governor.exit(latency_ms=400.0)
+    assert governor.tier is QUALITY_TIERS[-1]
+    assert governor.tier.allow_fallback is False
+
+    for _ in range(10):
+        governor.enter()
+        governor.exit(latency_ms=10.0)
+    assert governor.tier.name == "full"
+
+
+def test_governor_steps_down_on_queue_depth():
+    governor = _governor()
+    for _ in range(5):
+        governor.enter()
+    assert governor.in_flight == 5
+    assert governor.tier_index > 0
+
+
+def test_disabled_governor_stays_at_full_quality():
+    governor = _governor(enabled=False)
+    for _ in range(10):
+        governor.enter()
+        governor.exit(latency_ms=1000.0)
+    assert governor.tier.name == "full"
@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+import pytest
+from app.core.raw_frames import RawFrameError, frame_from_buffer
+
+
+def test_bgr_frame_with_row_padding_is_a_view():
+    image = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    stride = 64 * 3 + 16
+    padded = np.zeros((48, stride), dtype=np.uint8)
+    padded[:, : 64 * 3] = image.reshape(48, -1)
+    buffer = padded.tobytes()
+
+    frame = frame_from_buffer(buffer, fmt="bgr", width=64, height=48, stride=stride)
+    assert frame.shape == (48, 64, 3)
+    assert np.array_equal(frame, image)
+    assert np.shares_memory(frame, np.frombuffer(buffer, dtype=np.uint8))
+
+
+def test_nv12_frame_is_converted_to_bgr():
+    image = np.full((48, 64, 3), (40, 160, 220), dtype=np.uint8)
+    i420 = cv2.cvtColor(image, cv2.COLOR_BGR2YUV_I420)
+    y = i420[:48]
+    u = i420[48:60].reshape(-1)
+    v = i420[60:].reshape(-1)
+    uv = np.stack([u, v], axis=1).reshape(24, 64)
+    nv12 = np.vstack([y, uv]).tobytes()
+
+    frame = frame_from_buffer(nv12, fmt="nv12", width=64, height=48)
+    assert frame.shape == (48, 64, 3)
+    assert np.abs(frame.astype(int) - image.astype(int)).max() <= 4
+
+
+def test_short_buffer_is_rejected():
+    with pytest.raises(RawFrameError):
+        frame_from_buffer(b"\x00" * 100, fmt="gray", width=64, height=48)
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from app.core.config import Settings
+from app.core.product_matcher import build_product_matcher
+from app.core.regions import non_max_suppression, predict_basket, propose_regions
+from conftest import encode_jpeg, make_reference_image
+
+
+def _make_basket_frame() -> np.ndarray:
+    frame = np.full((700, 1500, 3), 255, dtype=np.uint8)
+    frame[100:580, 40:680] = make_reference_image("APPLE")
+    frame[120:600, 800:1440] = make_reference_image("BANANA")
+    return frame
+
+
+def test_non_max_suppression_keeps_best_of_overlapping_boxes():
+    boxes = [(0, 0, 100, 100), (10, 10, 100, 100), (300, 300, 50, 50)]
+    keep = non_max_suppression(boxes, [0.4, 0.9, 0.5], iou_threshold=0.3)
+    assert keep == [1, 2]
+
+
+def test_propose_regions_finds_separate_items():
+    regions = propose_regions(_make_basket_frame(), max_regions=8, min_area_frac=0.02)
+    assert len(regions) >= 2
+    xs = sorted(x for x, _, _, _ in regions[:2])
+    assert xs[0] < 700 <= xs[1]
+
+
+def test_basket_returns_one_box_per_item(tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text(
+        "sku,name,price_cents\n1001,Apple,50\n1002,Banana,30\n", encoding="utf-8"
+    )
+    for sku, text in (("1001", "APPLE"), ("1002", "BANANA")):
+        sku_dir = tmp_path / "images" / sku
+        sku_dir.mkdir(parents=True)
+        (sku_dir / "ref.jpg").write_bytes(encode_jpeg(make_reference_image(text)))
+    settings = Settings(
+        VBIC_CATALOG_CSV_PATH=str(catalog),
+        VBIC_REFERENCE_IMAGES_DIR=str(tmp_path / "images"),
+        VBIC_MIN_REF_DESCRIPTORS=0,
+    )
+    matcher = build_product_matcher(settings)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        items = predict_basket(
+            matcher,
+            _make_basket_frame(),
+            executor=executor,
+            max_regions=8,
+            min_area_frac=0.02,
+            nms_iou=0.3,
+        )
+
+    by_label = {item["label"]: item["box"] for item in items}
+    assert set(by_label) == {"Apple", "Banana"}
+    assert by_label["Apple"]["x"] < by_label["Banana"]["x"]
@@ -0,0 +1,136 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+from app.core.config import get_settings
+from app.core.product_matcher import get_product_matcher
+from app.core.shadow import ShadowEvaluator, get_shadow_evaluator
+from app.main import app
+from fastapi.testclient import TestClient
+
+
+class _FakeMatcher:
+    index_version = "shadow"
+
+    def __init__(self, label: str | None, gate: threading.Event | None = None):
+        self._label = label
+        self._gate = gate
+
+    def predict(self, bgr, *, tier=None):
+        if self._gate is not None:
+            self._gate.wait(5)
+        return [{"label": self._label, "confidence": 0.9}] if self._label else []
+
+
+def _evaluator(matcher, **kwargs) -> ShadowEvaluator:
+    options = dict(overrides={}, sample_rate=1.0, max_pending=4, max_samples=2)
+    options.update(kwargs)
+    return ShadowEvaluator(lambda: matcher, **options)
+
+
+def _submit(evaluator: ShadowEvaluator, primary: list[dict]) -> bool:
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+    return evaluator.submit(
+        frame, tier=None, primary=primary, primary_wall_ms=1.0, primary_cpu_ms=1.0
+    )
+
+
+def test_shadow_records_agreement_and_disagreements():
+    evaluator = _evaluator(_FakeMatcher("Apple"))
+    _submit(evaluator, [{"label": "Apple", "confidence": 0.8}])
+    _submit(evaluator, [{"label": "Pear", "confidence": 0.8}])
+    _submit(evaluator, [])
+    evaluator.drain()
+
+    stats = evaluator.stats()
+    assert stats["compared"] == 3
+    assert stats["agreed"] == 1
+    assert stats["agreement_rate"] == 1 / 3
+    assert stats["mean_cpu_delta_ms"] is not None
+    # Only the newest max_samples disagreements are kept.
+    assert [d["primary"] for d in stats["disagreements"]] == [
+        [{"label": "Pear", "confidence": 0.8}],
+        [],
+    ]
+
+
+def test_shadow_skips_instead_of_queueing():
+    gate = threading.Event()
+    evaluator = _evaluator(_FakeMatcher(None, gate), max_pending=1)
+    assert _submit(evaluator, [])
+    assert not _submit(evaluator, [])
+    gate.set()
+    evaluator.drain()
+    assert evaluator.stats()["skipped"] == 1
+    assert evaluator.stats()["compared"] == 1
+
+    assert not _submit(_evaluator(_FakeMatcher(None), sample_rate=0.0), [])
+
+
+def test_predict_feeds_shadow_matcher(monkeypatch, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("sku,name,price_cents\n1001,Apple,50\n", encoding="utf-8")
+    (tmp_path / "images").mkdir()
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(tmp_path / "images"))
+    monkeypatch.setenv("VBIC_SHADOW_SAMPLE_RATE", "1")
+    monkeypatch.setenv("VBIC_SHADOW_MATCHER_OVERRIDES", '{"orb_ratio_test": 0.7}')
+    monkeypatch.setenv("VBIC_DEBUG_TOKEN", "secret")
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+    get_shadow_evaluator.cache_clear()
+    try:
+        client = TestClient(app)
+        ok, jpeg = cv2.imencode(".jpg", np.full((48, 64, 3), 200, dtype=np.uint8))
+        assert ok
+        r = client.post(
+            "/predict",
+            content=jpeg.tobytes(),
+            headers={"Content-Type": "image/jpeg"},
+        )
+        assert r.status_code == 200
+        get_shadow_evaluator().drain()
+
+        stats = client.get(
+            "/debug/shadow", headers={"X-VBIC-Debug-Token": "secret"}
+        ).json()
+        assert stats["overrides"] == {"orb_ratio_test": 0.7}
+        assert stats["build_error"] is None
+        assert stats["compared"] == 1
+        assert stats["agreement_rate"] == 1.0
+    finally:
+        get_shadow_evaluator.cache_clear()
+
+
+@pytest.mark.parametrize("rate", ["0", "1"])
+@pytest.mark.parametrize(
+    "overrides", ["{not json", '["orb_ratio_test"]', '{"nope": 1}']
+)
+def test_bad_shadow_overrides_never_fail_predict(
+    monkeypatch, tmp_path, rate, overrides
+):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("sku,name,price_cents\n1001,Apple,50\n", encoding="utf-8")
+    (tmp_path / "images").mkdir()
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(tmp_path / "images"))
+    monkeypatch.setenv("VBIC_SHADOW_SAMPLE_RATE", rate)
+    monkeypatch.setenv("VBIC_SHADOW_MATCHER_OVERRIDES", overrides)
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+    get_shadow_evaluator.cache_clear()
+    try:
+        ok, jpeg = cv2.imencode(".jpg", np.full((48, 64, 3), 200, dtype=np.uint8))
+        assert ok
+        r = TestClient(app).post(
+            "/predict",
+            content=jpeg.tobytes(),
+            headers={"Content-Type": "image/jpeg"},
+        )
+        assert r.status_code == 200
+        assert get_shadow_evaluator() is None
+    finally:
+        get_shadow_evaluator.cache_clear()
@@ -0,0 +1,93 @@
+import numpy as np
+from app.core.config import Settings, get_settings
+from app.core.product_matcher import (
+    build_product_matcher,
+    get_product_matcher,
+    product_matcher_kwargs,
+    shard_for_sku,
+)
+from app.core.sharding import (
+    HttpShard,
+    LocalProcessShard,
+    ShardedProductMatcher,
+    decode_query,
+    encode_query,
+)
+from app.main import app
+from conftest import encode_jpeg, make_reference_image
+from fastapi.testclient import TestClient
+
+_PRODUCTS = {"1001": "APPLE", "1002": "BANANA", "1003": "KIWI", "1004": "MANGO"}
+
+
+def _settings(tmp_path) -> Settings:
+    rows = ["sku,name,price_cents"]
+    for sku, text in _PRODUCTS.items():
+        rows.append(f"{sku},{text.title()},100")
+        sku_dir = tmp_path / "images" / sku
+        sku_dir.mkdir(parents=True)
+        (sku_dir / "ref.jpg").write_bytes(encode_jpeg(make_reference_image(text)))
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    return Settings(
+        VBIC_CATALOG_CSV_PATH=str(catalog),
+        VBIC_REFERENCE_IMAGES_DIR=str(tmp_path / "images"),
+        VBIC_MIN_REF_DESCRIPTORS=0,
+    )
+
+
+def test_query_features_roundtrip_without_pickle(tmp_path):
+    matcher = build_product_matcher(_settings(tmp_path))
+    query = matcher._extract_query(
+        make_reference_image("KIWI"), orb_nfeatures=500, with_global=True
+    )
+    decoded = decode_query(encode_query(query))
+    assert np.array_equal(decoded.descriptors, query.descriptors)
+    assert np.array_equal(decoded.global_desc, query.global_desc)
+    assert decoded.hue_hist is None
+
+
+def test_local_process_shards_match_single_process_decision(tmp_path):
+    settings = _settings(tmp_path)
+    kwargs = product_matcher_kwargs(settings)
+    single = build_product_matcher(settings)
+
+    shards = [
+        LocalProcessShard(shard_index=i, shard_count=2, matcher_kwargs=kwargs)
+        for i in range(2)
+    ]
+    sharded = ShardedProductMatcher(shards=shards, **kwargs)
+    try:
+        for text in _PRODUCTS.values():
+            query = make_reference_image(text)
+            assert sharded.predict(query) == single.predict(query)
+            assert sharded.predict(query)[0]["label"] == text.title()
+    finally:
+        sharded.close()
+
+
+def test_http_shard_against_worker_endpoint(monkeypatch, tmp_path):
+    settings = _settings(tmp_path)
+    for name in ("CATALOG_CSV_PATH", "REFERENCE_IMAGES_DIR"):
+        monkeypatch.setenv(f"VBIC_{name}", getattr(settings, name.lower()))
+    monkeypatch.setenv("VBIC_MIN_REF_DESCRIPTORS", "0")
+    monkeypatch.setenv("VBIC_SHARD_MODE", "worker")
+    monkeypatch.setenv("VBIC_SHARD_COUNT", "2")
+    monkeypatch.setenv("VBIC_SHARD_INDEX", "1")
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+
+    owned = {sku for sku in _PRODUCTS if shard_for_sku(sku, 2) == 1}
+    assert 0 < len(owned) < len(_PRODUCTS)
+    shard = HttpShard("/shard/score", timeout_s=5.0, client=TestClient(app))
+    matcher = build_product_matcher(settings)
+    query = matcher._extract_query(
+        make_reference_image("KIWI"), orb_nfeatures=800, with_global=False
+    )
+    labels = {
+        item.label for item in shard.score(query, low_res=False, shortlist_size=0)
+    }
+    assert labels == {_PRODUCTS[sku].title() for sku in owned}
+
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+from app.core.config import get_settings
+from app.core.index_registry import get_index_registry
+from app.core.product_matcher import get_product_matcher
+from app.core.slow_capture import SlowRequestCapture, get_slow_capture, load_capture
+from app.main import app
+from fastapi.testclient import TestClient
+
+
+def test_ring_buffer_keeps_newest_entries(tmp_path):
+    capture = SlowRequestCapture(tmp_path / "slow", threshold_ms=0.0, max_entries=2)
+    frame = np.zeros((8, 8), dtype=np.uint8)
+    saved = [capture.save(frame, latency_ms=float(i), mode="single") for i in range(3)]
+
+    assert capture.entries() == saved[1:]
+    loaded, meta = load_capture(saved[-1])
+    assert loaded.shape == (8, 8)
+    assert meta["latency_ms"] == 2.0
+    assert meta["mode"] == "single"
+
+
+def test_slow_predict_is_captured(monkeypatch, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("sku,name,price_cents\n1001,Apple,50\n", encoding="utf-8")
+    (tmp_path / "images").mkdir()
+
+    monkeypatch.setenv("VBIC_CATALOG_CSV_PATH", str(catalog))
+    monkeypatch.setenv("VBIC_REFERENCE_IMAGES_DIR", str(tmp_path / "images"))
+    monkeypatch.setenv("VBIC_SLOW_CAPTURE_DIR", str(tmp_path / "slow"))
+    monkeypatch.setenv("VBIC_SLOW_CAPTURE_THRESHOLD_MS", "0")
+    get_settings.cache_clear()
+    get_product_matcher.cache_clear()
+    get_slow_capture.cache_clear()
+    try:
+        ok, jpeg = cv2.imencode(".jpg", np.full((48, 64, 3), 200, dtype=np.uint8))
+        assert ok
+        r = TestClient(app).post(
+            "/predict",
+            content=jpeg.tobytes(),
+            headers={"Content-Type": "image/jpeg"},
+        )
+        assert r.status_code == 200
+
+        (entry,) = get_slow_capture().entries()
+        frame, meta = load_capture(entry)
+        assert frame.shape == (48, 64, 3)
+        assert meta["index_version"] == get_product_matcher().index_version
+        assert meta["quality_tier"] == "full"
+        assert "decode" in meta["stages_ms"]
+        assert meta["matcher"]["catalog_csv_path"] == str(catalog)
+    finally:
+        get_slow_capture.cache_clear()
+
+
+def test_store_capture_records_store_matcher(monkeypatch, tmp_path):
+    store_dir = tmp_path / "stores" / "metro"
+    (store_dir / "images").mkdir(parents=True)
+    (store_dir / "catalog.csv").write_text(
+        "sku,name,price_cents\n2008,Kiwi,40\n", encoding="utf-8"
+    )
+
+    monkeypatch.setenv("VBIC_STORES_ROOT_DIR", str(tmp_path / "stores"))
+    monkeypatch.setenv("VBIC_SLOW_CAPTURE_DIR", str(tmp_path / "slow"))
+    monkeypatch.setenv("VBIC_SLOW_CAPTURE_THRESHOLD_MS", "0")
+    get_settings.cache_clear()
+    get_index_registry.cache_clear()
+    get_slow_capture.cache_clear()
+    try:
+        ok, jpeg = cv2.imencode(".jpg", np.full((48, 64, 3), 200, dtype=np.uint8))
+        assert ok
+        r = TestClient(app).post(
+            "/predict",
+            content=jpeg.tobytes(),
+            headers={"Content-Type": "image/jpeg", "X-VBIC-Store-Id": "metro"},
+        )
+        assert r.status_code == 200
+
+        (entry,) = get_slow_capture().entries()
+        _, meta = load_capture(entry)
+        assert meta["store_id"] == "metro"
+        assert meta["matcher"]["catalog_csv_path"] == str(store_dir / "catalog.csv")
+        assert meta["index_version"] == get_index_registry().get("metro").index_version
+    finally:
+        get_index_registry.cache_clear()
+        get_slow_capture.cache_clear()
@@ -0,0 +1,55 @@
+from app.tracing import RecordOnDrop, TailRetentionProcessor, build_sampler
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+
+def _tracer(exporter: InMemorySpanExporter, *, ratio: float):
+    sampler = RecordOnDrop(build_sampler("parentbased_traceidratio", ratio))
+    provider = TracerProvider(sampler=sampler)
+    provider.add_span_processor(
+        TailRetentionProcessor(
+            SimpleSpanProcessor(exporter), slow_ms=50.0, keep_errors=True
+        )
+    )
+    return provider.get_tracer(__name__)
+
+
+def test_unsampled_traces_kept_only_when_slow_or_failed(monkeypatch):
+    monkeypatch.setenv("OTEL_SDK_DISABLED", "false")
+    exporter = InMemorySpanExporter()
+    tracer = _tracer(exporter, ratio=0.0)
+
+    with tracer.start_as_current_span("fast"):
+        with tracer.start_as_current_span("fast.child"):
+            pass
+    assert exporter.get_finished_spans() == ()
+
+    with tracer.start_as_current_span("failed"):
+        with tracer.start_as_current_span("failed.child") as child:
+            child.set_status(Status(StatusCode.ERROR))
+    kept = exporter.get_finished_spans()
+    assert [span.name for span in kept] == ["failed.child", "failed"]
+    assert all(span.context.trace_flags.sampled for span in kept)
+    assert kept[1].attributes["vbic.trace_retained"] == "error"
+    exporter.clear()
+
+    root = tracer.start_span("slow", start_time=1_000_000_000)
+    root.end(end_time=1_000_000_000 + 80_000_000)
+    (kept,) = exporter.get_finished_spans()
+    assert kept.name == "slow"
+    assert kept.attributes["vbic.trace_retained"] == "slow"
+
+
+def test_sampled_traces_pass_through(monkeypatch):
+    monkeypatch.setenv("OTEL_SDK_DISABLED", "false")
+    exporter = InMemorySpanExporter()
+    tracer = _tracer(exporter, ratio=1.0)
+
+    with tracer.start_as_current_span("root"):
+        with tracer.start_as_current_span("child"):
+            pass
+    spans = exporter.get_finished_spans()
+    assert [span.name for span in spans] == ["child", "root"]
+    assert "vbic.trace_retained" not in spans[1].attributes
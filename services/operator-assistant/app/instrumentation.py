@@ -1,16 +1,130 @@
+import math
 import os
+import re
 
-from opentelemetry import trace
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
-    OTLPSpanExporter,
-)
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
+_OFF = {"", "none"}
 
+# Probes are hit every few seconds by the orchestrator and say nothing about
+# user-facing latency, so by default they get neither spans nor request metrics.
+DEFAULT_EXCLUDED_URLS = "/healthz,/livez,/readyz,/startupz,/metrics"
+
+
+def _exporters(variable: str, default: str) -> set[str]:
+    """Parse an ``OTEL_*_EXPORTER`` list such as ``otlp,prometheus``."""
+    raw = os.getenv(variable, default)
+    return {name.strip().lower() for name in raw.split(",")} - _OFF
+
+
+def telemetry_disabled() -> bool:
+    if os.getenv("OTEL_SDK_DISABLED", "").strip().lower() in {"true", "1", "yes"}:
+        return True
+    return not _exporters("OTEL_TRACES_EXPORTER", "otlp") and not _exporters(
+        "OTEL_METRICS_EXPORTER", "otlp"
+    )
+
+
+# Database statements mostly finish well under the SDK's default first bucket (5).
+_DB_QUERY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_UNIT_SUFFIXES = {"ms": "milliseconds", "s": "seconds", "By": "bytes"}
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _prometheus_name(name: str, unit: str | None) -> str:
+    name = _INVALID_NAME_CHARS.sub("_", name)
+    suffix = _UNIT_SUFFIXES.get(unit or "")
+    if suffix and not name.endswith(f"_{suffix}"):
+        name = f"{name}_{suffix}"
+    return name
+
+
+def _prometheus_labels(attributes, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = [
+        (_INVALID_NAME_CHARS.sub("_", str(key)), str(value))
+        for key, value in (attributes or {}).items()
+    ]
+    pairs.extend(extra)
+    if not pairs:
+        return ""
+    rendered = ",".join(
+        '{}="{}"'.format(
+            key,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for key, value in pairs
+    )
+    return "{" + rendered + "}"
+
+
+def render_prometheus(metrics_data) -> str:
+    """Render SDK ``MetricsData`` in the Prometheus text exposition format."""
+    from opentelemetry.sdk.metrics.export import Histogram, Sum
+
+    lines: list[str] = []
+    for resource_metrics in getattr(metrics_data, "resource_metrics", None) or []:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                name = _prometheus_name(metric.name, metric.unit)
+                data = metric.data
+                if isinstance(data, Sum) and data.is_monotonic:
+                    kind, sample_name = "counter", f"{name}_total"
+                elif isinstance(data, Histogram):
+                    kind, sample_name = "histogram", name
+                else:
+                    kind, sample_name = "gauge", name
+                if metric.description:
+                    lines.append(f"# HELP {sample_name} {metric.description}")
+                lines.append(f"# TYPE {sample_name} {kind}")
+                for point in data.data_points:
+                    labels = _prometheus_labels(point.attributes)
+                    if kind != "histogram":
+                        lines.append(f"{sample_name}{labels} {point.value}")
+                        continue
+                    cumulative = 0
+                    bounds = [*point.explicit_bounds, math.inf]
+                    for bound, count in zip(bounds, point.bucket_counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else f"{bound:g}"
+                        bucket_labels = _prometheus_labels(
+                            point.attributes, (("le", le),)
+                        )
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_sum{labels} {point.sum}")
+                    lines.append(f"{name}_count{labels} {point.count}")
+    return "\n".join(lines) + "\n"
+
+
+def _add_metrics_route(app, reader) -> None:
+    from fastapi.responses import PlainTextResponse
+
+    def metrics_endpoint() -> PlainTextResponse:
+        # Collected on demand, so a scrape always sees current values.
+        return PlainTextResponse(
+            render_prometheus(reader.get_metrics_data()),
+            media_type="text/plain; version=0.0.4",
+        )
+
+    app.add_api_route(
+        "/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False
+    )
+
+
+def setup_telemetry(app, service_name: str | None = None, *, span_exporter=None):
+    """Configure tracing and metrics from the standard ``OTEL_*`` variables.
+
+    ``span_exporter`` replaces the OTLP span exporter (benchmarks and tests).
+    """
+    if telemetry_disabled():
+        return
+
+    # The SDK and the gRPC exporter stack are slow to import, so they are only
+    # loaded once telemetry is actually enabled.
+    from opentelemetry import metrics, trace
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
+    from opentelemetry.sdk.resources import Resource
 
-def setup_telemetry(app, service_name: str | None = None):
     service_name = service_name or os.getenv("OTEL_SERVICE_NAME", "operator-assistant")
     endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://otel-collector:4317")
 
@@ -19,14 +133,65 @@ def setup_telemetry(app, service_name: str | None = None):
             "service.name": service_name,
             "service.instance.id": os.getenv("HOSTNAME", "local"),
             "service.version": os.getenv("SERVICE_VERSION", "0.1.0"),
+            # Gunicorn workers share a hostname; keep their cumulative series apart.
+            "process.pid": os.getpid(),
         }
     )
 
-    provider = TracerProvider(resource=resource)
-    exporter = OTLPSpanExporter(endpoint=endpoint)
-    processor = BatchSpanProcessor(exporter)
-    provider.add_span_processor(processor)
+    if span_exporter is not None or "otlp" in _exporters(
+        "OTEL_TRACES_EXPORTER", "otlp"
+    ):
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        from .tracing import configure_sampling
+
+        if span_exporter is None:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+                OTLPSpanExporter,
+            )
+
+            span_exporter = OTLPSpanExporter(endpoint=endpoint)
+        sampler, processor = configure_sampling(BatchSpanProcessor(span_exporter))
+        provider = TracerProvider(resource=resource, sampler=sampler)
+        provider.add_span_processor(processor)
 
-    trace.set_tracer_provider(provider)
+        trace.set_tracer_provider(provider)
 
-    FastAPIInstrumentor.instrument_app(app)
+    metric_exporters = _exporters("OTEL_METRICS_EXPORTER", "otlp")
+    readers = []
+    if "otlp" in metric_exporters:
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import (
+            OTLPMetricExporter,
+        )
+        from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+
+        # Export interval follows OTEL_METRIC_EXPORT_INTERVAL (60s by default).
+        readers.append(
+            PeriodicExportingMetricReader(OTLPMetricExporter(endpoint=endpoint))
+        )
+    if "prometheus" in metric_exporters:
+        from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+        pull_reader = InMemoryMetricReader()
+        readers.append(pull_reader)
+        _add_metrics_route(app, pull_reader)
+    if readers:
+        db_query_view = View(
+            instrument_name="*.db.query.duration",
+            aggregation=ExplicitBucketHistogramAggregation(_DB_QUERY_BUCKETS_MS),
+        )
+        metrics.set_meter_provider(
+            MeterProvider(
+                resource=resource, metric_readers=readers, views=[db_query_view]
+            )
+        )
+
+    # Records http.server.duration and http.server.active_requests as well as
+    # the request spans.
+    FastAPIInstrumentor.instrument_app(
+        app,
+        excluded_urls=os.getenv(
+            "OTEL_PYTHON_FASTAPI_EXCLUDED_URLS", DEFAULT_EXCLUDED_URLS
+        ),
+    )
@@ -1,9 +1,13 @@
 import os
+import time
 
 from fastapi import FastAPI
 
 from .instrumentation import setup_telemetry
 from .routers import health, tools
+from .startup import process_uptime_s, record_phase
+
+record_phase("imports", process_uptime_s())
 
 
 def create_app() -> FastAPI:
@@ -13,8 +17,13 @@ def create_app() -> FastAPI:
     return app
 
 
+_started = time.perf_counter()
 app = create_app()
+record_phase("create_app", time.perf_counter() - _started)
+
+_started = time.perf_counter()
 setup_telemetry(
     app,
     service_name=os.getenv("OTEL_SERVICE_NAME", "operator-assistant"),
 )
+record_phase("setup_telemetry", time.perf_counter() - _started)
@@ -0,0 +1,194 @@
+"""Sampling and tail-style retention for request traces.
+
+Imported lazily by ``instrumentation.setup_telemetry`` because it needs the
+OpenTelemetry SDK.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.sampling import (
+    ALWAYS_OFF,
+    ALWAYS_ON,
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanContext, StatusCode, TraceFlags
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    return float(raw) if raw else default
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in {"true", "1", "yes"}
+
+
+def build_sampler(name: str, ratio: float) -> Sampler:
+    """Build a sampler from ``OTEL_TRACES_SAMPLER``-style names."""
+    ratio = max(0.0, min(1.0, ratio))
+    samplers = {
+        "always_on": lambda: ALWAYS_ON,
+        "always_off": lambda: ALWAYS_OFF,
+        "traceidratio": lambda: TraceIdRatioBased(ratio),
+        "parentbased_always_on": lambda: ParentBased(ALWAYS_ON),
+        "parentbased_always_off": lambda: ParentBased(ALWAYS_OFF),
+        "parentbased_traceidratio": lambda: ParentBased(TraceIdRatioBased(ratio)),
+    }
+    try:
+        return samplers[name.strip().lower()]()
+    except KeyError:
+        raise ValueError(f"Unsupported trace sampler: {name!r}") from None
+
+
+class RecordOnDrop(Sampler):
+    """Turn the wrapped sampler's drops into record-only spans.
+
+    Record-only spans are never exported on their own, but
+    :class:`TailRetentionProcessor` can still keep the whole trace once its
+    root span turns out to be slow or failed.
+    """
+
+    def __init__(self, delegate: Sampler) -> None:
+        self._delegate = delegate
+
+    def should_sample(
+        self,
+        parent_context,
+        trace_id,
+        name,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ) -> SamplingResult:
+        result = self._delegate.should_sample(
+            parent_context, trace_id, name, kind, attributes, links, trace_state
+        )
+        if result.decision is not Decision.DROP:
+            return result
+        return SamplingResult(Decision.RECORD_ONLY, result.attributes, trace_state)
+
+    def get_description(self) -> str:
+        return f"RecordOnDrop{{{self._delegate.get_description()}}}"
+
+
+def _as_sampled(span: ReadableSpan, reason: str) -> ReadableSpan:
+    context = span.context
+    sampled = SpanContext(
+        context.trace_id,
+        context.span_id,
+        context.is_remote,
+        TraceFlags(context.trace_flags | TraceFlags.SAMPLED),
+        context.trace_state,
+    )
+    return ReadableSpan(
+        name=span.name,
+        context=sampled,
+        parent=span.parent,
+        resource=span.resource,
+        attributes={**(span.attributes or {}), "vbic.trace_retained": reason},
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class TailRetentionProcessor(SpanProcessor):
+    """Export sampled spans, plus unsampled traces that ended slow or in error.
+
+    Spans of unsampled (record-only) traces are buffered per trace until the
+    local root span ends. The trace is then forwarded if the root took at
+    least ``slow_ms`` or any of its spans has an error status, and dropped
+    otherwise. At most ``max_pending_traces`` traces are buffered; the oldest
+    are dropped first.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        *,
+        slow_ms: float,
+        keep_errors: bool,
+        max_pending_traces: int = 2048,
+    ) -> None:
+        self._delegate = delegate
+        self._slow_ns = int(max(0.0, slow_ms) * 1_000_000)
+        self._keep_errors = keep_errors
+        self._max_pending = max(1, max_pending_traces)
+        self._lock = threading.Lock()
+        self._pending: OrderedDict[int, list[ReadableSpan]] = OrderedDict()
+
+    def on_start(self, span, parent_context=None) -> None:
+        self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context.trace_flags.sampled:
+            self._delegate.on_end(span)
+            return
+
+        trace_id = span.context.trace_id
+        local_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            spans = self._pending.setdefault(trace_id, [])
+            spans.append(span)
+            if not local_root:
+                while len(self._pending) > self._max_pending:
+                    self._pending.popitem(last=False)
+                return
+            del self._pending[trace_id]
+
+        reason = self._retain_reason(span, spans)
+        if reason is not None:
+            for pending in spans:
+                self._delegate.on_end(_as_sampled(pending, reason))
+
+    def _retain_reason(
+        self, root: ReadableSpan, spans: list[ReadableSpan]
+    ) -> str | None:
+        if self._slow_ns and root.end_time - root.start_time >= self._slow_ns:
+            return "slow"
+        if self._keep_errors and any(
+            span.status.status_code is StatusCode.ERROR for span in spans
+        ):
+            return "error"
+        return None
+
+    def shutdown(self) -> None:
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._delegate.force_flush(timeout_millis)
+
+
+def configure_sampling(processor: SpanProcessor) -> tuple[Sampler, SpanProcessor]:
+    """Return the (sampler, span processor) pair configured by the environment.
+
+    ``OTEL_TRACES_SAMPLER`` / ``OTEL_TRACES_SAMPLER_ARG`` choose head sampling
+    (parent-based, ratio 1.0 by default). ``VBIC_TRACES_KEEP_SLOW_MS`` and
+    ``VBIC_TRACES_KEEP_ERRORS`` additionally keep unsampled traces whose root
+    span was slow or failed; this records every span, so it costs more than
+    head sampling alone.
+    """
+    sampler = build_sampler(
+        os.getenv("OTEL_TRACES_SAMPLER", "parentbased_traceidratio"),
+        _env_float("OTEL_TRACES_SAMPLER_ARG", 1.0),
+    )
+    slow_ms = _env_float("VBIC_TRACES_KEEP_SLOW_MS", 0.0)
+    keep_errors = _env_flag("VBIC_TRACES_KEEP_ERRORS")
+    if slow_ms <= 0 and not keep_errors:
+        return sampler, processor
+    retention = TailRetentionProcessor(
+        processor, slow_ms=slow_ms, keep_errors=keep_errors
+    )
+    return RecordOnDrop(sampler), retention
@@ -4,7 +4,7 @@ from fastapi.testclient import TestClient
 
 def test_health_endpoints():
     client = TestClient(app)
-    for path in ("/healthz", "/readyz", "/livez"):
+    for path in ("/healthz", "/readyz", "/livez", "/startupz"):
         r = client.get(path)
         assert r.status_code == 200
         assert isinstance(r.json(), dict)
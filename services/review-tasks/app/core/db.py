@@ -1,5 +1,8 @@
+import time
 from contextlib import contextmanager
 
+from opentelemetry import metrics
+from sqlalchemy import event
 from sqlmodel import Session, SQLModel, create_engine
 
 from ..core.config import settings
@@ -8,6 +11,37 @@ _db_url = settings.db_url
 connect_args = {"check_same_thread": False} if _db_url.startswith("sqlite") else {}
 engine = create_engine(_db_url, echo=False, connect_args=connect_args)
 
+_meter = metrics.get_meter(__name__)
+_query_duration = _meter.create_histogram(
+    "vbic.review_tasks.db.query.duration",
+    unit="ms",
+    description="Database statement execution time, by operation.",
+)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("vbic_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["vbic_query_started"].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+    _query_duration.record(
+        (time.perf_counter() - started) * 1000.0,
+        {"db.system": engine.dialect.name, "db.operation": operation},
+    )
+
+
+@event.listens_for(engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time.
+    if context.connection is not None:
+        started = context.connection.info.get("vbic_query_started")
+        if started:
+            started.pop()
+
 
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
@@ -1,10 +1,14 @@
 import os
+import time
 
 from fastapi import FastAPI
 
 from .core.db import init_db
 from .instrumentation import setup_telemetry
 from .routers import health, tasks
+from .startup import process_uptime_s, record_phase
+
+record_phase("imports", process_uptime_s())
 
 
 def create_app() -> FastAPI:
@@ -19,8 +23,13 @@ def create_app() -> FastAPI:
     return app
 
 
+_started = time.perf_counter()
 app = create_app()
+record_phase("create_app", time.perf_counter() - _started)
+
+_started = time.perf_counter()
 setup_telemetry(
     app,
     service_name=os.getenv("OTEL_SERVICE_NAME", "review-tasks"),
 )
+record_phase("setup_telemetry", time.perf_counter() - _started)
@@ -9,6 +9,21 @@ type Prediction = {
 
 type PredictResult = { predictions: Prediction[] }
 
+type StageTiming = { name: string; durationMs: number }
+
+// Parses `Server-Timing: decode;dur=2.10, match;dur=5.32, ...` from /predict.
+function parseServerTiming(header: string | null): StageTiming[] {
+  if (!header) return []
+  return header
+    .split(',')
+    .map((entry) => {
+      const [name, ...params] = entry.trim().split(';')
+      const dur = params.map((param) => param.trim()).find((param) => param.startsWith('dur='))
+      return { name: name.trim(), durationMs: dur ? Number(dur.slice(4)) : Number.NaN }
+    })
+    .filter((timing) => timing.name && Number.isFinite(timing.durationMs))
+}
+
 const TEXT = {
   uk: {
     couldNotCaptureFrame: 'Не вдалося зчитати кадр із вебкамери.',
@@ -42,7 +57,8 @@ const TEXT = {
     createReviewTask: 'Створити завдання на перевірку',
     noPredictionYet: 'Поки немає прогнозу.',
     previewAlt: 'Попередній перегляд обраного товару',
-    bboxLabel: 'Рамка виявленого обʼєкта'
+    bboxLabel: 'Рамка виявленого обʼєкта',
+    serverTiming: 'Час обробки на сервері'
   },
   en: {
     couldNotCaptureFrame: 'Could not capture a frame from webcam.',
@@ -76,7 +92,8 @@ const TEXT = {
     createReviewTask: 'Create Review Task',
     noPredictionYet: 'No prediction yet.',
     previewAlt: 'Selected product preview',
-    bboxLabel: 'Predicted object bounding box'
+    bboxLabel: 'Predicted object bounding box',
+    serverTiming: 'Server timing'
   }
 } as const
 
@@ -90,6 +107,7 @@ export default function Recognize({ language }: Props) {
   const [imgDims, setImgDims] = useState<{ w: number; h: number } | null>(null)
   const [displayDims, setDisplayDims] = useState<{ w: number; h: number } | null>(null)
   const [result, setResult] = useState<PredictResult | null>(null)
+  const [timings, setTimings] = useState<StageTiming[]>([])
   const [liveEnabled, setLiveEnabled] = useState(true)
   const [liveResult, setLiveResult] = useState<PredictResult | null>(null)
   const [liveError, setLiveError] = useState<string | null>(null)
@@ -206,6 +224,7 @@ export default function Recognize({ language }: Props) {
     const nextFile = event.target.files?.[0] || null
     setFile(nextFile)
     setResult(null)
+    setTimings([])
     setError(null)
     setTaskStatus(null)
 
@@ -232,6 +251,7 @@ export default function Recognize({ language }: Props) {
       }
       const data = (await response.json()) as PredictResult
       setResult(data)
+      setTimings(parseServerTiming(response.headers.get('Server-Timing')))
     } catch (submitError) {
       setError(submitError instanceof Error ? submitError.message : t.couldNotRunRecognition)
     } finally {
@@ -285,6 +305,7 @@ export default function Recognize({ language }: Props) {
     setFile(capturedFile)
     setPreview(nextPreview)
     setResult(null)
+    setTimings([])
     setError(null)
     setTaskStatus(null)
     setWebcamError(null)
@@ -447,6 +468,19 @@ export default function Recognize({ language }: Props) {
                     <p className="text-sm text-slate-600">{t.confidence}: {confidencePct}%</p>
                   </div>
                 )}
+                {timings.length > 0 && (
+                  <div className="rounded-lg bg-slate-50 p-3">
+                    <p className="text-sm text-slate-600">{t.serverTiming}</p>
+                    <dl className="mt-1 grid grid-cols-2 gap-x-4 text-sm">
+                      {timings.map((timing) => (
+                        <div key={timing.name} className="contents">
+                          <dt className="text-slate-500">{timing.name}</dt>
+                          <dd className="text-right font-mono text-slate-800">{timing.durationMs.toFixed(1)} ms</dd>
+                        </div>
+                      ))}
+                    </dl>
+                  </div>
+                )}
                 <pre className="overflow-auto rounded-lg bg-slate-900 p-3 text-sm text-slate-100">{JSON.stringify(result, null, 2)}</pre>
                 <button
                   onClick={createTask}